@@ -3,3 +3,5 @@ set -euxo pipefail
 
 cd /var/www/every_election/code/
 uv run manage.py migrate --noinput
+uv run manage.py populate_simplified_tables --where-missing
+uv run manage.py refresh_serialized_elections
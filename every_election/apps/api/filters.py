@@ -8,16 +8,11 @@ from organisations.models import OrganisationGeography
 
 class ElectionFilter(django_filters.FilterSet):
     def election_intersects_local_authority_filter(self, queryset, name, value):
-        og_qs = OrganisationGeography.objects.filter(
+        local_authority_geographies = OrganisationGeography.objects.filter(
             organisation__official_identifier=value,
             organisation__organisation_type="local-authority",
-        ).select_related("organisation")
-
-        if not og_qs.exists():
-            raise ValidationError(
-                """Only local authorities supported""",
-                code="invalid",
-            )
+        )
+        og_qs = local_authority_geographies
 
         if self.data.get("future", False):
             og_qs = og_qs.filter(
@@ -39,22 +34,23 @@ class ElectionFilter(django_filters.FilterSet):
                 | Q(start_date=None)
             )
 
-        try:
-            og_qs.get()
-        except OrganisationGeography.MultipleObjectsReturned:
+        og_ids = list(og_qs.values_list("pk", flat=True)[:2])
+        if len(og_ids) > 1:
             raise ValidationError(
                 """Organisation has more than one geography,
                 please specify a `poll_open_date` or organisation_start_date""",
                 code="invalid",
             )
-        except OrganisationGeography.DoesNotExist:
-            return og_qs
+        if not og_ids:
+            if not local_authority_geographies.exists():
+                raise ValidationError(
+                    """Only local authorities supported""",
+                    code="invalid",
+                )
+            return queryset.none()
 
         return queryset.filter(
-            Q(division_geography__geography__bboverlaps=og_qs.get().geography)
-            | Q(
-                organisation_geography__geography__bboverlaps=og_qs.get().geography
-            )
+            local_authority_intersections__organisation_geography_id=og_ids[0]
         ).prefetch_related("_children_qs")
 
     organisation_identifier = django_filters.CharFilter(
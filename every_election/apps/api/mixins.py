@@ -0,0 +1,142 @@
+import hashlib
+from datetime import datetime, time
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def start_of_today():
+    return timezone.make_aware(
+        datetime.combine(timezone.now().date(), time.min)
+    )
+
+
+def get_election_queryset_version(queryset):
+    """
+    Returns (last_modified, version) for a QuerySet of elections in one
+    aggregate query.
+
+    `children` and `replaced_by` are serialized from other rows, so rather
+    than join those in we use the time the stored SerializedElection was
+    last rebuilt, which happens whenever anything in it changes.
+    """
+    version = queryset.order_by().aggregate(
+        modified=Max("modified"),
+        serialized_modified=Max("serialized__modified"),
+        count=Count("pk"),
+    )
+    # `current` is calculated relative to today
+    today = start_of_today()
+    timestamps = [
+        version["modified"],
+        version["serialized_modified"],
+        today,
+    ]
+    return max(ts for ts in timestamps if ts), (*version.values(), today)
+
+
+def get_election_version(election):
+    """
+    Returns (last_modified, version) for a single election, using the
+    related objects that are already loaded by
+    ElectionViewSet.get_queryset wherever possible.
+    """
+    timestamps = [election.modified, start_of_today()]
+    version = [election.pk, election.modified]
+
+    if election.organisation:
+        timestamps.append(election.organisation.modified)
+    if election.division:
+        timestamps.append(election.division.modified)
+        divisionset = election.division.divisionset
+        # OrganisationDivisionSet isn't timestamped so use its content
+        version += [
+            divisionset.pk,
+            divisionset.start_date,
+            divisionset.end_date,
+            divisionset.short_title,
+            divisionset.legislation_url,
+            divisionset.consultation_url,
+            divisionset.notes,
+        ]
+    version += [election.metadata_id, election.explanation_id]
+
+    for replacement in election._replaced_by.all():
+        timestamps.append(replacement.modified)
+        version.append(replacement.election_id)
+
+    if election.group_type:
+        children = election._children_qs.aggregate(
+            modified=Max("modified"), count=Count("pk")
+        )
+        if children["modified"]:
+            timestamps.append(children["modified"])
+        version += [children["modified"], children["count"]]
+
+    timestamps = [ts for ts in timestamps if ts]
+    return max(timestamps), tuple(version + timestamps)
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET support (ETag, Last-Modified and 304 Not Modified)
+    for read only API views.
+
+    Before serializing anything, views call `get_not_modified_response`
+    with the last modified time and a tuple of values that the
+    representation depends on. If the client already has this version we
+    return a 304 without doing any more work. Otherwise the validators are
+    attached to the response in `finalize_response`.
+    """
+
+    conditional_etag = None
+    conditional_last_modified = None
+
+    def make_etag(self, version):
+        # The same object can be represented in lots of ways
+        # (format, pagination, filters, JSONP callback...)
+        # so include the full request path in the tag
+        renderer = getattr(self.request, "accepted_renderer", None)
+        parts = [
+            self.request.get_full_path(),
+            getattr(renderer, "format", ""),
+            *version,
+        ]
+        digest = hashlib.sha1(
+            "|".join(str(part) for part in parts).encode("utf8")
+        )
+        return quote_etag(digest.hexdigest())
+
+    def get_not_modified_response(
+        self, last_modified, version, check_last_modified=True
+    ):
+        """
+        `check_last_modified=False` means we still send a Last-Modified
+        header, but we only trust the ETag to decide if a client's copy is
+        current. This is needed for lists, where removing an item from
+        the result set doesn't necessarily move the max(modified) forward.
+        """
+        self.conditional_etag = self.make_etag(version)
+        self.conditional_last_modified = (
+            int(last_modified.timestamp()) if last_modified else None
+        )
+        return get_conditional_response(
+            self.request,
+            etag=self.conditional_etag,
+            last_modified=self.conditional_last_modified
+            if check_last_modified
+            else None,
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if response.status_code in (200, 304):
+            if self.conditional_etag:
+                response["ETag"] = self.conditional_etag
+            if self.conditional_last_modified:
+                response["Last-Modified"] = http_date(
+                    self.conditional_last_modified
+                )
+        return response
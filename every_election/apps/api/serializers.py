@@ -1,9 +1,13 @@
+import json
+
 from elections.ca_election_metadata import CA_VOTING_SYSTEMS
 from elections.models import (
     Election,
+    ElectionChange,
     ElectionSubType,
     ElectionType,
     ModerationStatuses,
+    SerializedElection,
 )
 from organisations.models import (
     Organisation,
@@ -64,14 +68,68 @@ class OrganisationSerializer(serializers.ModelSerializer):
         fields = org_fields
 
 
-class OrganisationGeoSerializer(GeoFeatureModelSerializer):
-    geography_model = GeometrySerializerMethodField()
+def round_coordinates(coordinates, precision):
+    if isinstance(coordinates, (list, tuple)):
+        return [round_coordinates(c, precision) for c in coordinates]
+    return round(coordinates, precision)
+
+
+class RoundedGeometrySerializerMethodField(GeometrySerializerMethodField):
+    """
+    GeometrySerializerMethodField ignores `precision`, so round the
+    coordinates of the GeoJSON it returns ourselves
+    """
+
+    precision = None
+
+    def to_representation(self, value):
+        data = super().to_representation(value)
+        if data is None or self.precision is None:
+            return data
+        if "coordinates" in data:
+            data["coordinates"] = round_coordinates(
+                data["coordinates"], self.precision
+            )
+        for geometry in data.get("geometries", []):
+            geometry["coordinates"] = round_coordinates(
+                geometry["coordinates"], self.precision
+            )
+        return data
+
+
+class SimplifiedGeographyMixin:
+    """
+    For /geo endpoints. Serves the simplified copy of the geography at the
+    tolerance in `context["simplify"]` if there is one, and rounds
+    coordinates to `context["precision"]` decimal places.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields["geography_model"].precision = self.context.get("precision")
+        return fields
+
+    def get_simplified_geography(self, geography):
+        tolerance = self.context.get("simplify")
+        if tolerance:
+            simplified = geography.simplified.filter(
+                tolerance=tolerance
+            ).first()
+            if simplified:
+                return simplified.geography
+        return geography.geography
+
+
+class OrganisationGeoSerializer(
+    SimplifiedGeographyMixin, GeoFeatureModelSerializer
+):
+    geography_model = RoundedGeometrySerializerMethodField()
     url = OrganisationHyperlinkedIdentityField(
         view_name="api:organisation-geo", read_only=True
     )
 
     def get_geography_model(self, obj):
-        return obj.geographies.latest().geography
+        return self.get_simplified_geography(obj.geographies.latest())
 
     class Meta:
         model = Organisation
@@ -125,6 +183,12 @@ class ElectionSubTypeSerializer(serializers.ModelSerializer):
         fields = ("name", "election_subtype")
 
 
+class ElectionChangeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ElectionChange
+        fields = ("sequence", "election_id", "change_type", "modified")
+
+
 class ElectedRoleField(serializers.RelatedField):
     def to_representation(self, value):
         return value.elected_title
@@ -172,6 +236,45 @@ election_fields = (
 )
 
 
+# What each of election_fields needs loading:
+# (columns, select_related, prefetch_related)
+# so that we can skip the work for fields that weren't asked for.
+election_field_dependencies = {
+    "election_type": (["election_type"], ["election_type"], []),
+    "election_subtype": (["election_subtype"], ["election_subtype"], []),
+    "organisation": (["organisation"], ["organisation"], []),
+    "group": (["group"], ["group"], []),
+    "group_type": (["group_type"], [], []),
+    "identifier_type": (["group_type"], [], []),
+    "children": (["group_type"], [], []),
+    "elected_role": (["elected_role"], ["elected_role"], []),
+    "division": (["division"], ["division", "division__divisionset"], []),
+    "voting_system": (["group_type", "voting_system"], [], []),
+    "current": (["current", "poll_open_date"], [], []),
+    "explanation": (["explanation"], ["explanation"], []),
+    "metadata": (["metadata"], ["metadata"], []),
+    "deleted": (["current_status"], [], []),
+    "replaces": (["replaces"], ["replaces"], []),
+    "replaced_by": ([], [], ["_replaced_by"]),
+}
+
+
+def get_election_field_dependencies(fields):
+    """
+    Returns (columns, select_related, prefetch_related) needed to
+    serialize `fields` of an election.
+    """
+    columns, select_related, prefetch_related = set(), set(), set()
+    for field in fields:
+        field_columns, field_select, field_prefetch = (
+            election_field_dependencies.get(field, ([field], [], []))
+        )
+        columns.update(field_columns)
+        select_related.update(field_select)
+        prefetch_related.update(field_prefetch)
+    return sorted(columns), sorted(select_related), sorted(prefetch_related)
+
+
 class BaseElectionSerializer(serializers.ModelSerializer):
     election_type = ElectionTypeSerializer()
     election_subtype = ElectionSubTypeSerializer()
@@ -195,6 +298,20 @@ class BaseElectionSerializer(serializers.ModelSerializer):
     )
     tags = serializers.JSONField()
 
+    def get_fields(self):
+        """
+        If the context has a list of `fields`, only serialize those.
+        """
+        fields = super().get_fields()
+        selected = self.context.get("fields")
+        if selected is not None:
+            fields = {
+                name: field
+                for name, field in fields.items()
+                if name in selected
+            }
+        return fields
+
     def get_deleted(self, obj: Election):
         return obj.current_status == ModerationStatuses.deleted.value
 
@@ -219,9 +336,10 @@ class BaseElectionSerializer(serializers.ModelSerializer):
     def get_children(self, obj: Election) -> list[str]:
         if not obj.group_type:
             return []
-        if children := getattr(obj, "children", None):
+        if (children := getattr(obj, "children", None)) is not None:
             return [c.election_id for c in children]
-        if self.context["request"].query_params.get("deleted", None):
+        request = self.context["request"]
+        if request and request.query_params.get("deleted", None):
             children = (
                 obj.get_children("private_objects")
                 .all()
@@ -246,13 +364,38 @@ class ElectionSerializer(
         depth = 1
 
 
-class ElectionGeoSerializer(GeoFeatureModelSerializer, BaseElectionSerializer):
-    geography_model = GeometrySerializerMethodField()
+class SerializedElectionSerializer(serializers.BaseSerializer):
+    """
+    Read only serializer that returns the document stored in
+    SerializedElection, only filling in the parts that depend on the
+    request or the current date. Elections without a stored document
+    fall back to ElectionSerializer.
+    """
+
+    def to_representation(self, instance):
+        try:
+            data = json.loads(instance.serialized.document)
+        except SerializedElection.DoesNotExist:
+            return ElectionSerializer(instance, context=self.context).data
+
+        data["current"] = instance.get_current
+        request = self.context.get("request")
+        if request and data["organisation"]:
+            data["organisation"]["url"] = request.build_absolute_uri(
+                data["organisation"]["url"]
+            )
+        return data
+
+
+class ElectionGeoSerializer(
+    SimplifiedGeographyMixin, GeoFeatureModelSerializer, BaseElectionSerializer
+):
+    geography_model = RoundedGeometrySerializerMethodField()
 
     def get_geography_model(self, obj):
         if obj.geography is None:
             return None
-        return obj.geography.geography
+        return self.get_simplified_geography(obj.geography)
 
     class Meta:
         model = Election
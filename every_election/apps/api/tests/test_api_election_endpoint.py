@@ -1,10 +1,18 @@
+import gzip
 import json
+import os
+import tempfile
 from datetime import datetime, timedelta
 from urllib.parse import urlencode
 
 import pytest
 import vcr
-from elections.models import ElectionType, MetaData
+from api.tiles import remove_stale_siblings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import override_settings
+from django.utils import timezone
+from elections.managers import get_geography_generation
+from elections.models import ElectionType, MetaData, SerializedElection
 from elections.tests.factories import (
     ElectionFactory,
     ElectionWithStatusFactory,
@@ -12,6 +20,7 @@ from elections.tests.factories import (
     ModerationStatusFactory,
     related_status,
 )
+from freezegun import freeze_time
 from organisations.tests.factories import (
     DivisionGeographyFactory,
     OrganisationDivisionFactory,
@@ -19,7 +28,7 @@ from organisations.tests.factories import (
     OrganisationFactory,
     OrganisationGeographyFactory,
 )
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
 
 
 class TestElectionAPIQueries(APITestCase):
@@ -76,7 +85,7 @@ class TestElectionAPIQueries(APITestCase):
         ElectionWithStatusFactory(group=None, division_geography=None)
 
         # we should monitor this and be aware if this number increases
-        with self.assertNumQueries(5):
+        with self.assertNumQueries(7):
             resp = self.client.get("/api/elections/?postcode=SW1A1AA")
 
         data = resp.json()
@@ -139,6 +148,40 @@ class TestElectionAPIQueries(APITestCase):
         assert data["results"][0]["election_id"] == election_id
         assert len(data["results"]) == 1
 
+    def test_election_lookup_batch(self):
+        election_id = "local.place-name.2017-03-23"
+        ElectionWithStatusFactory(group=None, election_id=election_id)
+        ElectionWithStatusFactory(group=None, division_geography=None)
+
+        inside = "51.5010089365,-0.141587600123"
+        outside = "0.0,0.0"
+        resp = self.client.post(
+            "/api/elections/lookup/",
+            {"coords": [inside, outside], "postcodes": ["not-a-postcode"]},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(
+            data,
+            {
+                "coords": {inside: [election_id], outside: []},
+                "postcodes": {"not-a-postcode": None},
+            },
+        )
+
+    def test_election_lookup_batch_invalid(self):
+        resp = self.client.post(
+            "/api/elections/lookup/", {"coords": ["foo"]}, format="json"
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json()["detail"], "Invalid co-ordinates")
+
+        resp = self.client.post(
+            "/api/elections/lookup/", {"coords": "foo"}, format="json"
+        )
+        self.assertEqual(resp.status_code, 400)
+
     def test_metadata_filter(self):
         election = ElectionWithStatusFactory(
             group=None, poll_open_date=datetime.today()
@@ -217,6 +260,51 @@ class TestElectionAPIQueries(APITestCase):
         with self.assertNumQueries(2):
             self.client.get(f"/api/elections/{id_}/")
 
+    def test_detail_conditional_get(self):
+        id_ = ElectionWithStatusFactory(group=None).election_id
+        resp = self.client.get(f"/api/elections/{id_}/")
+        self.assertEqual(200, resp.status_code)
+        etag = resp["ETag"]
+        self.assertTrue(resp.has_header("Last-Modified"))
+
+        resp = self.client.get(
+            f"/api/elections/{id_}/", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(304, resp.status_code)
+        self.assertEqual(resp["ETag"], etag)
+
+        resp = self.client.get(
+            f"/api/elections/{id_}/", HTTP_IF_NONE_MATCH='"not-the-etag"'
+        )
+        self.assertEqual(200, resp.status_code)
+
+    def test_list_conditional_get(self):
+        election = ElectionWithStatusFactory(group=None)
+        resp = self.client.get("/api/elections/")
+        etag = resp["ETag"]
+
+        with self.assertNumQueries(1):
+            resp = self.client.get("/api/elections/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, resp.status_code)
+
+        # A change to the data gives us a new ETag
+        election.save()
+        resp = self.client.get("/api/elections/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, resp.status_code)
+        self.assertNotEqual(resp["ETag"], etag)
+
+        # So does asking for a different representation
+        resp = self.client.get(
+            "/api/elections/?limit=1", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(200, resp.status_code)
+
+        # And a new day, as `current` depends on it
+        etag = self.client.get("/api/elections/")["ETag"]
+        with freeze_time(timezone.now() + timedelta(days=1)):
+            resp = self.client.get("/api/elections/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, resp.status_code)
+
     def test_identifier_type_filter(self):
         group = ElectionWithStatusFactory(
             group_type="election", moderation_status=related_status("Approved")
@@ -524,6 +612,151 @@ class TestElectionAPIQueries(APITestCase):
         data = resp.json()
         self.assertEqual(data["properties"], self.expected_object)
 
+    def test_serialized_election_documents(self):
+        org = OrganisationFactory()
+        with self.captureOnCommitCallbacks(execute=True):
+            group = ElectionWithStatusFactory(
+                group=None, group_type="election", organisation=org
+            )
+            ballot = ElectionWithStatusFactory(group=group, organisation=org)
+        self.assertEqual(SerializedElection.objects.count(), 2)
+
+        def get_responses():
+            return [
+                self.client.get("/api/elections/").json(),
+                self.client.get(f"/api/elections/{ballot.election_id}/").json(),
+            ]
+
+        with self.assertNumQueries(3):
+            # count, elections joined to documents, version aggregate
+            self.client.get("/api/elections/")
+        serialized = get_responses()
+        with override_settings(API_USE_SERIALIZED_ELECTIONS=False):
+            self.assertEqual(serialized, get_responses())
+        self.assertEqual(
+            serialized[0]["results"][0]["children"], [ballot.election_id]
+        )
+
+        # saving something which is embedded in the document refreshes it
+        with self.captureOnCommitCallbacks(execute=True):
+            org.common_name = "Renamed"
+            org.save()
+        resp = self.client.get(f"/api/elections/{ballot.election_id}/")
+        self.assertEqual(resp.json()["organisation"]["common_name"], "Renamed")
+
+    def test_sparse_fieldsets(self):
+        election = ElectionWithStatusFactory(
+            group=None, poll_open_date=datetime.today()
+        )
+        with self.assertNumQueries(3):
+            resp = self.client.get(
+                "/api/elections/?fields=election_id,poll_open_date,current"
+            )
+        self.assertEqual(
+            resp.json()["results"],
+            [
+                {
+                    "election_id": election.election_id,
+                    "poll_open_date": datetime.today().date().isoformat(),
+                    "current": True,
+                }
+            ],
+        )
+
+        full = self.client.get(f"/api/elections/{election.election_id}/").json()
+        resp = self.client.get(
+            f"/api/elections/{election.election_id}/?omit=organisation,division"
+        )
+        del full["organisation"]
+        del full["division"]
+        self.assertEqual(resp.json(), full)
+
+        for params in ["fields=not_a_field", "fields=", "omit=foo"]:
+            resp = self.client.get(f"/api/elections/?{params}")
+            self.assertEqual(resp.status_code, 400)
+
+    def test_dump(self):
+        ElectionWithStatusFactory(group=None, poll_open_date=datetime.today())
+        ElectionWithStatusFactory(
+            group=None, poll_open_date=datetime.today() - timedelta(days=60)
+        )
+        ElectionWithStatusFactory(
+            group=None, moderation_status=related_status("Deleted")
+        )
+        expected = self.client.get("/api/elections/").json()["results"]
+
+        resp = self.client.get("/api/elections/dump/")
+        self.assertEqual(resp["Content-Type"], "application/x-ndjson")
+        rows = b"".join(resp.streaming_content).decode("utf8").splitlines()
+        self.assertEqual(
+            sorted(json.loads(row)["election_id"] for row in rows),
+            sorted(election["election_id"] for election in expected),
+        )
+
+        # filters work as they do for the list endpoint
+        resp = self.client.get(
+            "/api/elections/dump/?current", HTTP_ACCEPT_ENCODING="gzip"
+        )
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        rows = gzip.decompress(b"".join(resp.streaming_content)).splitlines()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(json.loads(rows[0])["current"], True)
+
+    def test_election_tile(self):
+        election = ElectionWithStatusFactory(
+            group=None, poll_open_date=datetime.today()
+        )
+        url = "/api/elections/tiles/10/511/340.mvt"
+        with (
+            tempfile.TemporaryDirectory() as tile_cache_dir,
+            override_settings(TILE_CACHE_DIR=tile_cache_dir),
+        ):
+            # the generation is only read from the database now and then
+            get_geography_generation()
+            with self.assertNumQueries(2):
+                resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(
+                resp["Content-Type"], "application/vnd.mapbox-vector-tile"
+            )
+            self.assertIn(b"election_id", resp.content)
+            self.assertIn(election.election_id.encode("utf8"), resp.content)
+
+            # the second request is served from the cache
+            with self.assertNumQueries(1):
+                self.assertEqual(self.client.get(url).content, resp.content)
+
+            # nothing on polling day for other dates
+            resp = self.client.get(f"{url}?date=2017-03-23")
+            self.assertEqual(resp.content, b"")
+
+            # tiles for other generations are only removed once they're old
+            generation_dir = os.path.join(
+                tile_cache_dir, str(get_geography_generation())
+            )
+            old_generation = os.path.join(tile_cache_dir, "0")
+            os.makedirs(old_generation)
+            remove_stale_siblings(generation_dir)
+            self.assertTrue(os.path.exists(old_generation))
+            os.utime(old_generation, (0, 0))
+            remove_stale_siblings(generation_dir)
+            self.assertFalse(os.path.exists(old_generation))
+
+            # and so are tiles for old versions of the ballots
+            old_versions = os.listdir(generation_dir)
+            for version_dir in old_versions:
+                os.utime(os.path.join(generation_dir, version_dir), (0, 0))
+            election.save()
+            self.client.get(url)
+            versions = os.listdir(generation_dir)
+            self.assertEqual(len(versions), 1)
+            self.assertNotIn(versions[0], old_versions)
+
+        resp = self.client.get("/api/elections/tiles/1/2/0.mvt")
+        self.assertEqual(resp.status_code, 404)
+        resp = self.client.get(f"{url}?date=tomorrow")
+        self.assertEqual(resp.status_code, 400)
+
     def test_election_intersects_local_authority_filter(self):
         OrganisationGeographyFactory(
             organisation=OrganisationFactory(
@@ -556,6 +789,10 @@ class TestElectionAPIQueries(APITestCase):
                 "within",
                 "MultiPolygon (((0.1 0.1, 0.1 0.2, 0.2 0.2, 0.2 0.1, 0.1 0.1)))",
             ),
+            (
+                "touches",
+                "MultiPolygon (((0.3 0, 0.3 0.3, 0.6 0.3, 0.6 0, 0.3 0)))",
+            ),
         ]
         for title, geom in elections:
             ElectionWithStatusFactory(
@@ -571,6 +808,7 @@ class TestElectionAPIQueries(APITestCase):
             content_type="application/json",
         )
         data = resp.json()
+        # sharing a boundary isn't an intersection
         self.assertSetEqual(
             {"overlaps", "same", "contains", "within"},
             {e["election_title"] for e in data["results"]},
@@ -583,7 +821,7 @@ class TestElectionAPIQueries(APITestCase):
         )
         data = resp.json()
         self.assertSetEqual(
-            {"overlaps", "same", "contains", "within"},
+            {"overlaps", "same", "contains", "within", "touches"},
             {e["election_title"] for e in data["results"]},
         )
 
@@ -601,3 +839,145 @@ class TestElectionAPIQueries(APITestCase):
         resp_json = resp.json()
         self.assertEqual(len(resp_json["results"]), 100)
         self.assertEqual(resp_json["count"], 102)
+
+    def test_cursor_pagination(self):
+        elections = ElectionWithStatusFactory.create_batch(5, group=None)
+        expected = [
+            e.election_id
+            for e in sorted(
+                elections, key=lambda e: (e.modified, e.election_id)
+            )
+        ]
+
+        seen = []
+        url = "/api/elections/?cursor=&limit=2"
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            data = resp.json()
+            self.assertNotIn("count", data)
+            self.assertLessEqual(len(data["results"]), 2)
+            seen += [e["election_id"] for e in data["results"]]
+            url = data["next"]
+
+        self.assertEqual(seen, expected)
+
+    def test_cursor_pagination_invalid_cursor(self):
+        resp = self.client.get("/api/elections/?cursor=not-a-cursor")
+        self.assertEqual(resp.status_code, 404)
+
+
+class TestElectionChangesAPI(APITransactionTestCase):
+    # /api/changes/ only serves changes from committed transactions
+    serialized_rollback = True
+
+    def test_changes(self):
+        election = ElectionWithStatusFactory(group=None)
+        # not public, so not in the feed
+        ElectionWithStatusFactory(
+            group=None, moderation_status=related_status("Suggested")
+        )
+        ModerationHistoryFactory(
+            election=election,
+            status=ModerationStatusFactory(short_label="Deleted"),
+        )
+
+        resp = self.client.get("/api/changes/?since=0")
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        changes = [
+            (change["election_id"], change["change_type"])
+            for change in data["results"]
+        ]
+        self.assertEqual(changes[-1], (election.election_id, "deleted"))
+        self.assertIn((election.election_id, "updated"), changes)
+        self.assertEqual(
+            {election_id for election_id, _ in changes}, {election.election_id}
+        )
+        self.assertTrue(
+            data["since"].endswith(f".{data['results'][-1]['sequence']}")
+        )
+        self.assertIsNone(data["next"])
+
+        # nothing since the last change
+        resp = self.client.get(f"/api/changes/?since={data['since']}")
+        self.assertEqual(resp.json()["results"], [])
+        self.assertEqual(resp.json()["since"], data["since"])
+
+        # paging
+        resp = self.client.get("/api/changes/?since=0&limit=1")
+        self.assertEqual(len(resp.json()["results"]), 1)
+        self.assertIn(f"since={resp.json()['since']}", resp.json()["next"])
+
+        # a bare sequence number carries on from that change
+        resp = self.client.get(
+            f"/api/changes/?since={data['results'][0]['sequence']}"
+        )
+        self.assertEqual(resp.json()["results"], data["results"][1:])
+
+        self.assertEqual(
+            self.client.get("/api/changes/?since=foo").status_code, 400
+        )
+        self.assertEqual(
+            self.client.get("/api/changes/?since=1.foo").status_code, 400
+        )
+
+    def test_changes_committed_out_of_order(self):
+        def insert_change(connection, election_id):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO elections_electionchange
+                        (election_id, change_type, modified, created)
+                    VALUES (%s, 'updated', now(), now())
+                    """,
+                    [election_id],
+                )
+
+        first = connections.create_connection(DEFAULT_DB_ALIAS)
+        second = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            first.set_autocommit(False)
+            second.set_autocommit(False)
+            # the first transaction starts writing, so has the lower txid
+            with first.cursor() as cursor:
+                cursor.execute("SELECT txid_current()")
+            # but the second is first to take a sequence number
+            insert_change(second, "second")
+            insert_change(first, "first")
+            first.commit()
+
+            # the second transaction could still commit, so stop before it
+            data = self.client.get("/api/changes/?since=0").json()
+            self.assertEqual(
+                [change["election_id"] for change in data["results"]],
+                ["first"],
+            )
+
+            second.commit()
+            # and it isn't skipped when it does
+            resp = self.client.get(f"/api/changes/?since={data['since']}")
+            self.assertEqual(
+                [change["election_id"] for change in resp.json()["results"]],
+                ["second"],
+            )
+        finally:
+            first.close()
+            second.close()
+
+    def test_changes_withdrawn(self):
+        election = ElectionWithStatusFactory(group=None)
+        ModerationHistoryFactory(
+            election=election,
+            status=ModerationStatusFactory(short_label="Suggested"),
+        )
+
+        changes = [
+            (change["election_id"], change["change_type"])
+            for change in self.client.get("/api/changes/?since=0").json()[
+                "results"
+            ]
+        ]
+        # no longer public, so gone from the API
+        self.assertEqual(changes[-1], (election.election_id, "deleted"))
+        self.assertIn((election.election_id, "updated"), changes)
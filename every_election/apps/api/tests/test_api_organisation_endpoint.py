@@ -43,6 +43,19 @@ class TestOrganisationAPIEndpoint(APITestCase):
         self.assertEqual(200, resp.status_code)
         self.assertEqual("Foo & Bar District Council", data["official_name"])
 
+    def test_get_org_conditional_get(self):
+        url = "/api/organisations/local-authority/TEST1/2016-10-01.json"
+        resp = self.client.get(url)
+        self.assertEqual(200, resp.status_code)
+
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(304, resp.status_code)
+
+        resp = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=resp["Last-Modified"]
+        )
+        self.assertEqual(304, resp.status_code)
+
     def test_get_org_not_found(self):
         resp = self.client.get(
             "/api/organisations/local-authority/TEST1/2001-10-01.json"
@@ -59,6 +72,29 @@ class TestOrganisationAPIEndpoint(APITestCase):
             "Foo & Bar District Council", data["properties"]["official_name"]
         )
 
+    def test_get_org_geo_simplified(self):
+        url = "/api/organisations/local-authority/TEST1/2016-10-01/geo.json"
+        full = self.client.get(url).json()
+
+        resp = self.client.get(f"{url}?zoom=4&precision=2")
+        self.assertEqual(200, resp.status_code)
+        data = resp.json()
+        self.assertEqual(full["properties"], data["properties"])
+        for ring in data["geometry"]["coordinates"][0]:
+            for lng, lat in ring:
+                self.assertEqual(round(lng, 2), lng)
+                self.assertEqual(round(lat, 2), lat)
+
+        # too fine to have a stored simplification, so we get everything
+        resp = self.client.get(f"{url}?simplify=0.00001")
+        self.assertEqual(full["geometry"], resp.json()["geometry"])
+
+    def test_get_org_geo_invalid_simplify(self):
+        url = "/api/organisations/local-authority/TEST1/2016-10-01/geo.json"
+        for params in ["zoom=foo", "zoom=50", "precision=-1", "simplify=x"]:
+            resp = self.client.get(f"{url}?{params}")
+            self.assertEqual(400, resp.status_code)
+
     def test_get_org_geo_not_found(self):
         resp = self.client.get(
             "/api/organisations/local-authority/TEST1/2001-10-01/geo.json"
@@ -0,0 +1,153 @@
+"""
+Mapbox Vector Tiles of ballot geographies.
+
+Tiles are rendered with ST_AsMVT from the subdivided geography tables
+(so we only touch the pieces of each boundary that intersect the tile)
+and cached on disk under TILE_CACHE_DIR.
+
+The cache is keyed by the geography generation used for point lookups
+(see elections.managers), so saving or deleting a geography moves us on
+to a new directory. Within that there's a directory for each version of
+the set of ballots being drawn, so tiles are re-rendered when elections
+are added, removed or modified, or a new day changes what's current.
+
+Whenever we start a new generation or version directory, the others
+beside it are removed once they haven't been written to for
+TILE_CACHE_GRACE_SECONDS. Processes can see a new generation at slightly
+different times, and different requests draw different sets of ballots,
+so directories still in use by someone else are left alone.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.db import connection
+from elections.managers import get_geography_generation
+
+TILE_SQL = """
+    WITH bounds AS (
+        SELECT ST_TileEnvelope(%s, %s, %s) AS geom
+    ),
+    ballots AS (
+        SELECT election_id, division_geography_id, organisation_geography_id
+        FROM elections_election
+        WHERE id IN ({election_ids_sql})
+    ),
+    pieces AS (
+        SELECT ballots.election_id, dgs.geography
+        FROM ballots
+            JOIN organisations_divisiongeographysubdivided dgs
+                ON dgs.division_geography_id = ballots.division_geography_id
+        UNION ALL
+        SELECT ballots.election_id, ogs.geography
+        FROM ballots
+            JOIN organisations_organisationgeographysubdivided ogs
+                ON ogs.organisation_geography_id
+                    = ballots.organisation_geography_id
+        WHERE ballots.division_geography_id IS NULL
+    ),
+    features AS (
+        SELECT
+            pieces.election_id,
+            ST_AsMVTGeom(
+                ST_Transform(ST_Union(pieces.geography), 3857), bounds.geom
+            ) AS geom
+        FROM pieces, bounds
+        WHERE pieces.geography && ST_Transform(bounds.geom, 4326)
+        GROUP BY pieces.election_id, bounds.geom
+    )
+    SELECT ST_AsMVT(features, 'ballots', 4096, 'geom')
+    FROM features
+    WHERE geom IS NOT NULL
+"""
+
+
+def is_valid_tile(z, x, y):
+    return 0 <= z <= settings.TILE_MAX_ZOOM and 0 <= x < 2**z and 0 <= y < 2**z
+
+
+def render_tile(elections, z, x, y):
+    """
+    Render the tile at z/x/y with a feature for each election in the
+    `elections` QuerySet.
+    """
+    election_ids_sql, params = elections.values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            TILE_SQL.format(election_ids_sql=election_ids_sql),
+            [z, x, y, *params],
+        )
+        tile = cursor.fetchone()[0]
+    return bytes(tile) if tile else b""
+
+
+def get_version_dir(generation_dir, version):
+    version_hash = hashlib.sha1(
+        "|".join(str(part) for part in version).encode("utf8")
+    ).hexdigest()
+    return os.path.join(generation_dir, version_hash)
+
+
+def remove_stale_siblings(directory):
+    """
+    Remove the directories next to `directory` that haven't been written to
+    for TILE_CACHE_GRACE_SECONDS
+    """
+    parent = os.path.dirname(directory)
+    cutoff = time.time() - settings.TILE_CACHE_GRACE_SECONDS
+    for name in os.listdir(parent):
+        path = os.path.join(parent, name)
+        if path == directory:
+            continue
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except FileNotFoundError:
+            # someone else got there first
+            pass
+
+
+def get_tile(elections, version, z, x, y):
+    """
+    Return the tile at z/x/y for `elections`, rendering it if there isn't
+    a copy in the cache for this `version` of the QuerySet.
+    """
+    generation_dir = os.path.join(
+        settings.TILE_CACHE_DIR, str(get_geography_generation())
+    )
+    version_dir = get_version_dir(generation_dir, version)
+    path = os.path.join(version_dir, str(z), str(x), f"{y}.mvt")
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+
+    tile = render_tile(elections, z, x, y)
+
+    for directory in (generation_dir, version_dir):
+        if not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+            remove_stale_siblings(directory)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # mark the generation and version as in use, so they aren't
+        # removed as stale
+        os.utime(generation_dir)
+        os.utime(version_dir)
+        # write to a temp file and rename so that other processes never
+        # read a partially written tile
+        with tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(path), delete=False
+        ) as f:
+            f.write(tile)
+        os.replace(f.name, path)
+    except FileNotFoundError:
+        # The directory was removed under us. We've still got the tile,
+        # it just won't be cached this time.
+        pass
+    return tile
@@ -2,10 +2,12 @@ from django.urls import include, re_path
 from rest_framework import routers
 
 from .views import (
+    ElectionChangeViewSet,
     ElectionSubTypeViewSet,
     ElectionTypeViewSet,
     ElectionViewSet,
     OrganisationViewSet,
+    election_tile,
 )
 
 
@@ -23,6 +25,7 @@ class EERouter(routers.DefaultRouter):
 
 router = EERouter()
 router.register(r"elections", ElectionViewSet)
+router.register(r"changes", ElectionChangeViewSet)
 router.register(r"election_types", ElectionTypeViewSet)
 router.register(r"election_subtypes", ElectionSubTypeViewSet)
 router.register(r"organisations", OrganisationViewSet)
@@ -30,6 +33,11 @@ router.register(r"organisations", OrganisationViewSet)
 routes = router.get_urls()
 
 urlpatterns = [
+    re_path(
+        r"^elections/tiles/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\.mvt$",
+        election_tile,
+        name="election-tile",
+    ),
     re_path(r"^", include(routes)),
     re_path(
         r"^organisations/(?P<organisation_type>[-\w]+)/$",
@@ -1,25 +1,48 @@
+import json
 from collections import OrderedDict
 from datetime import datetime
 
 from api import filters
+from api.mixins import (
+    ConditionalGetMixin,
+    get_election_queryset_version,
+    get_election_version,
+)
+from core.helpers import ModifiedCursorPagination
 from django.conf import settings
-from django.db.models import Prefetch
-from django.http import Http404
+from django.contrib.gis.geos import Point
+from django.db.models import Count, Max, Prefetch, Q
+from django.db.models.expressions import RawSQL
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    StreamingHttpResponse,
+)
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from django.views.decorators.http import require_GET
 from elections.ca_election_ids import validate
 from elections.models import (
     Election,
+    ElectionChange,
     ElectionSubType,
     ElectionType,
     ModerationStatuses,
 )
-from elections.query_helpers import PostcodeError
+from elections.query_helpers import PostcodeError, get_point_from_postcode
+from organisations.constants import GEOGRAPHY_SIMPLIFICATION_TOLERANCES
 from organisations.models import Organisation, OrganisationDivision
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import APIException
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
 
 from .serializers import (
+    ElectionChangeSerializer,
     ElectionGeoSerializer,
     ElectionSerializer,
     ElectionSubTypeSerializer,
@@ -27,7 +50,11 @@ from .serializers import (
     OrganisationDivisionSerializer,
     OrganisationGeoSerializer,
     OrganisationSerializer,
+    SerializedElectionSerializer,
+    election_fields,
+    get_election_field_dependencies,
 )
+from .tiles import get_tile, is_valid_tile
 
 
 class APIPostcodeException(APIException):
@@ -48,53 +75,312 @@ class APIInvalidElectionIdException(APIException):
     default_code = "invalid_election_id"
 
 
-class ElectionViewSet(viewsets.ReadOnlyModelViewSet):
+class APIInvalidLookupException(APIException):
+    status_code = 400
+    default_detail = (
+        "Expected a JSON object with 'coords' and/or 'postcodes' lists"
+    )
+    default_code = "invalid_lookup"
+
+
+class APILookupTooLargeException(APIException):
+    status_code = 400
+    default_detail = "Too many points in a single lookup"
+    default_code = "lookup_too_large"
+
+
+class APIInvalidSinceException(APIException):
+    status_code = 400
+    default_detail = "Expected `since` to be a position in the change log"
+    default_code = "invalid_since"
+
+
+class APIGeographyOptionsException(APIException):
+    status_code = 400
+    default_detail = "Invalid simplify, zoom or precision"
+    default_code = "invalid_geography_options"
+
+
+def get_geography_options(request):
+    """
+    Parse the optional params accepted by /geo endpoints into serializer
+    context:
+
+    `simplify`: a tolerance in degrees
+    `zoom`: a web map zoom level, converted to the size of a pixel in
+        degrees at the equator
+    `precision`: number of decimal places to round coordinates to
+
+    We serve the coarsest stored simplification that is within the
+    requested tolerance, or the full geography if there isn't one.
+    """
+    params = request.query_params
+    try:
+        tolerance = float(params["simplify"]) if "simplify" in params else None
+        zoom = int(params["zoom"]) if "zoom" in params else None
+        precision = int(params["precision"]) if "precision" in params else None
+    except ValueError:
+        raise APIGeographyOptionsException()
+    if zoom is not None:
+        if not 0 <= zoom <= 24:
+            raise APIGeographyOptionsException()
+        tolerance = 360 / (256 * 2**zoom)
+    if precision is not None and not 0 <= precision <= 15:
+        raise APIGeographyOptionsException()
+
+    simplify = None
+    if tolerance:
+        simplify = max(
+            (t for t in GEOGRAPHY_SIMPLIFICATION_TOLERANCES if t <= tolerance),
+            default=None,
+        )
+    return {"simplify": simplify, "precision": precision}
+
+
+class APIInvalidFieldsException(APIException):
+    status_code = 400
+    default_detail = (
+        "Expected `fields` or `omit` to be a comma separated list of "
+        "election fields"
+    )
+    default_code = "invalid_fields"
+
+
+def parse_coords(coords):
+    try:
+        lat, lng = map(float, coords.split(","))
+    except (AttributeError, ValueError):
+        raise APICoordsException()
+    return lat, lng
+
+
+class ElectionViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Election.public_objects.all()
     serializer_class = ElectionSerializer
     lookup_field = "election_id"
     lookup_value_regex = r"(?!\.json$)[^/]+"
     filterset_class = filters.ElectionFilter
 
+    @property
+    def paginator(self):
+        """
+        Opt in to keyset pagination ordered by (modified, election_id) by
+        passing a `cursor` param (empty for the first page). This avoids
+        the COUNT and OFFSET scans of the default paginator, which matters
+        when walking the whole table with `?modified=`.
+        """
+        if (
+            not hasattr(self, "_paginator")
+            and self.request.query_params.get("cursor", None) is not None
+        ):
+            self._paginator = ModifiedCursorPagination()
+        return super().paginator
+
     @action(detail=True, url_path="geo")
     def geo(self, request, election_id=None, format=None):
+        geography_options = get_geography_options(request)
         election = self.get_queryset().get(election_id=election_id)
+        last_modified, version = get_election_version(election)
+        geography = election.geography
+        not_modified = self.get_not_modified_response(
+            last_modified, (*version, geography.pk if geography else None)
+        )
+        if not_modified:
+            return not_modified
         return Response(
-            ElectionGeoSerializer(election, context={"request": request}).data
+            ElectionGeoSerializer(
+                election, context={"request": request, **geography_options}
+            ).data
         )
 
-    def get_queryset(self):
-        select_related = [
-            "election_type",
-            "election_subtype",
-            "organisation",
-            "elected_role",
-            "division",
-            "division__divisionset",
-            "group",
-            "replaces",
-            "metadata",
-        ]
-
-        queryset = Election.public_objects.all()
-        queryset = queryset.select_related(*select_related).prefetch_related(
-            "_replaced_by"
+    @action(detail=False, url_path="dump")
+    def dump(self, request, format=None):
+        """
+        Stream every election matching the usual filters as newline
+        delimited JSON, ordered by (modified, election_id).
+
+        Rows are read from a server side cursor and serialized one at a
+        time so memory use stays flat however big the table gets. The
+        response is gzipped if the client accepts it.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by(
+            "modified", "election_id"
+        )
+        serializer = self.get_serializer()
+
+        def rows():
+            for election in queryset.iterator(
+                chunk_size=settings.API_DUMP_CHUNK_SIZE
+            ):
+                data = serializer.to_representation(election)
+                yield json.dumps(data, cls=JSONEncoder) + "\n"
+
+        content = rows()
+        gzipped = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+        if gzipped:
+            content = compress_sequence(row.encode("utf8") for row in content)
+        response = StreamingHttpResponse(
+            content, content_type="application/x-ndjson"
+        )
+        if gzipped:
+            response["Content-Encoding"] = "gzip"
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+    @action(detail=False, methods=["post"], url_path="lookup")
+    def lookup(self, request, format=None):
+        """
+        Resolve many points to ballots in one request.
+
+        Expects a JSON body like:
+            {"coords": ["51.50,-0.14", ...], "postcodes": ["M5V3L9", ...]}
+
+        and returns the ballot IDs for each input, keyed by the input value.
+        Postcodes that can't be geocoded map to `null`. The `current` and
+        `future` query params are supported as for the list endpoint.
+        """
+        if not isinstance(request.data, dict):
+            raise APIInvalidLookupException()
+        coords = request.data.get("coords", [])
+        postcodes = request.data.get("postcodes", [])
+        if not isinstance(coords, list) or not isinstance(postcodes, list):
+            raise APIInvalidLookupException()
+        if len(coords) + len(postcodes) > settings.API_MAX_LOOKUP_POINTS:
+            raise APILookupTooLargeException()
+
+        keys = []
+        points = []
+        for value in map(str, coords):
+            lat, lng = parse_coords(value)
+            keys.append(("coords", value))
+            points.append(Point(lng, lat))
+
+        unresolved_postcodes = []
+        for value in map(str, postcodes):
+            try:
+                point = get_point_from_postcode(value.replace(" ", ""))
+            except PostcodeError:
+                unresolved_postcodes.append(value)
+                continue
+            keys.append(("postcodes", value))
+            points.append(point)
+
+        queryset = Election.public_objects.filter(group_type=None)
+        if self.request.query_params.get("current", None) is not None:
+            queryset = queryset.current()
+        if self.request.query_params.get("future", None) is not None:
+            queryset = queryset.future()
+
+        results = {"coords": {}, "postcodes": {}}
+        for value in unresolved_postcodes:
+            results["postcodes"][value] = None
+        for (kind, value), election_ids in zip(
+            keys, queryset.election_ids_for_points(points)
+        ):
+            results[kind][value] = election_ids
+        return Response(results)
+
+    def get_field_selection(self):
+        """
+        Parse the `fields` or `omit` params (comma separated field names)
+        into a list of the fields to return, or None for all of them.
+        """
+        params = self.request.query_params
+        if "fields" in params:
+            named = {f for f in params["fields"].split(",") if f}
+            selected = named
+        elif "omit" in params:
+            named = {f for f in params["omit"].split(",") if f}
+            selected = set(election_fields) - named
+        else:
+            return None
+        if not selected or not named <= set(election_fields):
+            raise APIInvalidFieldsException()
+        return [field for field in election_fields if field in selected]
+
+    def use_serialized_elections(self):
+        """
+        Serve the documents stored in SerializedElection instead of
+        serializing each election on every request. These list public
+        children only, so we don't use them when asking for deleted
+        elections. If we only want some of the fields it's cheaper to
+        load just those.
+        """
+        return (
+            settings.API_USE_SERIALIZED_ELECTIONS
+            and self.request.query_params.get("deleted", None) is None
+            and self.get_field_selection() is None
         )
 
+    def get_serializer_class(self):
+        if (
+            self.action in ("list", "retrieve", "dump")
+            and self.use_serialized_elections()
+        ):
+            return SerializedElectionSerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_field_selection()
+        return context
+
+    def get_queryset(self):
+        fields = self.get_field_selection()
+        columns = None
+        prefetch_related = ["_replaced_by"]
+        if fields is not None:
+            columns, select_related, prefetch_related = (
+                get_election_field_dependencies(fields)
+            )
+        elif (
+            self.action in ("list", "dump") and self.use_serialized_elections()
+        ):
+            # Everything else we need is in the stored document
+            select_related = ["serialized"]
+            prefetch_related = []
+        else:
+            select_related = [
+                "election_type",
+                "election_subtype",
+                "organisation",
+                "elected_role",
+                "division",
+                "division__divisionset",
+                "group",
+                "replaces",
+                "metadata",
+            ]
+            if self.use_serialized_elections():
+                select_related.append("serialized")
+
         if self.request.query_params.get("deleted", None) is not None:
-            queryset = (
-                Election.private_objects.all()
-                .select_related(*select_related)
-                .filter_by_status("Deleted")
+            queryset = Election.private_objects.all().filter_by_status(
+                "Deleted"
             )
+            if fields is None:
+                prefetch_related = []
         else:
+            queryset = Election.public_objects.all()
             identifier_type = self.request.query_params.get(
                 "identifier_type", None
             )
-            if identifier_type and identifier_type != "ballot":
-                queryset = queryset.prefetch_related(
+            if (
+                identifier_type
+                and identifier_type != "ballot"
+                and not self.use_serialized_elections()
+                and (fields is None or "children" in fields)
+            ):
+                prefetch_related.append(
                     Prefetch("_children_qs", Election.public_objects.all())
                 )
 
+        queryset = queryset.select_related(*select_related).prefetch_related(
+            *prefetch_related
+        )
+        if columns is not None:
+            queryset = queryset.only(*columns)
+
         postcode = self.request.query_params.get("postcode", None)
         if postcode is not None:
             postcode = postcode.replace(" ", "")
@@ -105,10 +391,7 @@ class ElectionViewSet(viewsets.ReadOnlyModelViewSet):
 
         coords = self.request.query_params.get("coords", None)
         if coords is not None:
-            try:
-                lat, lng = map(float, coords.split(","))
-            except ValueError:
-                raise APICoordsException()
+            lat, lng = parse_coords(coords)
             queryset = queryset.for_lat_lng(lat=lat, lng=lng)
 
         if self.request.query_params.get("current", None) is not None:
@@ -131,7 +414,10 @@ class ElectionViewSet(viewsets.ReadOnlyModelViewSet):
     def retrieve(self, request, *args, **kwargs):
         if not validate(kwargs["election_id"]):
             raise APIInvalidElectionIdException()
-        resp = super().retrieve(request, *args, **kwargs)
+        instance = self.get_object()
+        resp = self.get_not_modified_response(*get_election_version(instance))
+        if not resp:
+            resp = Response(self.get_serializer(instance).data)
         if not settings.DEBUG:
             resp["Cache-Control"] = "s-maxage=7200 stale-if-error=86400"
         return resp
@@ -150,9 +436,18 @@ class ElectionViewSet(viewsets.ReadOnlyModelViewSet):
         Seeing as we're iterating over the data anyawy, we can get the count
         from len(serializer.data) and add that to the page data ourselves.
 
+        Before any of that, we short circuit with a 304 if the client sent
+        an ETag for the current version of the filtered QuerySet.
+
         """
 
         queryset = self.filter_queryset(self.get_queryset())
+        not_modified = self.get_not_modified_response(
+            *get_election_queryset_version(queryset), check_last_modified=False
+        )
+        if not_modified:
+            return not_modified
+
         postcode = self.request.query_params.get("postcode", None)
         coords = self.request.query_params.get("coords", None)
         current = self.request.query_params.get("current", None)
@@ -178,6 +473,125 @@ class ElectionViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
 
+@require_GET
+def election_tile(request, z, x, y):
+    """
+    A Mapbox Vector Tile with a feature for each current ballot, or each
+    ballot with polling day on `date` if given.
+    """
+    z, x, y = int(z), int(x), int(y)
+    if not is_valid_tile(z, x, y):
+        raise Http404()
+
+    elections = Election.public_objects.filter(group_type=None)
+    if date := request.GET.get("date"):
+        try:
+            date = datetime.strptime(date, "%Y-%m-%d").date()
+        except ValueError:
+            return HttpResponseBadRequest("Invalid date")
+        elections = elections.filter(poll_open_date=date)
+    else:
+        elections = elections.current()
+        # what's current depends on the day
+        date = ("current", timezone.localdate())
+
+    _, version = get_election_queryset_version(elections)
+    response = HttpResponse(
+        get_tile(elections, (date, *version), z, x, y),
+        content_type="application/vnd.mapbox-vector-tile",
+    )
+    if not settings.DEBUG:
+        response["Cache-Control"] = "s-maxage=7200 stale-if-error=86400"
+    return response
+
+
+class ElectionChangeViewSet(viewsets.GenericViewSet):
+    """
+    The log of changes to public and deleted elections, in order.
+
+    Pass `since` (the `since` of the last page you saw, or 0 to start from
+    the beginning) and follow the `next` links. Positions are
+    `<txid>.<sequence>`: changes are served in the order their
+    transactions started, which is the order they can become visible in.
+    A bare `sequence` from an earlier version of the feed is also accepted.
+    Each page is a range scan on the (txid, sequence) index.
+    """
+
+    queryset = ElectionChange.objects.all()
+    serializer_class = ElectionChangeSerializer
+    pagination_class = None
+
+    def get_position(self, since):
+        """
+        The (txid, sequence) to continue after for a `since` parameter
+        """
+        try:
+            if "." in since:
+                txid, sequence = (int(part) for part in since.split(".", 1))
+            else:
+                sequence = int(since)
+                txid = (
+                    ElectionChange.objects.get(sequence=sequence).txid
+                    if sequence
+                    else 0
+                )
+        except (ValueError, ElectionChange.DoesNotExist):
+            raise APIInvalidSinceException()
+        if txid < 0 or sequence < 0:
+            raise APIInvalidSinceException()
+        return txid, sequence
+
+    def list(self, request, *args, **kwargs):
+        txid, sequence = self.get_position(
+            request.query_params.get("since", "0")
+        )
+        try:
+            limit = int(request.query_params.get("limit", 0))
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            limit = settings.REST_FRAMEWORK["PAGE_SIZE"]
+        limit = min(limit, settings.API_MAX_LIMIT)
+
+        # Sequence numbers are allocated when a change is written, but a
+        # transaction's txid is allocated when it first writes anything, so
+        # a transaction that's still running can go on to write a change
+        # with a lower sequence number than one that's already committed,
+        # though never with a lower txid than any running transaction.
+        # So we only serve changes from transactions older than any that
+        # are still running, in txid order.
+        committed = RawSQL(
+            "pg_snapshot_xmin(pg_current_snapshot())::text::bigint", []
+        )
+        changes = list(
+            self.get_queryset()
+            .filter(
+                Q(txid__gt=txid) | Q(txid=txid, sequence__gt=sequence),
+                # redundant, but gives the index scan somewhere to start
+                txid__gte=txid,
+                txid__lt=committed,
+            )
+            .order_by("txid", "sequence")[:limit]
+        )
+        if changes:
+            txid, sequence = changes[-1].txid, changes[-1].sequence
+        since = f"{txid}.{sequence}"
+        next_url = None
+        if len(changes) == limit:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), "since", since
+            )
+        return Response(
+            OrderedDict(
+                [
+                    ("next", next_url),
+                    ("since", since),
+                    ("results", self.get_serializer(changes, many=True).data),
+                ]
+            )
+        )
+
+
 class ElectionTypeViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = ElectionType.objects.all()
     lookup_field = "election_type"
@@ -189,7 +603,7 @@ class ElectionSubTypeViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ElectionSubTypeSerializer
 
 
-class OrganisationViewSet(viewsets.ReadOnlyModelViewSet):
+class OrganisationViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Organisation.objects.all()
     serializer_class = OrganisationSerializer
     filterset_fields = ["modified"]
@@ -204,9 +618,18 @@ class OrganisationViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=True, url_path="geo")
     def geo(self, request, **kwargs):
         kwargs.pop("format", None)
+        geography_options = get_geography_options(request)
         org = self.get_object(**kwargs)
+        geography_ids = sorted(org.geographies.values_list("pk", flat=True))
+        not_modified = self.get_not_modified_response(
+            org.modified, (org.pk, org.modified, *geography_ids)
+        )
+        if not_modified:
+            return not_modified
         serializer = OrganisationGeoSerializer(
-            org, read_only=True, context={"request": request}
+            org,
+            read_only=True,
+            context={"request": request, **geography_options},
         )
         return Response(serializer.data)
 
@@ -214,11 +637,17 @@ class OrganisationViewSet(viewsets.ReadOnlyModelViewSet):
     def elections(self, request, **kwargs):
         kwargs.pop("format", None)
         org: Organisation = self.get_object(**kwargs)
+        elections = org.election_set.filter(
+            current_status=ModerationStatuses.approved.value
+        )
+        not_modified = self.get_not_modified_response(
+            *get_election_queryset_version(elections),
+            check_last_modified=False,
+        )
+        if not_modified:
+            return not_modified
         serializer = ElectionSerializer(
-            org.election_set.filter(
-                current_status=ModerationStatuses.approved.value
-            )
-            .select_related(
+            elections.select_related(
                 "election_type",
                 "election_subtype",
                 "organisation",
@@ -229,8 +658,7 @@ class OrganisationViewSet(viewsets.ReadOnlyModelViewSet):
                 "metadata",
                 "replaces",
                 "group",
-            )
-            .prefetch_related(
+            ).prefetch_related(
                 "_replaced_by",
                 Prefetch(
                     "_children_qs",
@@ -247,6 +675,11 @@ class OrganisationViewSet(viewsets.ReadOnlyModelViewSet):
     def retrieve(self, request, **kwargs):
         kwargs.pop("format", None)
         org = self.get_object(**kwargs)
+        not_modified = self.get_not_modified_response(
+            org.modified, (org.pk, org.modified)
+        )
+        if not_modified:
+            return not_modified
         serializer = OrganisationSerializer(
             org, read_only=True, context={"request": request}
         )
@@ -255,6 +688,16 @@ class OrganisationViewSet(viewsets.ReadOnlyModelViewSet):
     def filter(self, request, **kwargs):
         kwargs.pop("format", None)
         orgs = Organisation.objects.all().filter(**kwargs)
+        version = orgs.order_by().aggregate(
+            modified=Max("modified"), count=Count("pk")
+        )
+        not_modified = self.get_not_modified_response(
+            version["modified"],
+            tuple(version.values()),
+            check_last_modified=False,
+        )
+        if not_modified:
+            return not_modified
 
         page = self.paginate_queryset(orgs)
         if page is not None:
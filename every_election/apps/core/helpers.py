@@ -1,6 +1,15 @@
+import base64
+import binascii
+from collections import OrderedDict
+
 from django.conf import settings
 from django.contrib.auth.models import Group, User
-from rest_framework.pagination import LimitOffsetPagination
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 def user_is_moderator(user: User):
@@ -12,3 +21,111 @@ def user_is_moderator(user: User):
 
 class MaxSizeLimitOffsetPagination(LimitOffsetPagination):
     max_limit = getattr(settings, "API_MAX_LIMIT", 100)
+
+
+class ModifiedCursorPagination(BasePagination):
+    """
+    Keyset pagination over (modified, election_id).
+
+    Unlike MaxSizeLimitOffsetPagination this never runs a COUNT and never
+    uses OFFSET: each page is a range scan starting just after the last
+    row of the previous page, so the cost of a page doesn't depend on how
+    deep into the result set it is.
+
+    The cursor is opaque to clients. Pass an empty `cursor` param to start
+    and then follow the `next` links.
+    """
+
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    ordering = ("modified", "election_id")
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self):
+        self.default_limit = settings.REST_FRAMEWORK["PAGE_SIZE"]
+        self.max_limit = getattr(settings, "API_MAX_LIMIT", 100)
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        if limit <= 0:
+            return self.default_limit
+        return min(limit, self.max_limit)
+
+    def encode_cursor(self, obj):
+        position = f"{obj.modified.isoformat()}|{obj.election_id}"
+        return base64.urlsafe_b64encode(position.encode("utf8")).decode("ascii")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = base64.urlsafe_b64decode(encoded.encode("ascii"))
+            modified, election_id = position.decode("utf8").split("|", 1)
+            modified = parse_datetime(modified)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if modified is None:
+            raise NotFound(self.invalid_cursor_message)
+        return modified, election_id
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position:
+            modified, election_id = position
+            # The first condition is redundant, but lets Postgres use it
+            # as the start of a range scan on the modified index
+            queryset = queryset.filter(
+                Q(modified__gte=modified)
+                & (
+                    Q(modified__gt=modified)
+                    | Q(modified=modified, election_id__gt=election_id)
+                )
+            )
+
+        # Fetch one extra row to find out if there's a next page
+        results = list(queryset[: self.limit + 1])
+        self.has_next = len(results) > self.limit
+        self.page = results[: self.limit]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", None),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                },
+                "results": schema,
+            },
+        }
@@ -4,6 +4,7 @@ import tempfile
 import urllib
 
 import requests
+from django.db import transaction
 from django_extensions.db.models import TimeStampedModel
 from storage.s3wrapper import S3Wrapper
 
@@ -92,13 +93,17 @@ class UpdateElectionsTimestampedModel(TimeStampedModel):
         get_latest_by = "modified"
         abstract = True
 
+    @transaction.atomic
     def save(self, **kwargs):
         """
         Whenever the object is saved, we update all related elections
         modified date to have the same date. This is to make sure that
         changes made on the parent Organisation or
         OrganisationDivision are picked up by importers looking for
-        changes to the Election made in EE
+        changes to the Election made in EE.
+
+        This happens in the same transaction as the save, so anything
+        waiting on commit sees the updated elections.
         """
         super().save(**kwargs)
         self.election_set.update(modified=self.modified)
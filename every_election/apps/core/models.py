@@ -1,4 +1,5 @@
-from django.db.models import Func
+from django.db import models
+from django.db.models import Func, Lookup
 
 
 class JsonbSet(Func):
@@ -16,3 +17,48 @@ class JsonbSet(Func):
 
     function = "jsonb_set"
     arity = 4
+
+
+class LtreeField(models.Field):
+    """
+    A Postgres ltree: a path of labels like `a.b.c`, which can be indexed
+    with GiST so that finding everything below (or above) a path is one
+    index lookup. Needs the ltree extension.
+    https://www.postgresql.org/docs/current/ltree.html
+    """
+
+    description = "Hierarchical label path"
+
+    def db_type(self, connection):
+        return "ltree"
+
+    def get_placeholder(self, value, compiler, connection):
+        return "%s::ltree"
+
+
+class LtreeLookup(Lookup):
+    operator = None
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return (
+            f"{lhs} {self.operator} ({rhs})::ltree",
+            [*lhs_params, *rhs_params],
+        )
+
+
+@LtreeField.register_lookup
+class DescendantOf(LtreeLookup):
+    """`path__descendant_of="a.b"` matches a.b, a.b.c, a.b.c.d etc"""
+
+    lookup_name = "descendant_of"
+    operator = "<@"
+
+
+@LtreeField.register_lookup
+class AncestorOf(LtreeLookup):
+    """`path__ancestor_of="a.b.c"` matches a, a.b and a.b.c"""
+
+    lookup_name = "ancestor_of"
+    operator = "@>"
@@ -56,7 +56,7 @@ class TestSingleElectionView(TestCase):
         self.assertContains(resp, suggested_child.election_id, html=True)
         self.assertNotContains(resp, suggested_parent.election_id, html=True)
 
-        with patch("elections.models.send_event") as send_event_mock:
+        with patch("elections.models.queue_event") as send_event_mock:
             self.client.post(
                 "/election_radar/moderation_queue/",
                 {
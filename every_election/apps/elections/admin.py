@@ -7,7 +7,6 @@ from django.db import models
 from django.db.models import Manager
 from django.forms.widgets import Textarea
 
-from .baker import send_event
 from .models import (
     ElectedRole,
     Election,
@@ -16,6 +15,7 @@ from .models import (
     ModerationHistory,
     ModerationStatuses,
 )
+from .mutations import set_moderation_status, update_elections
 
 
 class GroupTypeListFilter(admin.SimpleListFilter):
@@ -85,21 +85,23 @@ class CurrentStatusFilter(admin.SimpleListFilter):
 
 
 def mark_current(modeladmin, request, queryset):
-    queryset.update(current=True)
+    update_elections(queryset, description="Admin mark current", current=True)
 
 
 mark_current.short_description = "Mark selected elections as 'current'"
 
 
 def mark_not_current(modeladmin, request, queryset):
-    queryset.update(current=False)
+    update_elections(
+        queryset, description="Admin mark not current", current=False
+    )
 
 
 mark_not_current.short_description = "Mark selected elections as not 'current'"
 
 
 def unset_current(modeladmin, request, queryset):
-    queryset.update(current=None)
+    update_elections(queryset, description="Admin unset current", current=None)
 
 
 unset_current.short_description = "Unset 'current'"
@@ -111,17 +113,12 @@ def soft_delete(modeladmin, request, queryset):
     deleted status:
     https://github.com/DemocracyClub/EveryElection/wiki/Cancelled-Elections-and-Soft-Deletes
     """
-    for election in queryset:
-        mh = ModerationHistory(
-            status_id=ModerationStatuses.deleted.value,
-            election=election,
-            user=request.user,
-            notes="Bulk deleted via admin action",
-        )
-        mh.save(push_event=False)
-    send_event(
-        detail={"description": "Admin soft delete"},
-        detail_type="elections_set_changed",
+    set_moderation_status(
+        queryset,
+        ModerationStatuses.deleted.value,
+        user=request.user,
+        notes="Bulk deleted via admin action",
+        description="Admin soft delete",
     )
 
 
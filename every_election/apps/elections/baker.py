@@ -1,55 +1,146 @@
+import hashlib
 import json
 import logging
 import os
+from collections import OrderedDict
+from datetime import timedelta
+from functools import lru_cache
 from typing import Dict, Optional
 
 import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+# The most entries EventBridge accepts in one PutEvents call
+PUT_EVENTS_BATCH_SIZE = 10
+
+
+def get_event_source():
+    return f"everyelection-{settings.DC_ENVIRONMENT}-{settings.EC2_IP}"
+
+
+@lru_cache(maxsize=1)
+def get_events_client():
+    """
+    An EventBridge client that's reused for every dispatch in this process.
+    Set EVENTS_ENDPOINT_URL to send events to a local stub instead of AWS.
+    """
+    session = boto3.Session(
+        region_name=os.environ.get("AWS_REGION", "eu-west-2")
+    )
+    return session.client(
+        "events",
+        endpoint_url=settings.EVENTS_ENDPOINT_URL,
+        # dispatch_events holds the outbox rows it's sending locked, so
+        # don't wait long on EventBridge: failures are retried later
+        config=Config(
+            connect_timeout=settings.EVENTS_CLIENT_TIMEOUT,
+            read_timeout=settings.EVENTS_CLIENT_TIMEOUT,
+            retries={"max_attempts": 2, "mode": "standard"},
+        ),
+    )
+
+
+def queue_event(detail: Dict, detail_type: str, source: Optional[str] = None):
+    """
+    Add an event to the outbox in the current transaction, so it's only sent
+    if the transaction commits. Nothing is sent from here: the
+    `dispatch_events` management command sends what's in the outbox.
+    """
+    from elections.models import OutboxEvent
 
-def send_event(detail: Dict, detail_type: str, source: Optional[str] = None):
     if not settings.SEND_EVENTS:
         logger.info(f"Skipping {detail_type} because SEND_EVENTS is disabled.")
         # don't attempt to push anything in local dev/under test
         return
 
     if source is None:
-        source = f"everyelection-{settings.DC_ENVIRONMENT}-{settings.EC2_IP}"
-
-    session = boto3.Session(
-        region_name=os.environ.get("AWS_REGION", "eu-west-2")
+        source = get_event_source()
+    encoded_detail = json.dumps(detail, sort_keys=True)
+    OutboxEvent.objects.create(
+        source=source,
+        detail_type=detail_type,
+        detail=detail,
+        dedupe_key=hashlib.sha1(
+            "|".join([source, detail_type, encoded_detail]).encode("utf-8")
+        ).hexdigest(),
     )
-    events_client = session.client("events")
-
-    event_bus_arn = settings.DC_EVENTBUS_ARN
-
-    try:
-        entries = [
-            {
-                "Source": source,
-                "DetailType": detail_type,
-                "Detail": json.dumps(detail),
-                "EventBusName": event_bus_arn,
-            }
-        ]
-        response = events_client.put_events(
-            Entries=entries,
+
+
+def dispatch_events(client=None, limit=None):
+    """
+    Send the events in the outbox that are due.
+
+    Events with the same source, type and detail are sent once. Entries are
+    sent in batches of up to PUT_EVENTS_BATCH_SIZE, and anything that fails
+    is retried with exponential backoff until it has been tried
+    EVENT_OUTBOX_MAX_ATTEMPTS times.
+
+    Returns the number of outbox rows that were sent.
+    """
+    from elections.models import OutboxEvent
+
+    client = client or get_events_client()
+    limit = limit or settings.EVENT_OUTBOX_DISPATCH_LIMIT
+    now = timezone.now()
+    sent = 0
+
+    with transaction.atomic():
+        # Lock the rows so that concurrent dispatchers don't send them twice
+        pending = list(
+            OutboxEvent.objects.pending(now)
+            .select_for_update(skip_locked=True)
+            .order_by("pk")[:limit]
         )
-        if response["FailedEntryCount"] > 0:
-            logger.error(
-                f"send_event failed with {entries}",
-                extra={"response": response},
-            )
-    except (
-        # Only exception listed in the boto3 put_events docs.
-        events_client.exceptions.InternalException,
-    ) as put_events_exception:
-        # We don't want to break whatever operation we were trying to do when sending the message.
-        # But we do want to tell sentry about it.
-        logger.error(
-            f"Failed to send event: {str(put_events_exception)}",
-            exc_info=True,
-            stack_info=True,
+        coalesced = OrderedDict()
+        for event in pending:
+            coalesced.setdefault(event.dedupe_key, []).append(event)
+        groups = list(coalesced.values())
+
+        for start in range(0, len(groups), PUT_EVENTS_BATCH_SIZE):
+            batch = groups[start : start + PUT_EVENTS_BATCH_SIZE]
+            entries = [
+                {
+                    "Source": events[0].source,
+                    "DetailType": events[0].detail_type,
+                    "Detail": json.dumps(events[0].detail),
+                    "EventBusName": settings.DC_EVENTBUS_ARN,
+                }
+                for events in batch
+            ]
+            try:
+                response = client.put_events(Entries=entries)
+                errors = [
+                    result.get("ErrorMessage") or result.get("ErrorCode")
+                    for result in response["Entries"]
+                ]
+            except (BotoCoreError, ClientError) as e:
+                errors = [str(e)] * len(batch)
+
+            for entry, events, error in zip(entries, batch, errors):
+                for event in events:
+                    event.attempts += 1
+                    if error:
+                        event.last_error = error
+                        event.next_attempt = now + timedelta(
+                            seconds=settings.EVENT_OUTBOX_RETRY_BACKOFF
+                            * 2 ** (event.attempts - 1)
+                        )
+                    else:
+                        event.sent = now
+                        sent += 1
+                if error:
+                    logger.error(
+                        f"Failed to send event: {error}",
+                        extra={"entry": entry},
+                    )
+
+        OutboxEvent.objects.bulk_update(
+            pending, ["attempts", "last_error", "next_attempt", "sent"]
         )
+    return sent
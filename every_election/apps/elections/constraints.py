@@ -1,4 +1,5 @@
-from elections.models import Election, ModerationStatuses
+from django.db.models import Exists, OuterRef, Q
+from elections.models import Election, ModerationHistory, ModerationStatuses
 
 
 class ViolatedConstraint(Exception):
@@ -57,3 +58,57 @@ def check_constraints(election):
                 election.election_id
             )
         )
+
+
+def find_violations(elections=None):
+    """
+    The set-based equivalent of calling `check_constraints` on each of
+    `elections` (a QuerySet, defaulting to every election).
+
+    Each constraint is one query that returns all of its violators, so this
+    costs the same however many elections there are.
+    Returns a list of ViolatedConstraint, ordered by election ID.
+    """
+    if elections is None:
+        elections = Election.private_objects.all()
+    elections = elections.order_by()
+    approved = ModerationStatuses.approved.value
+
+    no_status = elections.filter(
+        ~Exists(ModerationHistory.objects.filter(election=OuterRef("pk")))
+    )
+    unapproved_parents = elections.filter(
+        current_status=approved, group__isnull=False
+    ).filter(
+        ~Q(group__current_status=approved)
+        | (
+            Q(group__group__isnull=False)
+            & ~Q(group__group__current_status=approved)
+        )
+    )
+    no_approved_children = (
+        elections.exclude(group_type=None)
+        .exclude(group_type="")
+        .exclude(election_type__election_type__in=["mayor", "pcc"])
+        .filter(~Exists(Election.public_objects.filter(group=OuterRef("pk"))))
+    )
+
+    violations = []
+    for queryset, message in [
+        (no_status, "Election {} has no related status objects"),
+        (
+            unapproved_parents,
+            "Election {} is approved but one or more parents are not approved",
+        ),
+        (
+            no_approved_children,
+            "Election {} is approved but has no approved children",
+        ),
+    ]:
+        violations += [
+            (election_id, ViolatedConstraint(message.format(election_id)))
+            for election_id in queryset.values_list("election_id", flat=True)
+        ]
+    return [
+        violation for _, violation in sorted(violations, key=lambda v: v[0])
+    ]
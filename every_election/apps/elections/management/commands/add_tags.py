@@ -7,6 +7,7 @@ from django.contrib.gis.gdal import DataSource
 from django.core.management import BaseCommand
 from django.db.models import Value
 from elections.models import Election
+from elections.mutations import update_elections
 
 
 def get_layer(data, layer_index=0, is_gpkg=False):
@@ -85,12 +86,14 @@ class Command(ReadFromFileMixin, BaseCommand):
             if not options["overwrite"]:
                 ballots = ballots.exclude(tags__has_key=tag_name)
             self.stdout.write(f"...for {len(ballots)} ballots...")
-            ballots.update(
+            update_elections(
+                ballots,
+                description="Tags added",
                 tags=JsonbSet(
                     "tags",
                     Value(f"{{{tag_name}}}"),
                     Value(json.dumps(tags)),
                     True,
-                )
+                ),
             )
             self.stdout.write("...done.")
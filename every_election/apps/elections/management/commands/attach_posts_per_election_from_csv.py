@@ -1,7 +1,7 @@
 from core.mixins import ReadFromCSVMixin
 from django.core.management.base import BaseCommand
-from django.db import transaction
 from elections.models import Election
+from elections.mutations import bulk_update_elections
 
 
 class Command(ReadFromCSVMixin, BaseCommand):
@@ -80,10 +80,12 @@ class Command(ReadFromCSVMixin, BaseCommand):
             )
         return seats_contested
 
-    @transaction.atomic
     def save_all(self, updated_elections):
-        for election in updated_elections:
-            election.save()
+        bulk_update_elections(
+            updated_elections,
+            [self.SEATS_CONTESTED_FIELD, self.SEATS_TOTAL_FIELD],
+            description="Seats contested updated",
+        )
 
     def handle(self, *args, **options):
         data = self.load_data(options)
@@ -1,6 +1,6 @@
 from django.core.management import BaseCommand
-from django.db import transaction
 from elections.models import Election, MetaData
+from elections.mutations import update_elections
 
 
 class Command(BaseCommand):
@@ -35,16 +35,10 @@ class Command(BaseCommand):
             .order_by("election_id")
         )
         self.stdout.write(f"updating {elections.count()} elections..")
-        for election in elections:
-            election.cancelled = True
-            if options.get("metadata_id"):
-                election.metadata = MetaData.objects.get(
-                    pk=options["metadata_id"]
-                )
-
-        with transaction.atomic():
-            for election in elections:
-                self.stdout.write(f"updating {election.election_id}..")
-                election.save()
+        values = {"cancelled": True}
+        if options.get("metadata_id"):
+            values["metadata"] = MetaData.objects.get(pk=options["metadata_id"])
+
+        update_elections(elections, description="Elections cancelled", **values)
 
         self.stdout.write("..done!")
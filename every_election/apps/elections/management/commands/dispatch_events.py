@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.utils import timezone
+from elections.baker import dispatch_events
+from elections.models import OutboxEvent
+
+
+class Command(BaseCommand):
+    help = """
+    Send any events in the outbox that are due, including retries of
+    events that failed to send last time, and delete sent events older
+    than EVENT_OUTBOX_RETENTION_DAYS.
+    """
+
+    def handle(self, *args, **options):
+        sent = dispatch_events()
+        self.stdout.write(f"sent {sent} events")
+
+        deleted, _ = OutboxEvent.objects.filter(
+            sent__lt=timezone.now()
+            - timedelta(days=settings.EVENT_OUTBOX_RETENTION_DAYS)
+        ).delete()
+        if deleted:
+            self.stdout.write(f"deleted {deleted} old events")
+
+        failed = OutboxEvent.objects.filter(
+            sent=None, attempts__gte=settings.EVENT_OUTBOX_MAX_ATTEMPTS
+        ).count()
+        if failed:
+            self.stderr.write(f"{failed} events have given up retrying")
@@ -1,18 +1,49 @@
 import sys
 
+from dateutil.parser import parse
 from django.core.management.base import BaseCommand
-from elections.constraints import ViolatedConstraint, check_constraints
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from elections.constraints import find_violations
 from elections.models import Election
 
 
 class Command(BaseCommand):
-    def handle(self, *args, **kwargs):
+    def valid_date(self, value):
+        value = parse(value)
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            action="store",
+            dest="since",
+            type=self.valid_date,
+            help=(
+                "Only check elections (and the parents and children of "
+                "elections) modified since [datetime]"
+            ),
+        )
+
+    def handle(self, *args, **options):
         elections = Election.private_objects.all()
+        if options["since"]:
+            # A change to a ballot can break a rule about its parent, and
+            # a change to a group can break a rule about the elections below
+            elections = elections.filter(
+                Q(modified__gte=options["since"])
+                | Q(group__modified__gte=options["since"])
+                | Q(group__group__modified__gte=options["since"])
+                | Exists(
+                    Election.private_objects.filter(
+                        group=OuterRef("pk"), modified__gte=options["since"]
+                    )
+                )
+            )
         exitcode = 0
-        for election in elections:
-            try:
-                check_constraints(election)
-            except ViolatedConstraint as e:
-                exitcode = 1
-                self.stderr.write(str(e))
+        for violation in find_violations(elections):
+            exitcode = 1
+            self.stderr.write(str(violation))
         sys.exit(exitcode)
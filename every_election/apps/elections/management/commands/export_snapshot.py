@@ -0,0 +1,29 @@
+from django.core.management import BaseCommand
+from elections.snapshot import export_snapshot
+
+
+class Command(BaseCommand):
+    help = """
+    Write a snapshot of all organisations, division sets, divisions and
+    elections to a gzipped JSON lines file, for loading into a new replica
+    with `import_snapshot`.
+
+    Example usage:
+    python manage.py export_snapshot /tmp/ee-snapshot.jsonl.gz
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to write the snapshot to")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of rows to read from the database at a time",
+        )
+
+    def handle(self, *args, **options):
+        counts = export_snapshot(
+            options["path"], chunk_size=options["chunk_size"]
+        )
+        for label, count in counts.items():
+            self.stdout.write(f"{label}: {count}")
@@ -0,0 +1,35 @@
+from django.core.management import BaseCommand, CommandError
+from elections.snapshot import SnapshotError, import_snapshot
+
+
+class Command(BaseCommand):
+    help = """
+    Load a snapshot written by `export_snapshot` into an empty database.
+
+    Rows are bulk inserted without calling save() or sending signals, then
+    the derived tables are rebuilt. Afterwards `sync_elections` picks up
+    from the time the snapshot was taken.
+
+    Example usage:
+    python manage.py import_snapshot /tmp/ee-snapshot.jsonl.gz
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Snapshot file to load")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Number of rows to insert at a time",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import_snapshot(
+                options["path"],
+                batch_size=options["batch_size"],
+                stdout=self.stdout,
+            )
+        except SnapshotError as e:
+            raise CommandError(str(e))
+        self.stdout.write("..done!")
@@ -0,0 +1,19 @@
+from django.core.management import BaseCommand
+from elections.models import LocalAuthorityIntersection
+
+
+class Command(BaseCommand):
+    help = """
+    Rebuild the table of elections which intersect each local authority,
+    used by the `election_intersects_local_authority` API filter.
+
+    This is kept up to date when elections and geographies are saved, so
+    it should only be needed after bulk changes that bypass save() (e.g:
+    populate_subdivided_tables).
+    """
+
+    def handle(self, *args, **options):
+        self.stdout.write("rebuilding local authority intersections..")
+        LocalAuthorityIntersection.objects.rebuild()
+        count = LocalAuthorityIntersection.objects.count()
+        self.stdout.write(f"..done! {count} intersections")
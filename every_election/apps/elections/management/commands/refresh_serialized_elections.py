@@ -0,0 +1,48 @@
+from django.core.management import BaseCommand
+from django.db.models import F, Q
+from elections.models import Election, SerializedElection
+
+
+class Command(BaseCommand):
+    help = """
+    Rebuild the stored API representation of elections.
+
+    By default this only refreshes elections which don't have a stored
+    document, or which have been modified since it was built (e.g: by a
+    QuerySet.update() which doesn't call save). Pass --all to rebuild
+    everything.
+
+    Example usage:
+    python manage.py refresh_serialized_elections --all
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rebuild every document, not just missing or stale ones",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of elections to serialize at a time",
+        )
+
+    def handle(self, *args, **options):
+        elections = Election.private_objects.all()
+        if not options["all"]:
+            elections = elections.filter(
+                Q(serialized=None) | Q(serialized__modified__lt=F("modified"))
+            )
+        election_ids = list(
+            elections.order_by("pk").values_list("pk", flat=True)
+        )
+
+        self.stdout.write(f"refreshing {len(election_ids)} elections..")
+        batch_size = options["batch_size"]
+        for start in range(0, len(election_ids), batch_size):
+            SerializedElection.objects.refresh(
+                election_ids[start : start + batch_size]
+            )
+        self.stdout.write("..done!")
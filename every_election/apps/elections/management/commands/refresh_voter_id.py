@@ -1,5 +1,6 @@
 from django.core.management import BaseCommand
 from elections.models import Election
+from elections.mutations import bulk_update_elections
 from elections.utils import get_voter_id_requirement
 
 
@@ -32,5 +33,9 @@ class Command(BaseCommand):
         for election in elections:
             self.stdout.write(f"updating {election.election_id}..")
             election.requires_voter_id = get_voter_id_requirement(election)
-            election.save()
+        bulk_update_elections(
+            elections,
+            ["requires_voter_id"],
+            description="Voter ID requirements refreshed",
+        )
         self.stdout.write("..done!")
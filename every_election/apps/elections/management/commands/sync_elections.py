@@ -2,7 +2,6 @@ import io
 
 from dateutil.parser import parse
 from django.core.management.base import BaseCommand, OutputWrapper
-from django.db import transaction
 from elections.sync_helper import ElectionSyncer
 
 
@@ -16,22 +15,39 @@ class Command(BaseCommand):
             action="store",
             dest="since",
             type=self.valid_date,
-            help="Import changes since [datetime]",
+            help=(
+                "Import changes since [datetime], instead of resuming from "
+                "where the last run got to"
+            ),
         )
         parser.add_argument(
             "--raise-errors",
             action="store_true",
             help="Raises exception for import errors, for later logging",
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Write each page of results in a few bulk queries",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Write every result, even if it hasn't changed since we last "
+            "imported it",
+        )
 
-    @transaction.atomic
     def handle(self, *args, **options):
         stderr = self.stderr
         if options["raise_errors"]:
             # Add a String IO that can capture all the errors
             stderr = OutputWrapper(io.StringIO())
         syncer = ElectionSyncer(
-            since=options["since"], stdout=self.stdout, stderr=stderr
+            since=options["since"],
+            stdout=self.stdout,
+            stderr=stderr,
+            bulk=options["bulk"],
+            force=options["force"],
         )
         syncer.run_import()
 
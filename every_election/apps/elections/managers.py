@@ -1,26 +1,215 @@
+import json
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta
 
+from django.apps import apps as global_apps
 from django.conf import settings
 from django.contrib.gis.db.models.functions import PointOnSurface
 from django.contrib.gis.geos import GEOSGeometry, Point
-from django.db import models
-from django.db.models import Case, When
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
+from django.db.models import Case, F, When
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from elections.query_helpers import get_point_from_postcode
 from organisations.models import (
-    DivisionGeographySubdivided,
-    OrganisationGeographySubdivided,
+    DivisionGeography,
+    Organisation,
+    OrganisationDivision,
+    OrganisationGeography,
 )
 
+# Resolve a batch of points against both subdivided geography tables in one
+# statement. Each output row is (index of the input point,
+# division_geography_id, organisation_geography_id) with exactly one of the
+# two ids set.
+POINTS_TO_GEOGRAPHIES_SQL = """
+    WITH points AS (
+        SELECT idx, ST_SetSRID(ST_MakePoint(lng, lat), 4326) AS geom
+        FROM unnest(
+            %s::integer[], %s::double precision[], %s::double precision[]
+        ) AS p(idx, lng, lat)
+    )
+    SELECT points.idx, dgs.division_geography_id, NULL
+    FROM points
+        JOIN organisations_divisiongeographysubdivided dgs
+            ON ST_Contains(dgs.geography, points.geom)
+    UNION
+    SELECT points.idx, NULL, ogs.organisation_geography_id
+    FROM points
+        JOIN organisations_organisationgeographysubdivided ogs
+            ON ST_Contains(ogs.geography, points.geom)
+"""
+
+
+def get_geography_ids_for_points(points):
+    """
+    Given a list of Points, return a list of
+    (division_geography_ids, organisation_geography_ids) tuples of sets,
+    in the same order as the input.
+    """
+    matches = [(set(), set()) for _ in points]
+    if not points:
+        return matches
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            POINTS_TO_GEOGRAPHIES_SQL,
+            [
+                list(range(len(points))),
+                [point.x for point in points],
+                [point.y for point in points],
+            ],
+        )
+        for idx, div_id, org_id in cursor.fetchall():
+            if div_id is not None:
+                matches[idx][0].add(div_id)
+            if org_id is not None:
+                matches[idx][1].add(org_id)
+    return matches
+
+
+"""
+Point lookup cache
+
+Popular points (common postcodes, grid snapped coordinates) get resolved
+against the subdivided tables over and over again. The result of that
+lookup only changes when a geography changes, so we memoize the matched
+geography ids per (snapped) point.
+
+Size and TTL are controlled by the `POINT_LOOKUP_CACHE` cache alias.
+Every key includes a 'geography generation'. Saving or deleting a
+DivisionGeography or OrganisationGeography (which regenerates the
+subdivided rows) starts a new generation once it has committed, so all
+existing entries are ignored from then on and age out of the cache on
+their own.
+
+The generation is a Postgres sequence, so every process (and management
+commands) agree on it. Each process re-reads it at most every
+GEOGRAPHY_GENERATION_TTL seconds, so a change made elsewhere is picked up
+within that time.
+"""
+
+GEOGRAPHY_GENERATION_SEQUENCE = "elections_geography_generation"
+
+# (generation, time.monotonic() when we read it)
+_geography_generation = (None, 0)
+
+
+def get_point_lookup_cache():
+    return caches[settings.POINT_LOOKUP_CACHE]
+
+
+def get_geography_generation():
+    global _geography_generation
+    generation, read_at = _geography_generation
+    if (
+        generation is None
+        or time.monotonic() - read_at > settings.GEOGRAPHY_GENERATION_TTL
+    ):
+        with connection.cursor() as cursor:
+            # last_value is the start value until nextval() is first
+            # called, which would make the first nextval() the same
+            cursor.execute(
+                "SELECT CASE WHEN is_called THEN last_value ELSE 0 END "
+                f"FROM {GEOGRAPHY_GENERATION_SEQUENCE}"
+            )
+            generation = cursor.fetchone()[0]
+        _geography_generation = (generation, time.monotonic())
+    return generation
+
+
+def invalidate_point_lookups():
+    global _geography_generation
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT nextval(%s)", [GEOGRAPHY_GENERATION_SEQUENCE])
+        _geography_generation = (cursor.fetchone()[0], time.monotonic())
+
+
+def snap_point(point):
+    precision = settings.POINT_LOOKUP_CACHE_PRECISION
+    return Point(round(point.x, precision), round(point.y, precision))
+
+
+def point_lookup_cache_key(generation, point):
+    return f"point-lookup:{generation}:{point.x!r}:{point.y!r}"
+
+
+def get_cached_geography_ids_for_points(points):
+    """
+    As `get_geography_ids_for_points`, but points are snapped to
+    POINT_LOOKUP_CACHE_PRECISION decimal places and only the points we
+    haven't seen in the current geography generation hit the database.
+    """
+    cache = get_point_lookup_cache()
+    generation = get_geography_generation()
+    snapped = [snap_point(point) for point in points]
+    keys = [point_lookup_cache_key(generation, point) for point in snapped]
+    cached = cache.get_many(keys)
+
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    if missing:
+        found = get_geography_ids_for_points([snapped[i] for i in missing])
+        to_cache = {}
+        for i, (div_ids, org_ids) in zip(missing, found):
+            to_cache[keys[i]] = (sorted(div_ids), sorted(org_ids))
+        cache.set_many(to_cache)
+        cached.update(to_cache)
+
+    return [(set(cached[key][0]), set(cached[key][1])) for key in keys]
+
+
+@receiver(post_save, sender=DivisionGeography)
+@receiver(post_delete, sender=DivisionGeography)
+@receiver(post_save, sender=OrganisationGeography)
+@receiver(post_delete, sender=OrganisationGeography)
+def geography_changed(sender, **kwargs):
+    # Wait until the subdivided rows have been rebuilt and committed, so
+    # nothing can cache the old answer under the new generation
+    transaction.on_commit(invalidate_point_lookups)
+
+
+# Recalculates the rollups on every group above one of the paths in the
+# array parameter (or on every group if it's NULL) from the ballots below it
+REFRESH_ROLLUPS_SQL = """
+    UPDATE elections_election AS grp
+    SET
+        rollup_ballots = totals.ballots,
+        rollup_cancelled_ballots = totals.cancelled_ballots,
+        rollup_seats_contested = totals.seats_contested,
+        rollup_seats_cancelled = totals.seats_cancelled
+    FROM (
+        SELECT
+            grp.id,
+            count(ballot.id) AS ballots,
+            count(ballot.id) FILTER (WHERE ballot.cancelled)
+                AS cancelled_ballots,
+            coalesce(
+                sum(ballot.seats_contested) FILTER (WHERE NOT ballot.cancelled),
+                0
+            ) AS seats_contested,
+            coalesce(
+                sum(ballot.seats_contested) FILTER (WHERE ballot.cancelled), 0
+            ) AS seats_cancelled
+        FROM elections_election AS grp
+            LEFT JOIN elections_election AS ballot
+                ON ballot.path <@ grp.path
+                AND ballot.group_type IS NULL
+                AND ballot.current_status = 'Approved'
+        WHERE grp.group_type IS NOT NULL
+            AND (%(paths)s::ltree[] IS NULL OR grp.path @> %(paths)s::ltree[])
+        GROUP BY grp.id
+    ) AS totals
+    WHERE grp.id = totals.id
+"""
+
 
 class ElectionQuerySet(models.QuerySet):
     def for_point(self, point):
-        div_ids = DivisionGeographySubdivided.objects.filter(
-            geography__contains=point
-        ).values("division_geography_id")
-        org_ids = OrganisationGeographySubdivided.objects.filter(
-            geography__contains=point
-        ).values("organisation_geography_id")
+        div_ids, org_ids = get_cached_geography_ids_for_points([point])[0]
         return self.filter(
             models.Q(division_geography_id__in=div_ids)
             | models.Q(organisation_geography_id__in=org_ids)
@@ -34,6 +223,44 @@ class ElectionQuerySet(models.QuerySet):
         point = get_point_from_postcode(postcode)
         return self.for_point(point)
 
+    def election_ids_for_points(self, points):
+        """
+        Batch equivalent of `for_point`.
+
+        Resolves every point with a single spatial join and a single query
+        against this QuerySet, returning a list (in the same order as
+        `points`) of sorted election_id lists.
+        """
+        matches = get_cached_geography_ids_for_points(points)
+        div_ids = set().union(*(div for div, _ in matches))
+        org_ids = set().union(*(org for _, org in matches))
+        if not div_ids and not org_ids:
+            return [[] for _ in points]
+
+        by_division_geography = defaultdict(set)
+        by_organisation_geography = defaultdict(set)
+        rows = self.filter(
+            models.Q(division_geography_id__in=div_ids)
+            | models.Q(organisation_geography_id__in=org_ids)
+        ).values_list(
+            "election_id", "division_geography_id", "organisation_geography_id"
+        )
+        for election_id, div_id, org_id in rows:
+            if div_id in div_ids:
+                by_division_geography[div_id].add(election_id)
+            if org_id in org_ids:
+                by_organisation_geography[org_id].add(election_id)
+
+        results = []
+        for div_matches, org_matches in matches:
+            election_ids = set()
+            for div_id in div_matches:
+                election_ids |= by_division_geography[div_id]
+            for org_id in org_matches:
+                election_ids |= by_organisation_geography[org_id]
+            results.append(sorted(election_ids))
+        return results
+
     def ballots_with_point_in_area(self, area: GEOSGeometry):
         """
         Returns all election objects whose 'group_type' is 'None' and where the
@@ -88,7 +315,231 @@ class ElectionQuerySet(models.QuerySet):
         """
         if update_modified:
             kwargs["modified"] = kwargs.get("modified", timezone.now())
-        return super().update(**kwargs)
+        # Historical models in migrations don't have the change log
+        if self.model._meta.apps is not global_apps:
+            return super().update(**kwargs)
+
+        from elections.models import ROLLUP_FIELDS, ElectionChange
+
+        # get these first in case the update changes what we're filtering on
+        elections = list(self.values_list("pk", "path", "current_status"))
+        rows = super().update(**kwargs)
+        ElectionChange.objects.record(
+            [pk for pk, _, _ in elections],
+            previously_approved=[
+                pk
+                for pk, _, current_status in elections
+                if current_status == "Approved"
+            ],
+        )
+        if ROLLUP_FIELDS & kwargs.keys():
+            self.refresh_rollups([path for _, path, _ in elections])
+        return rows
+
+    def add_to_rollups(self, path, delta):
+        """
+        Add `delta` (ballots, cancelled ballots, seats contested,
+        seats cancelled) to the rollups of the groups above `path`
+        """
+        if not path or not any(delta):
+            return
+        # Bypass our update(): this isn't a change to anything in the API
+        models.QuerySet.update(
+            self.filter(path__ancestor_of=path).exclude(group_type=None),
+            rollup_ballots=F("rollup_ballots") + delta[0],
+            rollup_cancelled_ballots=F("rollup_cancelled_ballots") + delta[1],
+            rollup_seats_contested=F("rollup_seats_contested") + delta[2],
+            rollup_seats_cancelled=F("rollup_seats_cancelled") + delta[3],
+        )
+
+    def refresh_rollups(self, paths=None):
+        """
+        Recalculate the rollups of every group above any of `paths`,
+        or of every group if `paths` is None
+        """
+        if paths is not None:
+            paths = sorted({path for path in paths if path})
+            if not paths:
+                return
+        with connection.cursor() as cursor:
+            cursor.execute(REFRESH_ROLLUPS_SQL, {"paths": paths})
+
+    @transaction.atomic
+    def bulk_ingest(
+        self, elections, status=None, user=None, notes="", push_event=True
+    ):
+        """
+        Add a lot of new elections quickly.
+
+        This leaves the database as saving each election with
+        `save(status=status, user=user, notes=notes)` would, but without
+        sending any signals and with a fixed number of queries per level
+        of the election ID hierarchy: geographies are resolved from one
+        query each for divisions and organisations, elections and their
+        ModerationHistory are added with `bulk_create` and one event is
+        sent for the whole batch.
+
+        Parents must already exist or be in `elections`. The batch is
+        checked against the constraints in `elections.constraints` before
+        anything is written.
+
+        Returns the elections, with their primary keys set.
+        """
+        from elections.baker import queue_event
+        from elections.constraints import ViolatedConstraint
+        from elections.models import (
+            DEFAULT_STATUS,
+            ElectionChange,
+            ElectionType,
+            LocalAuthorityIntersection,
+            ModerationHistory,
+            ModerationStatuses,
+            SerializedElection,
+        )
+
+        elections = list(elections)
+        if not elections:
+            return elections
+        if any(election.pk for election in elections):
+            raise ValueError("bulk_ingest can only add new elections")
+        status = status or DEFAULT_STATUS
+        notes = notes[:255]
+        approved = ModerationStatuses.approved.value
+
+        def parent_in_batch(election):
+            return (
+                self.model.group.is_cached(election)
+                and election.group is not None
+                and election.group.pk is None
+            )
+
+        parents = {
+            pk: (path, current_status)
+            for pk, path, current_status in self.model.private_objects.filter(
+                pk__in={e.group_id for e in elections if e.group_id}
+            ).values_list("pk", "path", "current_status")
+        }
+        has_children = {
+            id(election.group)
+            for election in elections
+            if parent_in_batch(election)
+        }
+        election_types = ElectionType.objects.in_bulk(
+            {election.election_type_id for election in elections}
+        )
+        for election in elections:
+            if election.group_id and election.group_id not in parents:
+                raise ValueError(
+                    f"Can't find the parent of {election.election_id}"
+                )
+            if (
+                status == approved
+                and election.group_id
+                and parents[election.group_id][1] != approved
+            ):
+                raise ViolatedConstraint(
+                    f"Election {election.election_id} is approved but one "
+                    "or more parents are not approved"
+                )
+            if (
+                election.group_type
+                and election_types[election.election_type_id].election_type
+                not in ["mayor", "pcc"]
+                and id(election) not in has_children
+            ):
+                raise ViolatedConstraint(
+                    f"Election {election.election_id} is a group but has "
+                    "no children"
+                )
+
+        divisions = OrganisationDivision.objects.select_related(
+            "geography"
+        ).in_bulk({e.division_id for e in elections if e.division_id})
+        organisations = Organisation.objects.prefetch_related(
+            "geographies"
+        ).in_bulk({e.organisation_id for e in elections if e.organisation_id})
+        for election in elections:
+            if election.requires_voter_id == "":
+                election.requires_voter_id = None
+            if election.division_id:
+                election.division = divisions[election.division_id]
+            if election.organisation_id:
+                election.organisation = organisations[election.organisation_id]
+            election.division_geography = election.get_division_geography()
+            election.organisation_geography = (
+                election.get_organisation_geography()
+            )
+            election.current_status = status
+
+        # Parents first, so that their children can point at them
+        remaining = elections
+        while remaining:
+            level = [e for e in remaining if not parent_in_batch(e)]
+            if not level:
+                raise ValueError(
+                    "Parents must already exist or be in the same batch"
+                )
+            for election in level:
+                election.path = self.model.get_path_label(election.election_id)
+                if self.model.group.is_cached(election) and election.group:
+                    parent_path = election.group.path
+                else:
+                    parent_path = parents.get(election.group_id, (None,))[0]
+                if election.group_id and parent_path:
+                    election.path = f"{parent_path}.{election.path}"
+            self.model.private_objects.bulk_create(level)
+            remaining = [e for e in remaining if e.pk is None]
+
+        history = [
+            ModerationHistory(election=election, status_id=DEFAULT_STATUS)
+            for election in elections
+        ]
+        if status != DEFAULT_STATUS:
+            history += [
+                ModerationHistory(
+                    election=election, status_id=status, user=user, notes=notes
+                )
+                for election in elections
+            ]
+        ModerationHistory.objects.bulk_create(history)
+
+        election_ids = [election.pk for election in elections]
+        ElectionChange.objects.record(election_ids)
+        with_geography = [
+            election.pk
+            for election in elections
+            if election.division_geography_id
+            or election.organisation_geography_id
+        ]
+        if with_geography:
+            LocalAuthorityIntersection.objects.refresh_for_elections(
+                with_geography
+            )
+        if status == approved:
+            self.refresh_rollups(election.path for election in elections)
+        SerializedElection.objects.schedule_refresh(
+            election_ids
+            + [election.group_id for election in elections]
+            + [election.replaces_id for election in elections]
+        )
+
+        if (
+            push_event
+            and status in (approved, ModerationStatuses.deleted.value)
+            and any(not election.group_type for election in elections)
+        ):
+            queue_event(
+                detail={"description": "Elections bulk ingested"},
+                detail_type="elections_set_changed",
+            )
+
+        for election in elections:
+            election._loaded_values = election.get_field_values()
+            election._loaded_rollup = (
+                election.path,
+                election.get_rollup_contribution(),
+            )
+        return elections
 
     def order_by_group_type(self):
         order = Case(
@@ -124,3 +575,206 @@ class PrivateElectionsManager(models.Manager.from_queryset(ElectionQuerySet)):
     use_in_migrations = True
 
     use_in_migrations = True
+
+
+class ElectionChangeManager(models.Manager):
+    def get_change_type(self, current_status):
+        from elections.models import ElectionChangeType
+
+        return {
+            "Approved": ElectionChangeType.UPDATED,
+            "Deleted": ElectionChangeType.DELETED,
+        }.get(current_status)
+
+    def record_election(self, election, previous_status=None):
+        """
+        Add an entry to the change log for an election that has just been
+        saved, if it's public or deleted, or was public before the save.
+        """
+        from elections.models import ElectionChangeType
+
+        change_type = self.get_change_type(election.current_status)
+        if not change_type and previous_status == "Approved":
+            # it's gone from the API
+            change_type = ElectionChangeType.DELETED
+        if change_type:
+            self.create(
+                election_id=election.election_id,
+                change_type=change_type,
+                modified=election.modified,
+            )
+
+    def record(self, election_ids, previously_approved=()):
+        """
+        Add an entry to the change log for each of `election_ids` that is
+        public or deleted. Other statuses aren't in the API, so changes to
+        them aren't either, except that the elections in
+        `previously_approved` which are no longer public are recorded as
+        deleted.
+        """
+        from elections.models import Election, ElectionChangeType
+
+        election_ids = {pk for pk in election_ids if pk}
+        if not election_ids:
+            return
+        elections = (
+            Election.private_objects.filter(pk__in=election_ids)
+            .filter(
+                models.Q(current_status__in=["Approved", "Deleted"])
+                | models.Q(pk__in=previously_approved)
+            )
+            .values_list("election_id", "current_status", "modified")
+        )
+        self.bulk_create(
+            [
+                self.model(
+                    election_id=election_id,
+                    change_type=self.get_change_type(current_status)
+                    or ElectionChangeType.DELETED,
+                    modified=modified,
+                )
+                for election_id, current_status, modified in elections
+            ]
+        )
+
+
+class SerializedElectionManager(models.Manager):
+    """
+    Maintains the precomputed API representation of elections.
+
+    Documents are rebuilt after the transaction that changed them commits,
+    so a single refresh sees the final state of everything that was saved.
+    """
+
+    def schedule_refresh(self, election_ids):
+        election_ids = {pk for pk in election_ids if pk}
+        if election_ids:
+            transaction.on_commit(lambda: self.refresh(election_ids))
+
+    def refresh(self, election_ids):
+        # avoid a circular import: api.serializers imports elections.models
+        from api.serializers import ElectionSerializer
+        from elections.models import Election
+
+        elections = list(
+            Election.private_objects.filter(pk__in=election_ids)
+            .select_related(
+                "election_type",
+                "election_subtype",
+                "organisation",
+                "elected_role",
+                "division",
+                "division__divisionset",
+                "group",
+                "replaces",
+                "explanation",
+                "metadata",
+            )
+            .prefetch_related(
+                "_replaced_by",
+                models.Prefetch(
+                    "_children_qs",
+                    Election.public_objects.all(),
+                    to_attr="children",
+                ),
+            )
+        )
+        # There is no request here, so the organisation URL is stored as a
+        # path and made absolute when the document is served
+        serializer = ElectionSerializer(
+            elections, many=True, context={"request": None}
+        )
+        documents = [
+            self.model(
+                election=election,
+                document=json.dumps(data, cls=DjangoJSONEncoder),
+            )
+            for election, data in zip(elections, serializer.data)
+        ]
+        return self.bulk_create(
+            documents,
+            update_conflicts=True,
+            unique_fields=["election"],
+            update_fields=["document", "modified"],
+        )
+
+
+# True intersections (the interiors intersect, so sharing a boundary isn't
+# enough) between each election's geography and local authority
+# geographies. Like the point lookups this works on the subdivided tables:
+# two geographies' interiors intersect if and only if the interiors of some
+# pair of their subdivided pieces do.
+LOCAL_AUTHORITY_INTERSECTIONS_SQL = """
+    WITH election_pieces AS (
+        SELECT e.id AS election_id, dgs.geography
+        FROM elections_election e
+            JOIN organisations_divisiongeographysubdivided dgs
+                ON dgs.division_geography_id = e.division_geography_id
+        WHERE {election_where}
+        UNION ALL
+        SELECT e.id AS election_id, ogs.geography
+        FROM elections_election e
+            JOIN organisations_organisationgeographysubdivided ogs
+                ON ogs.organisation_geography_id = e.organisation_geography_id
+        WHERE {election_where}
+    ),
+    local_authority_pieces AS (
+        SELECT og.id AS organisation_geography_id, ogs.geography
+        FROM organisations_organisationgeography og
+            JOIN organisations_organisation o
+                ON o.id = og.organisation_id
+            JOIN organisations_organisationgeographysubdivided ogs
+                ON ogs.organisation_geography_id = og.id
+        WHERE o.organisation_type = 'local-authority'
+            AND {local_authority_where}
+    )
+    INSERT INTO elections_localauthorityintersection
+        (election_id, organisation_geography_id)
+    SELECT DISTINCT ep.election_id, lap.organisation_geography_id
+    FROM election_pieces ep
+        JOIN local_authority_pieces lap
+            ON ep.geography && lap.geography
+            AND ST_Relate(ep.geography, lap.geography, 'T********')
+    ON CONFLICT DO NOTHING
+"""
+
+
+class LocalAuthorityIntersectionManager(models.Manager):
+    """
+    Keeps the LocalAuthorityIntersection table in sync. Each method
+    replaces every row for the objects it is given.
+    """
+
+    def _insert(self, election_where, local_authority_where, params):
+        sql = LOCAL_AUTHORITY_INTERSECTIONS_SQL.format(
+            election_where=election_where,
+            local_authority_where=local_authority_where,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    @transaction.atomic
+    def refresh_for_elections(self, election_ids):
+        election_ids = list(election_ids)
+        self.filter(election_id__in=election_ids).delete()
+        self._insert("e.id = ANY(%s)", "TRUE", [election_ids, election_ids])
+
+    @transaction.atomic
+    def refresh_for_organisation_geography(self, organisation_geography):
+        # as a local authority that elections intersect
+        self.filter(organisation_geography=organisation_geography).delete()
+        self._insert("TRUE", "og.id = %s", [organisation_geography.pk])
+        # and as the geography of elections
+        self.refresh_for_elections(
+            organisation_geography.election_set.values_list("pk", flat=True)
+        )
+
+    def refresh_for_division_geography(self, division_geography):
+        self.refresh_for_elections(
+            division_geography.election_set.values_list("pk", flat=True)
+        )
+
+    @transaction.atomic
+    def rebuild(self):
+        self.all().delete()
+        self._insert("TRUE", "TRUE", [])
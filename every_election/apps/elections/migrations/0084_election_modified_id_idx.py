@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-16 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("elections", "0083_alter_election_by_election_reason"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="election",
+            index=models.Index(
+                fields=["modified", "election_id"],
+                name="election_modified_id_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-10-16 10:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("elections", "0084_election_modified_id_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SerializedElection",
+            fields=[
+                (
+                    "election",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="serialized",
+                        serialize=False,
+                        to="elections.election",
+                    ),
+                ),
+                ("document", models.TextField()),
+                ("modified", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.9 on 2026-10-16 12:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+POPULATE_SQL = """
+    WITH election_pieces AS (
+        SELECT e.id AS election_id, dgs.geography
+        FROM elections_election e
+            JOIN organisations_divisiongeographysubdivided dgs
+                ON dgs.division_geography_id = e.division_geography_id
+        UNION ALL
+        SELECT e.id AS election_id, ogs.geography
+        FROM elections_election e
+            JOIN organisations_organisationgeographysubdivided ogs
+                ON ogs.organisation_geography_id = e.organisation_geography_id
+    ),
+    local_authority_pieces AS (
+        SELECT og.id AS organisation_geography_id, ogs.geography
+        FROM organisations_organisationgeography og
+            JOIN organisations_organisation o
+                ON o.id = og.organisation_id
+            JOIN organisations_organisationgeographysubdivided ogs
+                ON ogs.organisation_geography_id = og.id
+        WHERE o.organisation_type = 'local-authority'
+    )
+    INSERT INTO elections_localauthorityintersection
+        (election_id, organisation_geography_id)
+    SELECT DISTINCT ep.election_id, lap.organisation_geography_id
+    FROM election_pieces ep
+        JOIN local_authority_pieces lap
+            ON ep.geography && lap.geography
+            AND ST_Relate(ep.geography, lap.geography, 'T********')
+    ON CONFLICT DO NOTHING
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("elections", "0085_serializedelection"),
+        ("organisations", "0074_geographysimplified"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LocalAuthorityIntersection",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "election",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="local_authority_intersections",
+                        to="elections.election",
+                    ),
+                ),
+                (
+                    "organisation_geography",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="election_intersections",
+                        to="organisations.organisationgeography",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("election", "organisation_geography")},
+            },
+        ),
+        migrations.RunSQL(POPULATE_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
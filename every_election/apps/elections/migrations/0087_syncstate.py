@@ -0,0 +1,46 @@
+# Generated by Django 5.2.9 on 2026-10-16 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("elections", "0086_localauthorityintersection"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncState",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "upstream_url",
+                    models.URLField(max_length=800, unique=True),
+                ),
+                (
+                    "next_url",
+                    models.URLField(blank=True, max_length=2000, null=True),
+                ),
+                (
+                    "high_water_mark",
+                    models.DateTimeField(blank=True, null=True),
+                ),
+                ("run_started", models.DateTimeField(blank=True, null=True)),
+                ("run_finished", models.DateTimeField(blank=True, null=True)),
+                ("run_pages", models.PositiveIntegerField(default=0)),
+                ("run_results", models.PositiveIntegerField(default=0)),
+                (
+                    "run_high_water_mark",
+                    models.DateTimeField(blank=True, null=True),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.9 on 2026-10-16 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("elections", "0087_syncstate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="election",
+            name="sync_hash",
+            field=models.CharField(blank=True, editable=False, max_length=40),
+        ),
+        migrations.AddField(
+            model_name="syncstate",
+            name="run_unchanged",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
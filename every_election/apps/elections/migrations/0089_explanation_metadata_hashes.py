@@ -0,0 +1,51 @@
+# Generated by Django 5.2.9 on 2026-10-16 15:20
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def populate_hashes(apps, schema_editor):
+    Explanation = apps.get_model("elections", "Explanation")
+    MetaData = apps.get_model("elections", "MetaData")
+
+    explanations = list(Explanation.objects.all())
+    for explanation in explanations:
+        explanation.explanation_hash = hashlib.sha1(
+            explanation.explanation.encode("utf-8")
+        ).hexdigest()
+    Explanation.objects.bulk_update(explanations, ["explanation_hash"])
+
+    metadata = list(MetaData.objects.all())
+    for obj in metadata:
+        obj.data_hash = hashlib.sha1(
+            json.dumps(obj.data, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+    MetaData.objects.bulk_update(metadata, ["data_hash"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("elections", "0088_election_sync_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="explanation",
+            name="explanation_hash",
+            field=models.CharField(
+                db_index=True, default="", editable=False, max_length=40
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="metadata",
+            name="data_hash",
+            field=models.CharField(
+                db_index=True, default="", editable=False, max_length=40
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.9 on 2026-10-16 16:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("elections", "0089_explanation_metadata_hashes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEvent",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(max_length=255)),
+                ("detail_type", models.CharField(max_length=255)),
+                ("detail", models.JSONField()),
+                ("dedupe_key", models.CharField(max_length=40)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                (
+                    "next_attempt",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("sent", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("sent", None)),
+                        fields=["next_attempt"],
+                        name="outbox_pending_idx",
+                    )
+                ],
+            },
+        ),
+    ]
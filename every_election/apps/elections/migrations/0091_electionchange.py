@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-16 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("elections", "0090_outboxevent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ElectionChange",
+            fields=[
+                (
+                    "sequence",
+                    models.BigAutoField(primary_key=True, serialize=False),
+                ),
+                ("election_id", models.CharField(max_length=250)),
+                (
+                    "change_type",
+                    models.CharField(
+                        choices=[
+                            ("updated", "Updated"),
+                            ("deleted", "Deleted"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("modified", models.DateTimeField()),
+                ("created", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ("sequence",),
+            },
+        ),
+    ]
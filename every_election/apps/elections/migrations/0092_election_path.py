@@ -0,0 +1,50 @@
+# Generated by Django 5.2.9 on 2026-10-16 17:05
+
+import core.models
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+POPULATE_SQL = """
+    WITH RECURSIVE tree(id, path) AS (
+        SELECT id, text2ltree(replace(replace(election_id, '-', '_'), '.', '__'))
+        FROM elections_election
+        WHERE group_id IS NULL
+        UNION ALL
+        SELECT
+            child.id,
+            tree.path || text2ltree(
+                replace(replace(child.election_id, '-', '_'), '.', '__')
+            )
+        FROM elections_election child
+            JOIN tree ON child.group_id = tree.id
+    )
+    UPDATE elections_election
+    SET path = tree.path
+    FROM tree
+    WHERE elections_election.id = tree.id;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("elections", "0091_electionchange"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE EXTENSION IF NOT EXISTS ltree;",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddField(
+            model_name="election",
+            name="path",
+            field=core.models.LtreeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(POPULATE_SQL, reverse_sql=migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name="election",
+            index=django.contrib.postgres.indexes.GistIndex(
+                fields=["path"], name="election_path_gist_idx"
+            ),
+        ),
+    ]
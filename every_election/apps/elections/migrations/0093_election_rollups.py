@@ -0,0 +1,64 @@
+# Generated by Django 5.2.9 on 2026-10-16 17:40
+
+from django.db import migrations, models
+
+POPULATE_SQL = """
+    UPDATE elections_election AS grp
+    SET
+        rollup_ballots = totals.ballots,
+        rollup_cancelled_ballots = totals.cancelled_ballots,
+        rollup_seats_contested = totals.seats_contested,
+        rollup_seats_cancelled = totals.seats_cancelled
+    FROM (
+        SELECT
+            grp.id,
+            count(ballot.id) AS ballots,
+            count(ballot.id) FILTER (WHERE ballot.cancelled)
+                AS cancelled_ballots,
+            coalesce(
+                sum(ballot.seats_contested) FILTER (WHERE NOT ballot.cancelled),
+                0
+            ) AS seats_contested,
+            coalesce(
+                sum(ballot.seats_contested) FILTER (WHERE ballot.cancelled), 0
+            ) AS seats_cancelled
+        FROM elections_election AS grp
+            JOIN elections_election AS ballot
+                ON ballot.path <@ grp.path
+                AND ballot.group_type IS NULL
+                AND ballot.current_status = 'Approved'
+        WHERE grp.group_type IS NOT NULL
+        GROUP BY grp.id
+    ) AS totals
+    WHERE grp.id = totals.id;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("elections", "0092_election_path"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="election",
+            name="rollup_ballots",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="election",
+            name="rollup_cancelled_ballots",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="election",
+            name="rollup_seats_contested",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="election",
+            name="rollup_seats_cancelled",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(POPULATE_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
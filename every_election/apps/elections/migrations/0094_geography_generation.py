@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-16 19:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("elections", "0093_election_rollups"),
+    ]
+
+    operations = [
+        # See elections.managers.get_geography_generation
+        migrations.RunSQL(
+            "CREATE SEQUENCE IF NOT EXISTS elections_geography_generation;",
+            reverse_sql="DROP SEQUENCE IF EXISTS elections_geography_generation;",
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.9 on 2026-10-17 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("elections", "0094_geography_generation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="electionchange",
+            name="txid",
+            field=models.BigIntegerField(
+                db_default=models.Func(
+                    function="txid_current",
+                    output_field=models.BigIntegerField(),
+                )
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-17 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("elections", "0095_electionchange_txid"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="electionchange",
+            index=models.Index(
+                fields=["txid", "sequence"],
+                name="electionchange_txid_seq_idx",
+            ),
+        ),
+    ]
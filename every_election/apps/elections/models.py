@@ -1,26 +1,38 @@
+import copy
+import hashlib
+import json
 import tempfile
 import urllib.request
 from datetime import date, timedelta
 from enum import Enum, unique
 
+from core.models import LtreeField
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GistIndex
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.files import File
-from django.db import models, transaction
-from django.db.models import JSONField, Q
+from django.db import connection, models, transaction
+from django.db.models import DEFERRED, JSONField, Q
 from django.db.models.fields.related_descriptors import (
     create_reverse_many_to_one_manager,
 )
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.urls import reverse
+from django.utils import timezone
 from django_extensions.db.models import TimeStampedModel
 from storages.backends.s3boto3 import S3Boto3Storage
 
-from .baker import send_event
+from .baker import queue_event
 from .ca_election_metadata import CA_ID_REQUIREMENTS, CA_VOTING_SYSTEMS
-from .managers import PrivateElectionsManager, PublicElectionsManager
+from .managers import (
+    ElectionChangeManager,
+    LocalAuthorityIntersectionManager,
+    PrivateElectionsManager,
+    PublicElectionsManager,
+    SerializedElectionManager,
+)
 
 
 class ElectionCancellationReason(models.TextChoices):
@@ -136,6 +148,29 @@ class ModerationStatus(models.Model):
 DEFAULT_STATUS = ModerationStatuses.suggested.value
 
 
+# Fields that get_division_geography and get_organisation_geography depend on
+GEOGRAPHY_SOURCE_FIELDS = {
+    "division_id",
+    "organisation_id",
+    "poll_open_date",
+    "group_type",
+}
+
+# Fields of a group that show up in the API representation of the ballots
+# below it. Ballots only show their parent's election ID (as `group`),
+# so nothing else about a group needs them re-syncing.
+BALLOT_SERIALIZED_FIELDS = {"election_id"}
+
+# Fields that get_rollup_contribution depends on
+ROLLUP_FIELDS = {
+    "path",
+    "group_type",
+    "current_status",
+    "cancelled",
+    "seats_contested",
+}
+
+
 class Election(TimeStampedModel):
     """
     An election.
@@ -185,6 +220,11 @@ class Election(TimeStampedModel):
         on_delete=models.CASCADE,
         verbose_name="Parent",
     )
+    # The path from the root of this election's tree to this election,
+    # with a label for each election ID on the way (see get_path_label).
+    # Maintained in save(), so a subtree is one lookup on the GiST index:
+    # Election.private_objects.filter(path__descendant_of=election.path)
+    path = LtreeField(blank=True, null=True, editable=False)
     requires_voter_id = models.CharField(
         max_length=100,
         null=True,
@@ -237,16 +277,32 @@ class Election(TimeStampedModel):
         queryset = (
             manager.all() if inclusive else manager.filter(~Q(pk=self.pk))
         )
+        return queryset.filter(path__descendant_of=self.path)
 
-        id_parts = self.election_id.split(".")
-        head = id_parts[:-1]
-        date_ = id_parts.pop(-1)
+    @staticmethod
+    def get_path_label(election_id):
+        # ltree labels can only contain letters, digits and underscores.
+        # Election IDs never contain underscores so this can't collide.
+        return election_id.replace("-", "_").replace(".", "__")
 
-        prefix = f"{'.'.join(head)}."
-
-        return queryset.filter(
-            Q(election_id__startswith=prefix) & Q(poll_open_date=date_)
-        )
+    def get_path(self):
+        if not self.election_id:
+            return None
+        label = self.get_path_label(self.election_id)
+        if not self.group_id:
+            return label
+        parent_path = None
+        if Election.group.is_cached(self):
+            parent_path = self.group.path
+        if not parent_path:
+            parent_path = (
+                Election.private_objects.filter(pk=self.group_id)
+                .values_list("path", flat=True)
+                .first()
+            )
+        if not parent_path:
+            return None
+        return f"{parent_path}.{label}"
 
     group_type = models.CharField(
         blank=True, max_length=100, null=True, db_index=True
@@ -308,6 +364,25 @@ class Election(TimeStampedModel):
     # (not necessarily the Notice of Election)
     source = models.CharField(blank=True, max_length=1000)
 
+    # Hash of the API payload this election was last imported from by
+    # ElectionSyncer, so unchanged payloads can be skipped
+    sync_hash = models.CharField(blank=True, max_length=40, editable=False)
+
+    # Totals over the public ballots below a group, so that listing groups
+    # doesn't need an aggregate per row. Always 0 on ballots.
+    # Kept up to date as ballots are saved and deleted
+    # (see ElectionQuerySet.add_to_rollups and refresh_rollups)
+    rollup_ballots = models.PositiveIntegerField(default=0, editable=False)
+    rollup_cancelled_ballots = models.PositiveIntegerField(
+        default=0, editable=False
+    )
+    rollup_seats_contested = models.PositiveIntegerField(
+        default=0, editable=False
+    )
+    rollup_seats_cancelled = models.PositiveIntegerField(
+        default=0, editable=False
+    )
+
     # Notice of Election document
     notice = models.ForeignKey(
         "elections.Document",
@@ -390,6 +465,56 @@ class Election(TimeStampedModel):
     class Meta:
         ordering = ("election_id",)
         get_latest_by = "modified"
+        indexes = [
+            # Used by keyset pagination in the API
+            models.Index(
+                fields=["modified", "election_id"],
+                name="election_modified_id_idx",
+            ),
+            GistIndex(fields=["path"], name="election_path_gist_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # used in save() to tell which fields have changed
+        instance._loaded_values = instance.get_field_values()
+        # and what we've added to our parents' rollups
+        if instance.__dict__.keys() >= ROLLUP_FIELDS:
+            instance._loaded_rollup = (
+                instance.path,
+                instance.get_rollup_contribution(),
+            )
+        return instance
+
+    def get_field_values(self):
+        """
+        The values of the concrete fields that are loaded on this instance,
+        by attname. Mutable values are copied, so that changing them in
+        place still counts as a change.
+        """
+        return {
+            field.attname: copy.deepcopy(value)
+            if isinstance(value, (dict, list))
+            else value
+            for field in self._meta.concrete_fields
+            if (value := self.__dict__.get(field.attname, DEFERRED))
+            is not DEFERRED
+        }
+
+    def get_changed_fields(self):
+        """
+        The attnames of the fields that have changed since this election was
+        loaded or last saved, or None if it hasn't been saved yet
+        """
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None or not self.pk:
+            return None
+        return {
+            name
+            for name, value in self.get_field_values().items()
+            if name not in loaded or loaded[name] != value
+        }
 
     def get_absolute_url(self):
         return reverse("single_election_view", args=(self.election_id,))
@@ -409,14 +534,47 @@ class Election(TimeStampedModel):
         If self doesn't have a group_type (i.e. is a 'ballot') it returns itself.
         """
         if self.group_type:
-            group, date = self.election_id.rsplit(".", 1)
             return Election.public_objects.filter(
-                election_id__startswith=group + ".",
-                election_id__endswith=date,
-                group_type=None,
+                path__descendant_of=self.path, group_type=None
             )
         return None
 
+    def get_rollup_contribution(self):
+        """
+        What this election adds to the rollups of the groups above it, as
+        (ballots, cancelled ballots, seats contested, seats cancelled)
+        """
+        if (
+            self.group_type
+            or self.current_status != ModerationStatuses.approved.value
+        ):
+            return (0, 0, 0, 0)
+        seats = self.seats_contested or 0
+        if self.cancelled:
+            return (1, 1, 0, seats)
+        return (1, 0, seats, 0)
+
+    def update_rollups(self, old_path, old_contribution):
+        """
+        Move our parents' rollups on from what we contributed when we were
+        loaded to what we contribute now
+        """
+        new_contribution = self.get_rollup_contribution()
+        if old_path == self.path:
+            delta = [
+                new - old
+                for new, old in zip(new_contribution, old_contribution)
+            ]
+            Election.private_objects.add_to_rollups(self.path, delta)
+        else:
+            Election.private_objects.add_to_rollups(
+                old_path, [-old for old in old_contribution]
+            )
+            Election.private_objects.add_to_rollups(
+                self.path, new_contribution
+            )
+        self._loaded_rollup = (self.path, new_contribution)
+
     @property
     def group_seats_contested(self):
         """
@@ -425,13 +583,7 @@ class Election(TimeStampedModel):
         unless self is a ballot.
         """
         if self.group_type:
-            return (
-                self.get_ballots()
-                .filter(cancelled=False)
-                .aggregate(models.Sum("seats_contested"))
-                .get("seats_contested__sum")
-                or 0
-            )
+            return self.rollup_seats_contested
 
         if self.cancelled:
             return 0
@@ -446,13 +598,7 @@ class Election(TimeStampedModel):
         unless self is a ballot.
         """
         if self.group_type:
-            return (
-                self.get_ballots()
-                .filter(cancelled=True)
-                .aggregate(models.Sum("seats_contested"))
-                .get("seats_contested__sum")
-                or 0
-            )
+            return self.rollup_seats_cancelled
 
         if self.cancelled:
             return self.seats_contested
@@ -593,11 +739,21 @@ class Election(TimeStampedModel):
 
         # used later to determine if we should look for ballots
         created = not self.pk
+        # None if we're new, which counts as everything changing
+        changed = self.get_changed_fields()
 
         notes = notes[:255]
 
-        self.division_geography = self.get_division_geography()
-        self.organisation_geography = self.get_organisation_geography()
+        if changed is None or changed & GEOGRAPHY_SOURCE_FIELDS:
+            if changed is not None:
+                # the geography we had may not be the right one now,
+                # unless it's been set along with everything else
+                if "division_geography_id" not in changed:
+                    self.division_geography = None
+                if "organisation_geography_id" not in changed:
+                    self.organisation_geography = None
+            self.division_geography = self.get_division_geography()
+            self.organisation_geography = self.get_organisation_geography()
 
         if not self.group_id and self.group:
             try:
@@ -608,7 +764,54 @@ class Election(TimeStampedModel):
                 group_model = self.group.save(**kwargs)
             self.group = group_model
 
+        old_path = self.path
+        if (
+            not self.path
+            or changed is None
+            or changed & {"election_id", "group_id"}
+        ):
+            self.path = self.get_path()
+
+        # now we know everything we're going to write
+        changed = self.get_changed_fields()
+        previous_status = getattr(self, "_loaded_values", {}).get(
+            "current_status"
+        )
+
         super().save(**kwargs)
+        self._loaded_values = self.get_field_values()
+
+        if old_path and self.path and old_path != self.path:
+            # move the subtree below us too
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE elections_election
+                    SET path = %s::ltree || subpath(path, nlevel(%s::ltree))
+                    WHERE path <@ %s::ltree AND id != %s
+                    """,
+                    [self.path, old_path, old_path, self.pk],
+                )
+            # our ballots have moved from one set of groups to another, and
+            # recalculating their rollups already counts what we contribute
+            Election.private_objects.refresh_rollups([old_path, self.path])
+            self._loaded_rollup = (self.path, self.get_rollup_contribution())
+        else:
+            self.update_rollups(
+                *getattr(self, "_loaded_rollup", (None, (0, 0, 0, 0)))
+            )
+
+        ElectionChange.objects.record_election(self, previous_status)
+
+        geography_ids = {"division_geography_id", "organisation_geography_id"}
+        if (
+            changed & geography_ids
+            if changed is not None
+            # a new election without a geography can't intersect anything
+            else self.division_geography_id or self.organisation_geography_id
+        ):
+            LocalAuthorityIntersection.objects.refresh_for_elections([self.pk])
+
         if (
             status
             and status != DEFAULT_STATUS
@@ -625,9 +828,17 @@ class Election(TimeStampedModel):
             else:
                 event.save(push_event=False)
 
-        # if the object was created return here to save on unnecessary
-        # db queries
-        if created:
+        # our parent lists us as a child and the election we replace
+        # lists us in `replaced_by`, so their documents change too
+        SerializedElection.objects.schedule_refresh(
+            [self.pk, self.group_id, self.replaces_id]
+        )
+
+        # if the object was created, or nothing that our ballots show
+        # has changed, return here to save on unnecessary db queries
+        if created or (
+            changed is not None and not changed & BALLOT_SERIALIZED_FIELDS
+        ):
             return
 
         # otherwise check if we have related ballots
@@ -636,6 +847,9 @@ class Election(TimeStampedModel):
             # if so update the modified date on them so that we import
             # the changes made on the parent election
             ballots.update(modified=self.modified)
+            SerializedElection.objects.schedule_refresh(
+                ballot.pk for ballot in ballots
+            )
 
 
 @receiver(post_save, sender=Election, dispatch_uid="init_status_history")
@@ -678,7 +892,7 @@ class ModerationHistory(TimeStampedModel):
             )
             and self.election.identifier_type == "ballot"
         ):
-            send_event(
+            queue_event(
                 detail={"description": "ModerationHistory object saved"},
                 detail_type="elections_set_changed",
             )
@@ -691,17 +905,269 @@ class ModerationHistory(TimeStampedModel):
         ordering = ("election", "-modified")
 
 
+class LocalAuthorityIntersection(models.Model):
+    """
+    Records which local authority geographies each election's geography
+    intersects, so we can filter on it without any geometry work at
+    request time.
+
+    Maintained when elections and geographies are saved. Run the
+    `rebuild_local_authority_intersections` command to rebuild it.
+    """
+
+    election = models.ForeignKey(
+        Election,
+        related_name="local_authority_intersections",
+        on_delete=models.CASCADE,
+    )
+    organisation_geography = models.ForeignKey(
+        "organisations.OrganisationGeography",
+        related_name="election_intersections",
+        on_delete=models.CASCADE,
+    )
+
+    objects = LocalAuthorityIntersectionManager()
+
+    class Meta:
+        unique_together = ("election", "organisation_geography")
+
+
+@receiver(post_save, sender="organisations.OrganisationGeography")
+def organisation_geography_saved(sender, instance, **kwargs):
+    # the subdivided geography isn't regenerated until after post_save
+    intersections = LocalAuthorityIntersection.objects
+    transaction.on_commit(
+        lambda: intersections.refresh_for_organisation_geography(instance)
+    )
+
+
+@receiver(post_save, sender="organisations.DivisionGeography")
+def division_geography_saved(sender, instance, **kwargs):
+    # the subdivided geography isn't regenerated until after post_save
+    intersections = LocalAuthorityIntersection.objects
+    transaction.on_commit(
+        lambda: intersections.refresh_for_division_geography(instance)
+    )
+
+
+class SerializedElection(models.Model):
+    """
+    The API representation of an election, stored so that we don't need
+    to join and serialize all the related objects on every request.
+
+    This is kept up to date when the election or anything it serializes
+    is saved. Run the `refresh_serialized_elections` command to rebuild it.
+    """
+
+    election = models.OneToOneField(
+        Election,
+        primary_key=True,
+        related_name="serialized",
+        on_delete=models.CASCADE,
+    )
+    document = models.TextField()
+    modified = models.DateTimeField(auto_now=True)
+
+    objects = SerializedElectionManager()
+
+    def __str__(self):
+        return f"Serialized {self.election_id}"
+
+
+class ElectionChangeType(models.TextChoices):
+    UPDATED = "updated", "Updated"
+    DELETED = "deleted", "Deleted"
+
+
+class ElectionChange(models.Model):
+    """
+    An append only log of changes to public and deleted elections, served
+    at /api/changes/ so that consumers can follow every change (including
+    deletions) in order from the last sequence number they saw.
+
+    Entries are written whenever an election is saved or updated through
+    ElectionQuerySet.update(), and when it is deleted. An election that
+    stops being public is recorded as deleted.
+    """
+
+    sequence = models.BigAutoField(primary_key=True)
+    election_id = models.CharField(max_length=250)
+    change_type = models.CharField(
+        max_length=10, choices=ElectionChangeType.choices
+    )
+    # The election's modified timestamp at the time of the change
+    modified = models.DateTimeField()
+    created = models.DateTimeField(auto_now_add=True)
+    # The transaction that wrote the change, so that the feed can wait
+    # for it to commit along with everything written before it
+    txid = models.BigIntegerField(
+        db_default=models.Func(
+            function="txid_current", output_field=models.BigIntegerField()
+        )
+    )
+
+    objects = ElectionChangeManager()
+
+    class Meta:
+        ordering = ("sequence",)
+        indexes = [
+            # the order /api/changes/ serves changes in
+            models.Index(
+                fields=["txid", "sequence"],
+                name="electionchange_txid_seq_idx",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.sequence}: {self.election_id} {self.change_type}"
+
+
+@receiver(post_delete, sender=Election, dispatch_uid="remove_from_rollups")
+def remove_from_rollups(sender, instance, **kwargs):
+    # The row has gone, so recalculate rather than trust what's in memory
+    if any(instance.get_rollup_contribution()):
+        Election.private_objects.refresh_rollups([instance.path])
+
+
+@receiver(post_delete, sender=Election, dispatch_uid="record_election_deleted")
+def record_election_deleted(sender, instance, **kwargs):
+    if ElectionChange.objects.get_change_type(instance.current_status):
+        ElectionChange.objects.create(
+            election_id=instance.election_id,
+            change_type=ElectionChangeType.DELETED,
+            modified=timezone.now(),
+        )
+
+
+class SyncState(models.Model):
+    """
+    How far ElectionSyncer has got through UPSTREAM_SYNC_URL.
+
+    While a run is in progress `next_url` is the first page that hasn't
+    been applied yet. Each page is applied in the same transaction that
+    moves `next_url` on, so a run that stops part way through resumes
+    from exactly where it got to. When a run reaches the last page we
+    clear `next_url` and the `modified` time of the latest election we
+    saw becomes the `high_water_mark` that the next run starts from, less
+    SYNC_OVERLAP_SECONDS.
+    """
+
+    upstream_url = models.URLField(max_length=800, unique=True)
+    next_url = models.URLField(max_length=2000, blank=True, null=True)
+    high_water_mark = models.DateTimeField(blank=True, null=True)
+    run_started = models.DateTimeField(blank=True, null=True)
+    run_finished = models.DateTimeField(blank=True, null=True)
+    run_pages = models.PositiveIntegerField(default=0)
+    run_results = models.PositiveIntegerField(default=0)
+    run_unchanged = models.PositiveIntegerField(default=0)
+    run_high_water_mark = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return self.upstream_url
+
+    @property
+    def in_progress(self):
+        return bool(self.next_url)
+
+    def start_run(self, url):
+        self.next_url = url
+        self.run_started = timezone.now()
+        self.run_finished = None
+        self.run_pages = 0
+        self.run_results = 0
+        self.run_unchanged = 0
+        self.run_high_water_mark = None
+        self.save()
+
+    def record_page(self, next_url, modified, unchanged=0):
+        """
+        Record that a page with results last modified at `modified` has
+        been applied, `unchanged` of which didn't need writing. This should
+        be called in the same transaction that wrote the page.
+        """
+        self.next_url = next_url
+        self.run_pages += 1
+        self.run_results += len(modified)
+        self.run_unchanged += unchanged
+        if modified:
+            self.run_high_water_mark = max(
+                filter(None, [self.run_high_water_mark, *modified])
+            )
+        if not next_url:
+            self.run_finished = timezone.now()
+            if self.run_high_water_mark:
+                self.high_water_mark = self.run_high_water_mark
+        self.save()
+
+
+class OutboxEventQuerySet(models.QuerySet):
+    def pending(self, now=None):
+        return self.filter(
+            sent=None,
+            next_attempt__lte=now or timezone.now(),
+            attempts__lt=settings.EVENT_OUTBOX_MAX_ATTEMPTS,
+        )
+
+
+class OutboxEvent(models.Model):
+    """
+    An event for the DC event bus, written in the same transaction as the
+    change it describes and sent by `elections.baker.dispatch_events`.
+
+    `dedupe_key` is a hash of the source, type and detail, so identical
+    events that are waiting to be sent can be sent once.
+    """
+
+    source = models.CharField(max_length=255)
+    detail_type = models.CharField(max_length=255)
+    detail = JSONField()
+    dedupe_key = models.CharField(max_length=40)
+    created = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    sent = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+
+    objects = OutboxEventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_attempt"],
+                condition=Q(sent=None),
+                name="outbox_pending_idx",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.detail_type} ({self.pk})"
+
+
 class Explanation(models.Model):
     description = models.CharField(blank=False, max_length=100)
     explanation = models.TextField()
+    # So we can find an explanation by its text without comparing it
+    explanation_hash = models.CharField(
+        max_length=40, db_index=True, editable=False
+    )
 
     def __str__(self):
         return self.description
 
+    @staticmethod
+    def get_hash(explanation):
+        return hashlib.sha1(explanation.encode("utf-8")).hexdigest()
+
+    def save(self, *args, **kwargs):
+        self.explanation_hash = self.get_hash(self.explanation)
+        super().save(*args, **kwargs)
+
 
 class MetaData(models.Model):
     description = models.CharField(blank=False, max_length=100)
     data = JSONField()
+    # So we can find metadata by its content without comparing JSON
+    data_hash = models.CharField(max_length=40, db_index=True, editable=False)
 
     class Meta:
         verbose_name_plural = "MetaData"
@@ -709,6 +1175,16 @@ class MetaData(models.Model):
     def __str__(self):
         return self.description
 
+    @staticmethod
+    def get_hash(data):
+        return hashlib.sha1(
+            json.dumps(data, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def save(self, *args, **kwargs):
+        self.data_hash = self.get_hash(self.data)
+        super().save(*args, **kwargs)
+
 
 class PdfS3Storage(S3Boto3Storage):
     default_content_type = "application/pdf"
@@ -734,3 +1210,27 @@ class Document(models.Model):
                 "%s/%s" % (election_id, filename), File(tmp)
             )
         return self.uploaded_file
+
+
+# Objects which are embedded in the serialized elections that use them
+SERIALIZED_ELECTION_LOOKUPS = {
+    "organisations.Organisation": "organisation",
+    "organisations.OrganisationDivision": "division",
+    "organisations.OrganisationDivisionSet": "division__divisionset",
+    "elections.Explanation": "explanation",
+    "elections.MetaData": "metadata",
+}
+
+
+@receiver(post_save, sender="organisations.Organisation")
+@receiver(post_save, sender="organisations.OrganisationDivision")
+@receiver(post_save, sender="organisations.OrganisationDivisionSet")
+@receiver(post_save, sender=Explanation)
+@receiver(post_save, sender=MetaData)
+def refresh_related_serialized_elections(sender, instance, **kwargs):
+    lookup = SERIALIZED_ELECTION_LOOKUPS[sender._meta.label]
+    SerializedElection.objects.schedule_refresh(
+        Election.private_objects.filter(**{lookup: instance}).values_list(
+            "pk", flat=True
+        )
+    )
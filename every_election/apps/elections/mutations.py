@@ -0,0 +1,169 @@
+"""
+Changes to lots of elections at once.
+
+Saving an election one at a time resolves its geographies, writes its
+status history and sends an event, which is a lot of work to repeat for
+every ballot in a large group. These functions make the same kind of
+change to a whole set of elections in a handful of queries:
+
+- the rows are written with one UPDATE (or one per batch), which moves
+  `modified` on and records the change log and rollups
+  (see ElectionQuerySet.update)
+- stored API documents are refreshed for the elections, their parents and
+  the elections they replace
+- a single `elections_set_changed` event is queued for the lot
+
+They can't change the fields that `Election.save()` derives other fields
+from (election IDs, parents, divisions, organisations, dates and group
+types) or the status, which goes through `set_moderation_status`. As
+none of those change, descendants don't need their `modified` time moving
+on (see BALLOT_SERIALIZED_FIELDS), so to change a group and everything
+below it, pass `with_descendants(elections)`.
+"""
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .baker import queue_event
+from .models import (
+    BALLOT_SERIALIZED_FIELDS,
+    DEFAULT_STATUS,
+    GEOGRAPHY_SOURCE_FIELDS,
+    Election,
+    ModerationHistory,
+    ModerationStatuses,
+    SerializedElection,
+)
+
+# Fields that need the logic in Election.save() to change
+SAVE_ONLY_FIELDS = {
+    name
+    for attname in GEOGRAPHY_SOURCE_FIELDS
+    | BALLOT_SERIALIZED_FIELDS
+    | {"group_id", "path", "current_status"}
+    for name in (attname, attname.removesuffix("_id"))
+}
+
+
+def check_fields(fields):
+    if fields & SAVE_ONLY_FIELDS:
+        raise ValueError(
+            "Can't change {} in bulk".format(
+                ", ".join(sorted(fields & SAVE_ONLY_FIELDS))
+            )
+        )
+
+
+def with_descendants(elections):
+    """
+    A QuerySet of the `elections` and everything below them
+    """
+    return Election.private_objects.filter(
+        Exists(elections.filter(path__ancestor_of=OuterRef("path")))
+    )
+
+
+def elections_changed(election_ids, description, push_event=True):
+    """
+    Do what saving each of `election_ids` would have done after writing it
+    """
+    rows = Election.private_objects.filter(pk__in=election_ids).values_list(
+        "pk", "group_id", "replaces_id", "group_type", "current_status"
+    )
+    refresh_ids = set()
+    ballots_changed = False
+    for pk, group_id, replaces_id, group_type, current_status in rows:
+        refresh_ids.update([pk, group_id, replaces_id])
+        ballots_changed = ballots_changed or (
+            not group_type
+            and current_status
+            in (
+                ModerationStatuses.approved.value,
+                ModerationStatuses.deleted.value,
+            )
+        )
+    SerializedElection.objects.schedule_refresh(refresh_ids)
+    if push_event and ballots_changed:
+        queue_event(
+            detail={"description": description},
+            detail_type="elections_set_changed",
+        )
+
+
+@transaction.atomic
+def update_elections(
+    elections, description="Elections updated", push_event=True, **values
+):
+    """
+    Set `values` (which may be expressions) on every election in the
+    `elections` QuerySet. Returns the number of elections updated.
+    """
+    check_fields(set(values))
+    election_ids = list(elections.values_list("pk", flat=True))
+    if not election_ids:
+        return 0
+    rows = Election.private_objects.filter(pk__in=election_ids).update(**values)
+    elections_changed(election_ids, description, push_event)
+    return rows
+
+
+@transaction.atomic
+def bulk_update_elections(
+    elections,
+    fields,
+    description="Elections updated",
+    push_event=True,
+    batch_size=1000,
+):
+    """
+    Write `fields` from each of the `elections` instances, which can each
+    have different values. Returns the number of elections updated.
+    """
+    check_fields(set(fields))
+    elections = list(elections)
+    if not elections:
+        return 0
+    for election in elections:
+        if election.requires_voter_id == "":
+            election.requires_voter_id = None
+    rows = Election.private_objects.bulk_update(
+        elections, fields, batch_size=batch_size
+    )
+    elections_changed(
+        [election.pk for election in elections], description, push_event
+    )
+    return rows
+
+
+@transaction.atomic
+def set_moderation_status(
+    elections,
+    status,
+    user=None,
+    notes="",
+    description="Elections moderated",
+    push_event=True,
+):
+    """
+    Add a ModerationHistory event with `status` to every election in the
+    `elections` QuerySet and move their `current_status` to it.
+    Returns the number of elections whose status changed.
+    """
+    election_ids = list(elections.values_list("pk", flat=True))
+    if not election_ids:
+        return 0
+    ModerationHistory.objects.bulk_create(
+        ModerationHistory(
+            election_id=pk, status_id=status, user=user, notes=notes[:255]
+        )
+        for pk in election_ids
+    )
+    rows = (
+        Election.private_objects.filter(pk__in=election_ids)
+        .exclude(current_status=status)
+        .update(current_status=status)
+    )
+    elections_changed(
+        election_ids, description, push_event and status != DEFAULT_STATUS
+    )
+    return rows
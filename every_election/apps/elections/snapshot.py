@@ -0,0 +1,218 @@
+"""
+Snapshots of the organisations, divisions and elections in an instance,
+for standing up a new replica without replaying the whole history
+through `sync_elections`.
+
+A snapshot is a gzipped file of JSON lines. The first line is a header
+with the snapshot format version and the high-water mark (the `modified`
+time of the latest election). Every other line is one row:
+
+    {"model": "elections.election", "row": [...]}
+
+where `row` holds the values of the columns listed for that model in
+the header. Rows are written with their primary keys, so foreign keys
+between them don't need resolving on the way back in.
+
+Rows are loaded with `bulk_create`, so no signals fire and none of the
+side effects of `save()` happen. The tables derived from them (subdivided
+and simplified geographies, local authority intersections and stored
+API documents) are rebuilt in bulk once everything is loaded.
+"""
+
+import gzip
+import json
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.gis.geos import GEOSGeometry
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Max
+from elections.models import Election, SyncState
+
+SNAPSHOT_VERSION = 2
+
+# In the order they need to be loaded in
+SNAPSHOT_MODELS = (
+    "elections.ElectionType",
+    "elections.ElectionSubType",
+    "elections.ModerationStatus",
+    "elections.Explanation",
+    "elections.MetaData",
+    "organisations.Organisation",
+    "organisations.OrganisationGeography",
+    "elections.ElectedRole",
+    "organisations.OrganisationDivisionSet",
+    "organisations.OrganisationDivision",
+    "organisations.DivisionGeography",
+    "elections.Election",
+    "elections.ModerationHistory",
+)
+
+# Columns that point at things that aren't in a snapshot
+EXCLUDED_COLUMNS = {
+    "elections.election": {
+        "notice_id",
+        "cancellation_notice_id",
+        "snooped_election_id",
+    },
+    # users aren't in a snapshot either
+    "elections.moderationhistory": {"user_id"},
+}
+
+
+class SnapshotError(ValueError): ...
+
+
+class SnapshotEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        if isinstance(o, GEOSGeometry):
+            return o.hexewkb.decode()
+        return super().default(o)
+
+
+def get_snapshot_columns(model):
+    excluded = EXCLUDED_COLUMNS.get(model._meta.label_lower, set())
+    return [
+        field.attname
+        for field in model._meta.concrete_fields
+        if field.attname not in excluded
+    ]
+
+
+def export_snapshot(path, chunk_size=2000):
+    """
+    Write a snapshot of this instance to `path`.
+    Returns the number of rows written for each model.
+    """
+    models = [apps.get_model(label) for label in SNAPSHOT_MODELS]
+    counts = {}
+    outermost = not connection.in_atomic_block
+    with transaction.atomic(), gzip.open(path, "wt", encoding="utf8") as f:
+        if outermost:
+            # Read every table as of the same moment, so that nothing in
+            # the snapshot refers to a row that was added part way through
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY"
+                )
+        high_water_mark = Election.private_objects.aggregate(
+            modified=Max("modified")
+        )["modified"]
+        header = {
+            "version": SNAPSHOT_VERSION,
+            "high_water_mark": high_water_mark,
+            "columns": {
+                model._meta.label_lower: get_snapshot_columns(model)
+                for model in models
+            },
+        }
+        f.write(json.dumps(header, cls=SnapshotEncoder) + "\n")
+        for model in models:
+            label = model._meta.label_lower
+            columns = header["columns"][label]
+            counts[label] = 0
+            rows = (
+                model._base_manager.order_by("pk")
+                .values_list(*columns)
+                .iterator(chunk_size=chunk_size)
+            )
+            for row in rows:
+                f.write(
+                    json.dumps(
+                        {"model": label, "row": row}, cls=SnapshotEncoder
+                    )
+                    + "\n"
+                )
+                counts[label] += 1
+    return counts
+
+
+def read_snapshot(path):
+    """
+    Yield the header of the snapshot at `path` and then each of its rows
+    as a (model label, dict of column values) pair.
+    """
+    with gzip.open(path, "rt", encoding="utf8") as f:
+        header = json.loads(next(f))
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise SnapshotError(
+                f"Unsupported snapshot version {header.get('version')}"
+            )
+        yield header
+        for line in f:
+            line = json.loads(line)
+            columns = header["columns"][line["model"]]
+            yield line["model"], dict(zip(columns, line["row"]))
+
+
+def import_snapshot(path, batch_size=2000, stdout=None):
+    """
+    Load the snapshot at `path` into an empty database and point
+    `sync_elections` at its high-water mark.
+    Returns the number of rows loaded for each model.
+    """
+    if (
+        Election.private_objects.exists()
+        or apps.get_model("organisations.Organisation").objects.exists()
+    ):
+        raise SnapshotError(
+            "Snapshots can only be loaded into an empty database"
+        )
+
+    rows = read_snapshot(path)
+    header = next(rows)
+    models = {
+        label: apps.get_model(label)
+        for label in (label.lower() for label in SNAPSHOT_MODELS)
+    }
+    counts = dict.fromkeys(models, 0)
+
+    def flush(label, batch):
+        models[label]._base_manager.bulk_create(batch, batch_size=batch_size)
+        counts[label] += len(batch)
+        if stdout:
+            stdout.write(f"{label}: {counts[label]}")
+
+    with transaction.atomic():
+        # Lookup tables like ElectionType and ModerationStatus are seeded by
+        # migrations, maybe with different primary keys to the snapshot
+        for model in reversed(list(models.values())):
+            model._base_manager.all().delete()
+
+        batch_label, batch = None, []
+        for label, values in rows:
+            if label != batch_label or len(batch) >= batch_size:
+                if batch:
+                    flush(batch_label, batch)
+                batch_label, batch = label, []
+            instance = models[label](**values)
+            # Keep the modified times from the snapshot
+            instance.update_modified = False
+            batch.append(instance)
+        if batch:
+            flush(batch_label, batch)
+
+        # We've written the primary keys, so move the sequences past them
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), list(models.values())
+            ):
+                cursor.execute(sql)
+
+        if header["high_water_mark"]:
+            SyncState.objects.update_or_create(
+                upstream_url=settings.UPSTREAM_SYNC_URL,
+                defaults={
+                    "next_url": None,
+                    "high_water_mark": header["high_water_mark"],
+                },
+            )
+
+    call_command("populate_subdivided_tables", stdout=stdout)
+    call_command("populate_simplified_tables", stdout=stdout)
+    call_command("rebuild_local_authority_intersections", stdout=stdout)
+    call_command("refresh_serialized_elections", all=True, stdout=stdout)
+    return counts
@@ -1,26 +1,40 @@
 import datetime
 import hashlib
+import json
 import sys
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from graphlib import TopologicalSorter
 from typing import Optional
-from urllib.parse import urljoin
+from urllib.parse import urlencode, urljoin
 
 import requests
 from dateutil.parser import parse
 from django.conf import settings
+from django.db import transaction
 from elections.models import (
+    GEOGRAPHY_SOURCE_FIELDS,
     ElectedRole,
     Election,
+    ElectionChange,
     ElectionSubType,
     ElectionType,
     Explanation,
+    LocalAuthorityIntersection,
     MetaData,
+    ModerationHistory,
+    ModerationStatuses,
+    SerializedElection,
+    SyncState,
 )
 from organisations.models import (
     Organisation,
     OrganisationDivision,
     OrganisationDivisionSet,
 )
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 class ParentDoesNotExist(ValueError): ...
@@ -29,14 +43,70 @@ class ParentDoesNotExist(ValueError): ...
 class ReplacementDoesNotExist(ValueError): ...
 
 
+def get_sync_session():
+    """
+    A pooled session that retries failed GETs with exponential backoff,
+    so a single 502 from upstream doesn't abort a long import.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=settings.SYNC_MAX_RETRIES,
+        backoff_factor=settings.SYNC_RETRY_BACKOFF,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class LRUCache(OrderedDict):
+    """
+    A dict that forgets the least recently used keys once it holds more
+    than `maxsize`.
+    """
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
 class ElectionSyncer:
-    def __init__(self, since=None, stdout=None, stderr=None):
+    def __init__(
+        self,
+        since=None,
+        stdout=None,
+        stderr=None,
+        bulk=False,
+        session=None,
+        force=False,
+    ):
         self.since = since
+        self.bulk = bulk
+        self.force = force
+        self.session = session or get_sync_session()
         self.stdout = stdout or sys.stdout
         self.stderr = stderr or sys.stderr
         self.ELECTION_SUBTYPE_CACHE = {}
         self.ELECTED_ROLE_CACHE = {}
         self.ELECTION_TYPE_CACHE = {}
+        self.ORGANISATION_CACHE = LRUCache(settings.SYNC_CACHE_SIZE)
+        self.DIVISION_CACHE = LRUCache(settings.SYNC_CACHE_SIZE)
+        self.EXPLANATION_CACHE = LRUCache(settings.SYNC_CACHE_SIZE)
+        self.METADATA_CACHE = LRUCache(settings.SYNC_CACHE_SIZE)
 
     def add_single_election(self, result: dict):
         try:
@@ -65,46 +135,26 @@ class ElectionSyncer:
             if key == "organisation" and value:
                 continue
             if key == "division" and value:
-                try:
-                    divisionset = OrganisationDivisionSet.objects.get(
-                        organisation=election_model.organisation,
-                        start_date=value["divisionset"]["start_date"],
+                division_key = (
+                    election_model.organisation.pk,
+                    value["divisionset"]["start_date"],
+                    value["official_identifier"],
+                )
+                division = self.get_divisions({division_key}).get(division_key)
+                if division:
+                    divisionset = division.divisionset
+                    election_model.division = division
+                else:
+                    divisionset = self.get_divisionset_for_division(
+                        election_model, value
                     )
-                except OrganisationDivisionSet.DoesNotExist:
-                    # In some case we might have changed the start date
-                    # for an existing divisionset. This is rare, but one
-                    # high profile example is the unknown divisionset start date
-                    # of the 2024/2025 general election.
-                    # We can manage this by looking for the short_title
-                    try:
-                        divisionset = OrganisationDivisionSet.objects.filter(
-                            organisation=election_model.organisation,
-                            short_title=value["divisionset"]["short_title"],
-                        ).get()
-                    except OrganisationDivisionSet.DoesNotExist:
-                        raise
-                    # We have a new divisionset with a new start_date, so we
-                    # need to set the end date of the old divisionset
-                    # before updating this ones start_date
-                    previous_divisionset = (
-                        OrganisationDivisionSet.objects.filter(
-                            organisation=election_model.organisation
-                        )
-                        .filter_by_date(election_model.poll_open_date)
-                        .get()
+                    election_model.division = OrganisationDivision.objects.get(
+                        official_identifier=value["official_identifier"],
+                        divisionset__start_date=value["divisionset"][
+                            "start_date"
+                        ],
+                        divisionset__organisation=election_model.organisation,
                     )
-                    previous_divisionset.end_date = parse(
-                        value["divisionset"]["start_date"]
-                    ) - timedelta(days=1)
-                    previous_divisionset.save()
-                    divisionset.start_date = value["divisionset"]["start_date"]
-                    divisionset.save()
-
-                election_model.division = OrganisationDivision.objects.get(
-                    official_identifier=value["official_identifier"],
-                    divisionset__start_date=value["divisionset"]["start_date"],
-                    divisionset__organisation=election_model.organisation,
-                )
 
                 if (
                     not divisionset.end_date
@@ -159,32 +209,10 @@ class ElectionSyncer:
                 election_model.replaces = replaces_election
                 continue
             if key == "explanation" and value:
-                """
-                Because we don't expose the explanation description in the API we're not going to know if one already
-                exists exact by looking at the value. If the value doesn't exist, we need to create a new Explanation
-                model, so we just make up a name to show that it's been imported. The name is the hash of the value to
-                ensure we link imported explanations to unique values.
-
-                """
-                try:
-                    explanation = Explanation.objects.filter(
-                        explanation=value
-                    ).first()
-                except Explanation.DoesNotExist:
-                    explanation_hash = int(
-                        hashlib.sha1(value.encode("utf-8")).hexdigest(), 16
-                    ) % (10**8)
-                    explanation = Explanation.objects.create(
-                        explanation=value,
-                        description=f"Imported explanation {explanation_hash}",
-                    )
-                election_model.explanation = explanation
+                election_model.explanation = self.get_explanation(value)
                 continue
             if key == "metadata" and value:
-                keys = list(value.keys())
-                election_model.metadata, _ = MetaData.objects.get_or_create(
-                    description=value[keys[0]]["title"], data=value
-                )
+                election_model.metadata = self.get_metadata(value)
                 continue
 
             if key == "election_subtype" and value:
@@ -196,10 +224,112 @@ class ElectionSyncer:
             setattr(election_model, key, value)
 
         election_model.modified = result["modified"]
+        election_model.sync_hash = self.get_payload_hash(result)
         election_model.save(
             push_event=False, update_modified=False, status="Approved"
         )
 
+    def get_divisionset_for_division(
+        self, election_model: Election, value: dict
+    ) -> OrganisationDivisionSet:
+        """
+        Find the division set for a division we don't already have under
+        the start date in `value`.
+        """
+        try:
+            divisionset = OrganisationDivisionSet.objects.get(
+                organisation=election_model.organisation,
+                start_date=value["divisionset"]["start_date"],
+            )
+        except OrganisationDivisionSet.DoesNotExist:
+            # In some case we might have changed the start date
+            # for an existing divisionset. This is rare, but one
+            # high profile example is the unknown divisionset start date
+            # of the 2024/2025 general election.
+            # We can manage this by looking for the short_title
+            try:
+                divisionset = OrganisationDivisionSet.objects.filter(
+                    organisation=election_model.organisation,
+                    short_title=value["divisionset"]["short_title"],
+                ).get()
+            except OrganisationDivisionSet.DoesNotExist:
+                raise
+            # We have a new divisionset with a new start_date, so we
+            # need to set the end date of the old divisionset
+            # before updating this ones start_date
+            previous_divisionset = (
+                OrganisationDivisionSet.objects.filter(
+                    organisation=election_model.organisation
+                )
+                .filter_by_date(election_model.poll_open_date)
+                .get()
+            )
+            previous_divisionset.end_date = parse(
+                value["divisionset"]["start_date"]
+            ) - timedelta(days=1)
+            previous_divisionset.save()
+            divisionset.start_date = value["divisionset"]["start_date"]
+            divisionset.save()
+            # Cached divisions are keyed by their division set's start date
+            self.DIVISION_CACHE.clear()
+        return divisionset
+
+    def get_explanations(self, values: list) -> None:
+        """
+        Load the explanations with any of the texts in `values` that aren't
+        already cached into EXPLANATION_CACHE, keyed by their hash.
+        """
+        missing = {Explanation.get_hash(value) for value in values} - set(
+            self.EXPLANATION_CACHE
+        )
+        if missing:
+            for explanation in Explanation.objects.filter(
+                explanation_hash__in=missing
+            ):
+                self.EXPLANATION_CACHE[explanation.explanation_hash] = (
+                    explanation
+                )
+
+    def get_explanation(self, value: str):
+        """
+        Because we don't expose the explanation description in the API we're not going to know if one already
+        exists exact by looking at the value. If the value doesn't exist, we need to create a new Explanation
+        model, so we just make up a name to show that it's been imported. The name is the hash of the value to
+        ensure we link imported explanations to unique values.
+
+        """
+        key = Explanation.get_hash(value)
+        self.get_explanations([value])
+        if key not in self.EXPLANATION_CACHE:
+            explanation_hash = int(key, 16) % (10**8)
+            self.EXPLANATION_CACHE[key] = Explanation.objects.create(
+                explanation=value,
+                description=f"Imported explanation {explanation_hash}",
+            )
+        return self.EXPLANATION_CACHE[key]
+
+    def get_metadatas(self, values: list) -> None:
+        """
+        Load the metadata matching any of `values` that isn't already
+        cached into METADATA_CACHE, keyed by its hash.
+        """
+        missing = {MetaData.get_hash(value) for value in values} - set(
+            self.METADATA_CACHE
+        )
+        if missing:
+            for metadata in MetaData.objects.filter(data_hash__in=missing):
+                self.METADATA_CACHE[metadata.data_hash] = metadata
+
+    def get_metadata(self, value: dict):
+        key = MetaData.get_hash(value)
+        self.get_metadatas([value])
+        if key not in self.METADATA_CACHE:
+            keys = list(value.keys())
+            self.METADATA_CACHE[key] = MetaData.objects.create(
+                description=value[keys[0]]["title"], data=value
+            )
+        return self.METADATA_CACHE[key]
+
     def get_election_type(self, election_type: str):
         if not self.ELECTION_TYPE_CACHE:
             # Populate the entire cache if it's empty
@@ -221,14 +351,15 @@ class ElectionSyncer:
         return self.ELECTED_ROLE_CACHE[elected_role]
 
     def get_organisation(self, organisation_dict: dict):
-        organisation = Organisation.objects.get(
-            official_identifier=organisation_dict["official_identifier"],
-            start_date=organisation_dict["start_date"],
+        key = (
+            organisation_dict["official_identifier"],
+            organisation_dict["start_date"],
         )
-        if organisation.end_date != organisation_dict["end_date"]:
-            # update the end date when we see that it's changed
-            organisation.end_date = organisation_dict["end_date"]
-            organisation.save()
+        organisation = self.get_organisations([organisation_dict]).get(key)
+        if not organisation:
+            raise Organisation.DoesNotExist(
+                f"Can't find organisation {key[0]} starting {key[1]}"
+            )
         return organisation
 
     def get_election_subtype(self, election_type: str, election_subtype: str):
@@ -250,6 +381,441 @@ class ElectionSyncer:
                 ] = election_subtype_model
         return self.ELECTION_SUBTYPE_CACHE[election_type][election_subtype]
 
+    def get_organisations(self, organisation_dicts: list) -> dict:
+        """
+        Returns the organisations that exist for a list of organisation
+        dicts from the API, keyed by (official_identifier, start_date).
+        Organisations that aren't in ORGANISATION_CACHE are looked up in one
+        query.
+        """
+        organisation_dicts = {
+            (org["official_identifier"], org["start_date"]): org
+            for org in organisation_dicts
+        }
+        missing = [
+            key
+            for key in organisation_dicts
+            if key not in self.ORGANISATION_CACHE
+        ]
+        if missing:
+            for organisation in Organisation.objects.filter(
+                official_identifier__in={key[0] for key in missing},
+                start_date__in={key[1] for key in missing},
+            ).prefetch_related("geographies"):
+                key = (
+                    organisation.official_identifier,
+                    organisation.start_date.isoformat(),
+                )
+                if key in organisation_dicts:
+                    self.ORGANISATION_CACHE[key] = organisation
+
+        organisations = {}
+        for key, organisation_dict in organisation_dicts.items():
+            if key not in self.ORGANISATION_CACHE:
+                continue
+            organisation = self.ORGANISATION_CACHE[key]
+            end_date = organisation_dict["end_date"]
+            current_end_date = (
+                organisation.end_date.isoformat()
+                if organisation.end_date
+                else None
+            )
+            if current_end_date != end_date:
+                # update the end date when we see that it's changed
+                organisation.end_date = (
+                    parse(end_date).date() if end_date else None
+                )
+                organisation.save()
+            organisations[key] = organisation
+        return organisations
+
+    def get_divisions(self, division_keys: set) -> dict:
+        """
+        Returns the divisions that exist for a set of
+        (organisation, divisionset start_date, official_identifier) keyed
+        the same way, with their division set and geography. Divisions
+        that aren't in DIVISION_CACHE are looked up in one query.
+        """
+        missing = {
+            key for key in division_keys if key not in self.DIVISION_CACHE
+        }
+        if missing:
+            divisions = OrganisationDivision.objects.filter(
+                official_identifier__in={key[2] for key in missing},
+                divisionset__organisation__in={key[0] for key in missing},
+            ).select_related("divisionset", "geography")
+            for division in divisions:
+                key = (
+                    division.divisionset.organisation_id,
+                    division.divisionset.start_date.isoformat(),
+                    division.official_identifier,
+                )
+                if key in missing:
+                    self.DIVISION_CACHE[key] = division
+        return {
+            key: self.DIVISION_CACHE[key]
+            for key in division_keys
+            if key in self.DIVISION_CACHE
+        }
+
+    def preload(self, results: list):
+        """
+        Fill the caches with everything `results` refer to, in a query per
+        model rather than a query per result.
+        """
+        organisation_dicts = [
+            result["organisation"]
+            for result in results
+            if result.get("group_type") != "election"
+            and result.get("organisation")
+        ]
+        organisations = self.get_organisations(organisation_dicts)
+        division_keys = set()
+        for result in results:
+            division = result.get("division")
+            organisation = result.get("organisation")
+            if not division or not organisation:
+                continue
+            organisation = organisations.get(
+                (
+                    organisation["official_identifier"],
+                    organisation["start_date"],
+                )
+            )
+            if organisation:
+                division_keys.add(
+                    (
+                        organisation.pk,
+                        division["divisionset"]["start_date"],
+                        division["official_identifier"],
+                    )
+                )
+        self.get_divisions(division_keys)
+        self.get_explanations(
+            [
+                result["explanation"]
+                for result in results
+                if result.get("explanation")
+            ]
+        )
+        self.get_metadatas(
+            [result["metadata"] for result in results if result.get("metadata")]
+        )
+
+    def add_elections(self, results: list) -> list:
+        """
+        Bulk version of `add_single_election` for a list of results that
+        don't depend on each other (i.e. no result is the parent of, or
+        replaced by, another one in the list).
+
+        Related objects are looked up in a few batched queries and the
+        elections and their moderation history are written with one
+        `bulk_create` each, rather than a `save()` per election.
+
+        Anything we can't resolve here (missing parents, replacements,
+        divisions or organisations, division sets that have changed their
+        start date etc) is returned so that it can go through
+        `process_result`, which knows how to deal with those cases.
+        """
+        organisations = self.get_organisations(
+            [
+                result["organisation"]
+                for result in results
+                if result.get("group_type") != "election"
+                and result.get("organisation")
+            ]
+        )
+
+        def get_result_organisation(result):
+            organisation = result.get("organisation")
+            if result.get("group_type") == "election" or not organisation:
+                return None
+            return organisations.get(
+                (
+                    organisation["official_identifier"],
+                    organisation["start_date"],
+                )
+            )
+
+        def get_division_key(result):
+            organisation = get_result_organisation(result)
+            return (
+                organisation.pk if organisation else None,
+                result["division"]["divisionset"]["start_date"],
+                result["division"]["official_identifier"],
+            )
+
+        divisions = self.get_divisions(
+            {
+                get_division_key(result)
+                for result in results
+                if result.get("division")
+            }
+        )
+
+        election_ids = {result["election_id"] for result in results}
+        referenced_ids = {
+            result[key]
+            for result in results
+            for key in ("group", "replaces")
+            if result.get(key)
+        }
+        known_elections = {
+            election["election_id"]: election
+            for election in Election.private_objects.filter(
+                election_id__in=election_ids | referenced_ids
+            ).values(
+                "pk",
+                "election_id",
+                "division_geography_id",
+                "organisation_geography_id",
+                "current_status",
+                "path",
+                *GEOGRAPHY_SOURCE_FIELDS,
+            )
+        }
+
+        concrete_fields = {
+            field.name for field in Election._meta.concrete_fields
+        }
+        leftovers = []
+        elections = []
+        for result in results:
+            try:
+                election, fields = self.build_election(
+                    result,
+                    get_result_organisation(result),
+                    divisions.get(get_division_key(result))
+                    if result.get("division")
+                    else None,
+                    known_elections,
+                    concrete_fields,
+                )
+            except (
+                Organisation.DoesNotExist,
+                OrganisationDivision.DoesNotExist,
+                ParentDoesNotExist,
+                ReplacementDoesNotExist,
+                ValueError,
+            ):
+                leftovers.append(result)
+                continue
+            elections.append((election, fields))
+
+        self.write_elections(elections, known_elections)
+        return leftovers
+
+    def build_election(
+        self, result, organisation, division, known_elections, concrete_fields
+    ):
+        """
+        Build an unsaved Election from `result` as `add_single_election`
+        would, using related objects that have already been looked up.
+        Returns the election and the fields that should be written.
+        """
+        election = Election(election_id=result["election_id"])
+        fields = {"current_status", "modified"}
+        existing = known_elections.get(result["election_id"])
+        if existing:
+            election.pk = existing["pk"]
+
+        if result.get("group_type") != "election":
+            if not organisation:
+                raise Organisation.DoesNotExist()
+            election.organisation = organisation
+            fields.add("organisation")
+
+        for key, value in result.items():
+            if key == "poll_open_date":
+                election.poll_open_date = parse(value).date()
+            elif key == "election_type":
+                election.election_type = self.get_election_type(
+                    value["election_type"]
+                )
+            elif key == "organisation" and value:
+                continue
+            elif key == "division" and value:
+                if not division:
+                    # This might be a division set that has changed its
+                    # start date, which add_single_election can deal with
+                    raise OrganisationDivision.DoesNotExist()
+                divisionset = division.divisionset
+                end_date = value["divisionset"]["end_date"]
+                if (not divisionset.end_date and end_date) or (
+                    divisionset.end_date
+                    and divisionset.end_date.isoformat() != end_date
+                ):
+                    divisionset.end_date = end_date
+                    divisionset.save()
+                election.division = division
+            elif key == "elected_role" and value:
+                election.elected_role = self.get_elected_role(value)
+            elif key == "group" and value:
+                if value not in known_elections:
+                    raise ParentDoesNotExist(f"Can't find {value}")
+                election.group_id = known_elections[value]["pk"]
+            elif key == "replaces" and value:
+                if result["group_type"]:
+                    # "replaces" is never valid for a group type
+                    continue
+                if value not in known_elections:
+                    raise ReplacementDoesNotExist(
+                        f"Can't find replacement {value}"
+                    )
+                election.replaces_id = known_elections[value]["pk"]
+            elif key == "explanation" and value:
+                election.explanation = self.get_explanation(value)
+            elif key == "metadata" and value:
+                election.metadata = self.get_metadata(value)
+            elif key == "election_subtype" and value:
+                # add_single_election looks this up but doesn't set it
+                self.get_election_subtype(
+                    election.election_type, value["election_subtype"]
+                )
+                continue
+            elif key == "identifier_type":
+                key = "group_type"
+                election.group_type = None if value == "ballot" else value
+            elif key == "voting_system" and value:
+                election.voting_system = value["slug"]
+            elif key in concrete_fields:
+                setattr(election, key, value)
+            else:
+                continue
+            fields.add(key)
+
+        if election.requires_voter_id == "":
+            election.requires_voter_id = None
+        if existing and all(
+            existing[field] == getattr(election, field)
+            for field in GEOGRAPHY_SOURCE_FIELDS
+        ):
+            # nothing the geographies come from has changed, so keep them
+            election.division_geography_id = existing["division_geography_id"]
+            election.organisation_geography_id = existing[
+                "organisation_geography_id"
+            ]
+        if not election.division_geography_id:
+            election.division_geography = election.get_division_geography()
+            fields.add("division_geography")
+        if not election.organisation_geography_id:
+            election.organisation_geography = (
+                election.get_organisation_geography()
+            )
+            fields.add("organisation_geography")
+
+        election.current_status = ModerationStatuses.approved.value
+        election.modified = result["modified"]
+        election.sync_hash = self.get_payload_hash(result)
+        fields.add("sync_hash")
+        election.path = Election.get_path_label(election.election_id)
+        if election.group_id:
+            parent_path = known_elections[result["group"]]["path"]
+            if not parent_path:
+                raise ParentDoesNotExist(f"{result['group']} has no path")
+            election.path = f"{parent_path}.{election.path}"
+        fields.add("path")
+        # Keep the modified timestamp from the API
+        election.update_modified = False
+        return election, (fields & concrete_fields) - {"election_id"}
+
+    def write_elections(self, elections, known_elections):
+        """
+        Upsert the elections built by `build_election` and do the work that
+        `Election.save()` and `ModerationHistory.save()` would have done.
+        """
+        if not elections:
+            return
+
+        with transaction.atomic():
+            # bulk_create updates the same fields on every row, so group
+            # elections by the fields their results had
+            by_fields = defaultdict(list)
+            for election, fields in elections:
+                by_fields[frozenset(fields)].append(election)
+            for fields, batch in by_fields.items():
+                Election.private_objects.bulk_create(
+                    batch,
+                    update_conflicts=True,
+                    unique_fields=["election_id"],
+                    update_fields=sorted(fields),
+                )
+
+            elections = [election for election, _ in elections]
+            ModerationHistory.objects.bulk_create(
+                [
+                    ModerationHistory(
+                        election_id=election.pk,
+                        status_id=ModerationStatuses.approved.value,
+                    )
+                    for election in elections
+                    if known_elections.get(election.election_id, {}).get(
+                        "current_status"
+                    )
+                    != ModerationStatuses.approved.value
+                ]
+            )
+
+            ElectionChange.objects.record(
+                [election.pk for election in elections]
+            )
+
+            # bulk_create skips save(), so catch the rollups up in one go
+            Election.private_objects.refresh_rollups(
+                [election.path for election in elections]
+                + [
+                    known_elections.get(election.election_id, {}).get("path")
+                    for election in elections
+                ]
+            )
+
+            changed_geography = []
+            refresh_ids = set()
+            for election in elections:
+                existing = known_elections.get(election.election_id)
+                refresh_ids.update(
+                    [election.pk, election.group_id, election.replaces_id]
+                )
+                if not existing or (
+                    existing["division_geography_id"],
+                    existing["organisation_geography_id"],
+                ) != (
+                    election.division_geography_id,
+                    election.organisation_geography_id,
+                ):
+                    changed_geography.append(election.pk)
+                # Election.save() moves the modified time of a group's
+                # ballots on when its election ID changes, but we match
+                # groups on their election ID so it never does here
+
+            if changed_geography:
+                LocalAuthorityIntersection.objects.refresh_for_elections(
+                    changed_geography
+                )
+            SerializedElection.objects.schedule_refresh(refresh_ids)
+
+    def process_page(self, results: list):
+        """
+        Add a page of results with `add_elections`, one level of the
+        election ID hierarchy at a time so that parents are written before
+        their children.
+        """
+        levels = defaultdict(list)
+        for result in results:
+            levels[result["election_id"].count(".")].append(result)
+        for depth in sorted(levels):
+            # replacements are at the same level as the ballot they replace
+            # so leave those for process_result
+            level_ids = {result["election_id"] for result in levels[depth]}
+            independent, dependent = [], []
+            for result in levels[depth]:
+                if result.get("replaces") in level_ids:
+                    dependent.append(result)
+                else:
+                    independent.append(result)
+            for result in self.add_elections(independent) + dependent:
+                self.process_result(result)
+
     def process_result(self, result: dict):
         try:
             self.add_single_election(result)
@@ -267,24 +833,30 @@ class ElectionSyncer:
                 f"Missing parent ({e}), importing directly before continuing"
             )
             url = urljoin(self.url, result["group"])
-            parent_req = requests.get(url)
-            self.process_result(parent_req.json())
+            self.process_result(self.fetch_json(url))
             self.process_result(result)
         except ReplacementDoesNotExist as e:
             self.stderr.write(
                 f"Missing replacement election for ({e}), importing directly before continuing"
             )
-            replacement_req = requests.get(
-                urljoin(self.url, result["replaces"])
+            self.process_result(
+                self.fetch_json(urljoin(self.url, result["replaces"]))
             )
-            self.process_result(replacement_req.json())
             self.process_result(result)
 
     def get_last_modified(
-        self, since: Optional[datetime.datetime] = None
+        self,
+        since: Optional[datetime.datetime] = None,
+        state: Optional[SyncState] = None,
     ) -> datetime.datetime:
         if since:
             return since
+        if state and state.high_water_mark:
+            return (
+                state.high_water_mark
+                - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+            ).replace(tzinfo=None)
+        # We've never finished a run, so guess from the data we've got
         try:
             last_modified = (
                 Election.private_objects.latest().modified
@@ -295,20 +867,171 @@ class ElectionSyncer:
 
         return last_modified.replace(tzinfo=None)
 
+    def get_start_url(self, state: SyncState) -> str:
+        """
+        Resume an unfinished run, unless we've been asked to start from a
+        particular time.
+        """
+        if state.in_progress and not self.since:
+            self.stdout.write(f"Resuming import after {state.run_pages} pages")
+            return state.next_url
+        last_modified = self.get_last_modified(self.since, state)
+        self.stdout.write(f"Starting import for {last_modified}")
+        params = {"modified": last_modified.isoformat()}
+        if settings.SYNC_UPSTREAM_CURSOR:
+            # ask for keyset pagination ordered by modified, so the next
+            # links stay valid while upstream is being edited
+            params["cursor"] = ""
+        query = urlencode(params)
+        url = f"{settings.UPSTREAM_SYNC_URL}?{query}"
+        state.start_run(url)
+        return url
+
+    def fetch_json(self, url: str) -> dict:
+        resp = self.session.get(url, timeout=settings.SYNC_REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        return resp.json()
+
+    def iter_pages(self, url: str):
+        """
+        Yield (url, page) for each page of results starting at `url`.
+
+        The URL of the next page is only known once we have the current
+        one, so we can't fetch more than a page ahead. That's enough to hide
+        the request time: the next page is downloaded in the background
+        while the caller writes the current one to the database.
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self.fetch_json, url)
+            while future:
+                page = future.result()
+                next_url = page.get("next")
+                future = (
+                    executor.submit(self.fetch_json, next_url)
+                    if next_url
+                    else None
+                )
+                yield url, page
+                url = next_url
+
+    def get_payload_hash(self, result: dict) -> str:
+        # `current` is calculated relative to the day it was served, so it
+        # changes without the election changing
+        payload = {
+            key: value for key, value in result.items() if key != "current"
+        }
+        return hashlib.sha1(
+            json.dumps(payload, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def filter_unchanged(self, results: list) -> list:
+        """
+        Drop the results that we imported last time we saw them, without
+        touching the rows for them.
+        """
+        if self.force:
+            return results
+        hashes = dict(
+            Election.private_objects.filter(
+                election_id__in=[result["election_id"] for result in results]
+            ).values_list("election_id", "sync_hash")
+        )
+        return [
+            result
+            for result in results
+            if hashes.get(result["election_id"])
+            != self.get_payload_hash(result)
+        ]
+
+    def get_missing_dependencies(self, results: list) -> set:
+        """
+        IDs of the groups and replaced elections that `results` refer to
+        but that aren't in `results` or the database.
+        """
+        result_ids = {result["election_id"] for result in results}
+        wanted = {
+            result.get(key)
+            for result in results
+            for key in ("group", "replaces")
+        } - result_ids
+        wanted.discard(None)
+        existing = Election.private_objects.filter(
+            election_id__in=wanted
+        ).values_list("election_id", flat=True)
+        return wanted - set(existing)
+
+    def fetch_missing_dependencies(self, results: list) -> list:
+        """
+        Fetch everything `results` depend on that we don't have yet,
+        concurrently and one generation of ancestors at a time.
+        """
+        fetched, requested = [], set()
+        with ThreadPoolExecutor(
+            max_workers=settings.SYNC_FETCH_WORKERS
+        ) as executor:
+            while missing := (
+                self.get_missing_dependencies(results + fetched) - requested
+            ):
+                self.stdout.write(
+                    f"Fetching {len(missing)} missing parents and replacements"
+                )
+                requested |= missing
+                fetched += executor.map(
+                    lambda election_id: self.fetch_json(
+                        urljoin(self.url, election_id)
+                    ),
+                    sorted(missing),
+                )
+        return fetched
+
+    def order_results(self, results: list) -> list:
+        """
+        Sort `results` so that every election comes after its group and
+        the election it replaces.
+        """
+        by_id = {result["election_id"]: result for result in results}
+        sorter = TopologicalSorter()
+        for election_id, result in by_id.items():
+            sorter.add(
+                election_id,
+                *(
+                    result[key]
+                    for key in ("group", "replaces")
+                    if result.get(key) in by_id
+                ),
+            )
+        return [by_id[election_id] for election_id in sorter.static_order()]
+
     def run_import(self):
-        self.url = settings.UPSTREAM_SYNC_URL
-        last_modified = self.get_last_modified(self.since)
-        self.url = f"{self.url}?modified={last_modified}"
-        self.stdout.write(self.url)
-        while self.url:
-            self.stdout.write(f"Starting import for {last_modified}")
-            req = requests.get(self.url)
-            req.raise_for_status()
-            resp_json = req.json()
-            unordered_results = resp_json["results"]
-            results = sorted(
-                unordered_results, key=lambda d: d["election_id"].count(".")
+        state, _ = SyncState.objects.get_or_create(
+            upstream_url=settings.UPSTREAM_SYNC_URL
+        )
+        start_url = self.get_start_url(state)
+        self.stdout.write(start_url)
+        for url, resp_json in self.iter_pages(start_url):
+            # relative URLs for missing parents and replacements are
+            # resolved against the page they were found on
+            self.url = url
+            page_results = resp_json["results"]
+            changed_results = self.filter_unchanged(page_results)
+            results = self.order_results(
+                changed_results
+                + self.fetch_missing_dependencies(changed_results)
             )
-            for result in results:
-                self.process_result(result)
-            self.url = resp_json.get("next", None)
+            with transaction.atomic():
+                self.preload(results)
+                if self.bulk:
+                    self.process_page(results)
+                else:
+                    for result in results:
+                        self.process_result(result)
+                state.record_page(
+                    resp_json.get("next"),
+                    [parse(result["modified"]) for result in page_results],
+                    unchanged=len(page_results) - len(changed_results),
+                )
+        self.stdout.write(
+            f"Imported {state.run_results} elections "
+            f"from {state.run_pages} pages, "
+            f"skipped {state.run_unchanged} unchanged"
+        )
@@ -3,7 +3,7 @@ from unittest.mock import MagicMock, patch
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from elections import admin
-from elections.models import ModerationHistory, ModerationStatuses
+from elections.models import Election, ModerationHistory, ModerationStatuses
 from elections.tests.factories import ElectionFactory
 
 
@@ -11,8 +11,9 @@ class TestAdminActions(TestCase):
     def test_change_current(self):
         """
         Test that when admin actions to update current flag are
-        called, update is called with the relevant value
+        called, the elections are updated with the relevant value
         """
+        election = ElectionFactory()
         modeladmin = MagicMock()
         request = MagicMock()
         admin_actions = [
@@ -23,23 +24,26 @@ class TestAdminActions(TestCase):
         for admin_action in admin_actions:
             action = admin_action[0]
             is_current = admin_action[1]
-            queryset = MagicMock()
+            queryset = Election.private_objects.filter(pk=election.pk)
             with self.subTest(msg=action.short_description):
                 action(
                     modeladmin=modeladmin, request=request, queryset=queryset
                 )
-                queryset.update.assert_called_once_with(current=is_current)
+                election.refresh_from_db()
+                self.assertEqual(election.current, is_current)
 
     def test_soft_delete(self):
         election_1 = ElectionFactory()
         election_2 = ElectionFactory()
-        queryset = [election_1, election_2]
+        queryset = Election.private_objects.filter(
+            pk__in=[election_1.pk, election_2.pk]
+        )
         user = get_user_model().objects.create(is_superuser=True)
         request = MagicMock(user=user)
 
         with (
-            patch("elections.admin.send_event") as admin_send_event_mock,
-            patch("elections.models.send_event") as model_send_event_mock,
+            patch("elections.mutations.queue_event") as admin_send_event_mock,
+            patch("elections.models.queue_event") as model_send_event_mock,
         ):
             admin.soft_delete(
                 modeladmin=MagicMock(), queryset=queryset, request=request
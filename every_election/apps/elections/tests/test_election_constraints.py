@@ -1,9 +1,15 @@
+from io import StringIO
+
+from dateutil.parser import parse
+from django.core.management import call_command
 from django.test import TestCase
 from elections.constraints import (
+    find_violations,
     has_approved_child,
     has_approved_parents,
     has_related_status,
 )
+from elections.models import Election
 from elections.tests.factories import (
     ElectionFactory,
     ElectionWithStatusFactory,
@@ -74,3 +80,68 @@ class TestElectionModel(TestCase):
             status=ModerationStatusFactory(short_label="Approved"),
         )
         self.assertTrue(has_approved_child(org_group))
+
+
+class TestFindViolations(TestCase):
+    def setUp(self):
+        org_group = ElectionWithStatusFactory(
+            election_id="municipal.org.2017-03-23",
+            group=None,
+            group_type="organisation",
+            moderation_status=related_status("Suggested"),
+        )
+        ElectionWithStatusFactory(
+            election_id="municipal.org.ward.2017-03-23", group=org_group
+        )
+        ElectionFactory(election_id="municipal.lonely.2017-03-23", group=None)
+        ElectionWithStatusFactory(
+            election_id="municipal.empty.2017-03-23",
+            group=None,
+            group_type="organisation",
+        )
+
+    def test_find_violations(self):
+        with self.assertNumQueries(3):
+            violations = [str(v) for v in find_violations()]
+        self.assertEqual(
+            violations,
+            [
+                "Election municipal.empty.2017-03-23 is approved but has no "
+                "approved children",
+                "Election municipal.lonely.2017-03-23 has no related status "
+                "objects",
+                "Election municipal.org.ward.2017-03-23 is approved but one or "
+                "more parents are not approved",
+            ],
+        )
+
+    def test_check_constraints_command(self):
+        stderr = StringIO()
+        with self.assertRaises(SystemExit) as exit:
+            call_command("elections_check_constraints", stderr=stderr)
+        self.assertEqual(exit.exception.code, 1)
+        self.assertEqual(len(stderr.getvalue().splitlines()), 3)
+
+        with self.assertRaises(SystemExit) as exit:
+            call_command(
+                "elections_check_constraints",
+                "--since=2100-01-01",
+                stderr=stderr,
+            )
+        self.assertEqual(exit.exception.code, 0)
+
+        # a change to a group is checked against the elections below it
+        Election.private_objects.update(modified=parse("2000-01-01T00:00Z"))
+        Election.private_objects.filter(
+            election_id="municipal.org.2017-03-23"
+        ).update(modified=parse("2020-01-01T00:00Z"))
+        stderr = StringIO()
+        with self.assertRaises(SystemExit) as exit:
+            call_command(
+                "elections_check_constraints",
+                "--since=2010-01-01",
+                stderr=stderr,
+            )
+        self.assertEqual(exit.exception.code, 1)
+        self.assertIn("municipal.org.ward.2017-03-23", stderr.getvalue())
+        self.assertEqual(len(stderr.getvalue().splitlines()), 1)
@@ -1,8 +1,15 @@
 from datetime import datetime, timedelta
+from unittest.mock import patch
 
 from django.contrib.gis.geos import Point
+from django.db import connection
 from django.test import TestCase
-from elections.models import Election
+from elections.constraints import ViolatedConstraint, check_constraints
+from elections.managers import (
+    GEOGRAPHY_GENERATION_SEQUENCE,
+    get_point_lookup_cache,
+)
+from elections.models import DEFAULT_STATUS, Election, ModerationStatuses
 from elections.tests.factories import (
     ElectionFactory,
     ElectionWithStatusFactory,
@@ -10,6 +17,9 @@ from elections.tests.factories import (
     ModerationStatusFactory,
     related_status,
 )
+from elections.utils import ElectionBuilder
+
+from .base_tests import BaseElectionCreatorMixIn
 
 
 class TestElectionGeoQueries(TestCase):
@@ -24,6 +34,32 @@ class TestElectionGeoQueries(TestCase):
         qs = Election.public_objects.for_point(point)
         assert qs.count() == 1
 
+    def test_election_for_point_is_cached(self):
+        ElectionWithStatusFactory(group=None)
+        point = Point(self.lon, self.lat)
+        assert Election.public_objects.for_point(point).count() == 1
+        # The geography lookup is memoized, so only the count query runs
+        with self.assertNumQueries(1):
+            assert Election.public_objects.for_point(point).count() == 1
+
+    @patch("elections.managers._geography_generation", (None, 0))
+    def test_point_lookup_cache_invalidated_on_geography_save(self):
+        with connection.cursor() as cursor:
+            # as it is after migrating, whatever other tests have done
+            cursor.execute(
+                f"ALTER SEQUENCE {GEOGRAPHY_GENERATION_SEQUENCE} RESTART"
+            )
+        get_point_lookup_cache().clear()
+        election = ElectionWithStatusFactory(group=None)
+        point = Point(self.lon, self.lat)
+        assert Election.public_objects.for_point(point).count() == 1
+
+        geography = election.division_geography
+        geography.geography = "MULTIPOLYGON (((0 0, 0 1, 1 1, 1 0, 0 0)))"
+        with self.captureOnCommitCallbacks(execute=True):
+            geography.save()
+        assert Election.public_objects.for_point(point).count() == 0
+
     def test_election_for_lat_lng(self):
         ElectionWithStatusFactory(group=None)
         qs = Election.public_objects.for_lat_lng(lat=self.lat, lng=self.lon)
@@ -127,3 +163,77 @@ class TestElectionGeoQueries(TestCase):
         )
         self.assertEqual(0, Election.public_objects.count())
         self.assertEqual(2, Election.private_objects.count())
+
+
+class TestBulkIngest(BaseElectionCreatorMixIn, TestCase):
+    def build(self):
+        election_group = ElectionBuilder(
+            "municipal", "2017-06-08"
+        ).build_election_group()
+        org_group = (
+            ElectionBuilder("municipal", "2017-06-08")
+            .with_organisation(self.org1)
+            .build_organisation_group(election_group)
+        )
+        ballots = [
+            ElectionBuilder("municipal", "2017-06-08")
+            .with_organisation(self.org1)
+            .with_division(division)
+            .build_ballot(org_group)
+            for division in [self.org_div_1, self.org_div_2]
+        ]
+        return [election_group, org_group, *ballots]
+
+    def test_bulk_ingest(self):
+        with patch("elections.baker.queue_event") as queue_event:
+            elections = Election.private_objects.bulk_ingest(
+                self.build(), status=ModerationStatuses.approved.value
+            )
+        queue_event.assert_called_once()
+
+        election_group, org_group, ballot, _ = elections
+        self.assertEqual(Election.public_objects.count(), 4)
+        self.assertEqual(ballot.group_id, org_group.pk)
+        self.assertEqual(
+            Election.private_objects.get(pk=ballot.pk).path,
+            ballot.get_path(),
+        )
+        for election in Election.private_objects.all():
+            check_constraints(election)
+            self.assertEqual(
+                list(
+                    election.moderationhistory_set.order_by(
+                        "created"
+                    ).values_list("status_id", flat=True)
+                ),
+                [DEFAULT_STATUS, ModerationStatuses.approved.value],
+            )
+        election_group.refresh_from_db()
+        self.assertEqual(election_group.rollup_ballots, 2)
+
+    def test_bulk_ingest_checks_constraints(self):
+        parent = ElectionBuilder(
+            "municipal", "2017-06-08"
+        ).build_election_group()
+        parent.save()
+        org_group = (
+            ElectionBuilder("municipal", "2017-06-08")
+            .with_organisation(self.org1)
+            .build_organisation_group(parent)
+        )
+        ballot = (
+            ElectionBuilder("municipal", "2017-06-08")
+            .with_organisation(self.org1)
+            .with_division(self.org_div_1)
+            .build_ballot(org_group)
+        )
+
+        # the parent is still only suggested
+        with self.assertRaises(ViolatedConstraint):
+            Election.private_objects.bulk_ingest(
+                [org_group, ballot], status=ModerationStatuses.approved.value
+            )
+        # and a group needs children
+        with self.assertRaises(ViolatedConstraint):
+            Election.private_objects.bulk_ingest([org_group])
+        self.assertEqual(Election.private_objects.count(), 1)
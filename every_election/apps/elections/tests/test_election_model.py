@@ -155,6 +155,13 @@ class TestElectionModel(BaseElectionCreatorMixIn, TestCase):
         self.ballot.seats_contested = 4
         self.ballot.save(status=ModerationStatuses.approved.value)
 
+        for election in [
+            self.election_group,
+            self.testshire_org_group,
+            self.org_group,
+        ]:
+            election.refresh_from_db()
+
         self.assertEqual(self.testshire_ballot.group_seats_contested, 2)
         self.assertEqual(self.testshire_ballot.group_seats_cancelled, 0)
 
@@ -170,6 +177,107 @@ class TestElectionModel(BaseElectionCreatorMixIn, TestCase):
         self.assertEqual(self.election_group.group_seats_contested, 2)
         self.assertEqual(self.election_group.group_seats_cancelled, 4)
 
+    def test_rollups(self):
+        for election in [
+            self.election_group,
+            self.testshire_org_group,
+            self.org_group,
+        ]:
+            election.save(status=ModerationStatuses.approved.value)
+        self.ballot.seats_contested = 3
+        self.ballot.save(status=ModerationStatuses.approved.value)
+        self.testshire_ballot.seats_contested = 2
+        self.testshire_ballot.save(status=ModerationStatuses.approved.value)
+
+        def rollups(election):
+            election.refresh_from_db()
+            return (
+                election.rollup_ballots,
+                election.rollup_cancelled_ballots,
+                election.rollup_seats_contested,
+                election.rollup_seats_cancelled,
+            )
+
+        self.assertEqual(rollups(self.election_group), (2, 0, 5, 0))
+        self.assertEqual(rollups(self.org_group), (1, 0, 3, 0))
+
+        self.ballot.cancelled = True
+        self.ballot.save()
+        self.assertEqual(rollups(self.election_group), (2, 1, 2, 3))
+        self.assertEqual(rollups(self.org_group), (1, 1, 0, 3))
+
+        Election.private_objects.filter(pk=self.ballot.pk).update(
+            seats_contested=1
+        )
+        self.assertEqual(rollups(self.election_group), (2, 1, 2, 1))
+
+        # rejected ballots aren't public so don't count
+        self.testshire_ballot.save(status=ModerationStatuses.rejected.value)
+        self.assertEqual(rollups(self.election_group), (1, 1, 0, 1))
+        self.assertEqual(rollups(self.testshire_org_group), (0, 0, 0, 0))
+
+        self.ballot.refresh_from_db()
+        self.ballot.delete()
+        self.assertEqual(rollups(self.election_group), (0, 0, 0, 0))
+
+        # the rollups are read without any queries
+        with self.assertNumQueries(0):
+            self.assertEqual(self.election_group.group_seats_contested, 0)
+
+    def test_rollups_reparent(self):
+        for election in [
+            self.election_group,
+            self.testshire_org_group,
+            self.org_group,
+        ]:
+            election.save(status=ModerationStatuses.approved.value)
+        self.ballot.seats_contested = 3
+        self.ballot.save(status=ModerationStatuses.approved.value)
+        self.testshire_ballot.seats_contested = 2
+        self.testshire_ballot.save(status=ModerationStatuses.approved.value)
+
+        ballot = Election.private_objects.get(pk=self.ballot.pk)
+        ballot.group = self.testshire_org_group
+        ballot.save()
+
+        def rollups(election):
+            election.refresh_from_db()
+            return (election.rollup_ballots, election.rollup_seats_contested)
+
+        # counted once in its new group, and not at all in its old one
+        self.assertEqual(rollups(self.testshire_org_group), (2, 5))
+        self.assertEqual(rollups(self.org_group), (0, 0))
+        self.assertEqual(rollups(self.election_group), (2, 5))
+
+    def test_changed_fields(self):
+        for election in [self.election_group, self.org_group, self.ballot]:
+            election.save(status=ModerationStatuses.approved.value)
+        org_group = Election.private_objects.get(pk=self.org_group.pk)
+        self.assertEqual(org_group.get_changed_fields(), set())
+
+        org_group.tags["NEW"] = "tag"
+        org_group.source = "somewhere"
+        self.assertEqual(org_group.get_changed_fields(), {"tags", "source"})
+
+        # nothing the ballot shows has changed, so it's left alone
+        ballot_modified = Election.private_objects.get(
+            pk=self.ballot.pk
+        ).modified
+        org_group.save()
+        self.assertEqual(org_group.get_changed_fields(), set())
+        self.assertEqual(
+            Election.private_objects.get(pk=self.ballot.pk).modified,
+            ballot_modified,
+        )
+
+        # but renaming its parent changes its `group`
+        org_group.election_id = "municipal.renamed.2017-06-08"
+        org_group.save()
+        self.assertNotEqual(
+            Election.private_objects.get(pk=self.ballot.pk).modified,
+            ballot_modified,
+        )
+
     def test_get_admin_url(self):
         election = Election(pk=2021)
         self.assertEqual(
@@ -271,6 +379,51 @@ class TestElectionModel(BaseElectionCreatorMixIn, TestCase):
                 4,
             )
 
+    def test_path(self):
+        for election in [
+            self.election_group,
+            self.org_group,
+            self.ballot,
+            self.testshire_org_group,
+            self.testshire_ballot,
+        ]:
+            election.save()
+        self.assertEqual(
+            Election.private_objects.get(pk=self.ballot.pk).path,
+            ".".join(
+                Election.get_path_label(election.election_id)
+                for election in [
+                    self.election_group,
+                    self.org_group,
+                    self.ballot,
+                ]
+            ),
+        )
+
+        # moving a group moves everything below it
+        self.org_group.election_id = "municipal.moved-org.2017-06-08"
+        self.org_group.save()
+        self.ballot.refresh_from_db()
+        self.assertTrue(
+            self.ballot.path.startswith(
+                "municipal__2017_06_08.municipal__moved_org__2017_06_08."
+            )
+        )
+        self.assertEqual(
+            list(
+                self.election_group.get_descendents(
+                    "private_objects", inclusive=True
+                ).order_by("pk")
+            ),
+            [
+                self.election_group,
+                self.org_group,
+                self.ballot,
+                self.testshire_org_group,
+                self.testshire_ballot,
+            ],
+        )
+
     def test_requires_voter_id_empty(self):
         self.ballot.requires_voter_id = ""
         self.ballot.save()
@@ -285,7 +438,7 @@ class TestElectionModel(BaseElectionCreatorMixIn, TestCase):
         ]
         for status, expected_calls in test_cases:
             with (
-                patch("elections.models.send_event") as send_event_mock,
+                patch("elections.models.queue_event") as send_event_mock,
             ):
                 self.ballot.save(status=status)
                 assert send_event_mock.call_count == expected_calls
@@ -299,7 +452,7 @@ class TestElectionModel(BaseElectionCreatorMixIn, TestCase):
         ]
         for status in test_cases:
             with (
-                patch("elections.models.send_event") as send_event_mock,
+                patch("elections.models.queue_event") as send_event_mock,
             ):
                 self.ballot.save(status=status, push_event=False)
                 assert send_event_mock.call_count == 0
@@ -114,9 +114,9 @@ def test_full_id_creation_not_logged_in(
 
     with (
         patch(
-            "elections.views.id_creator.send_event"
+            "elections.views.id_creator.queue_event"
         ) as creator_send_event_mock,
-        patch("elections.models.send_event") as model_send_event_mock,
+        patch("elections.models.queue_event") as model_send_event_mock,
     ):
         # Open the home page, click to add a new election
         page.goto(live_server.url)
@@ -204,9 +204,9 @@ def test_full_id_creation_logged_in(
 
     with (
         patch(
-            "elections.views.id_creator.send_event"
+            "elections.views.id_creator.queue_event"
         ) as creator_send_event_mock,
-        patch("elections.models.send_event") as model_send_event_mock,
+        patch("elections.models.queue_event") as model_send_event_mock,
     ):
         # Open the home page, click to add a new election
         page.goto(live_server.url)
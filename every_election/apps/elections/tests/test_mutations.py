@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from elections.models import Election, ModerationStatuses
+from elections.mutations import (
+    bulk_update_elections,
+    set_moderation_status,
+    update_elections,
+    with_descendants,
+)
+from elections.tests.factories import ElectionWithStatusFactory
+
+
+class TestMutations(TestCase):
+    def setUp(self):
+        self.ballots = ElectionWithStatusFactory.create_batch(3)
+        self.group = self.ballots[0].group
+        set_moderation_status(
+            Election.private_objects.filter(pk=self.group.pk),
+            ModerationStatuses.approved.value,
+            push_event=False,
+        )
+
+    def test_with_descendants(self):
+        elections = with_descendants(
+            Election.private_objects.filter(pk=self.group.pk)
+        )
+        self.assertEqual(set(elections), {self.group, *self.ballots})
+
+    def test_update_elections(self):
+        modified = Election.private_objects.get(pk=self.ballots[0].pk).modified
+        with patch("elections.mutations.queue_event") as queue_event:
+            rows = update_elections(
+                with_descendants(
+                    Election.private_objects.filter(pk=self.group.pk)
+                ),
+                cancelled=True,
+            )
+        self.assertEqual(rows, 4)
+        queue_event.assert_called_once()
+        ballot = Election.private_objects.get(pk=self.ballots[0].pk)
+        self.assertTrue(ballot.cancelled)
+        self.assertGreater(ballot.modified, modified)
+
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.rollup_cancelled_ballots, 3)
+
+    def test_update_elections_save_only_fields(self):
+        with self.assertRaises(ValueError):
+            update_elections(
+                Election.private_objects.all(), poll_open_date="2017-03-24"
+            )
+
+    def test_bulk_update_elections(self):
+        for seats, ballot in enumerate(self.ballots, start=1):
+            ballot.seats_contested = seats
+        bulk_update_elections(
+            self.ballots, ["seats_contested"], push_event=False
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.rollup_seats_contested, 6)
+
+    def test_set_moderation_status(self):
+        with patch("elections.mutations.queue_event") as queue_event:
+            rows = set_moderation_status(
+                Election.private_objects.filter(group=self.group),
+                ModerationStatuses.deleted.value,
+            )
+        self.assertEqual(rows, 3)
+        queue_event.assert_called_once()
+        self.assertEqual(Election.public_objects.count(), 1)
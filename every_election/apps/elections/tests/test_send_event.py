@@ -6,7 +6,8 @@ import boto3
 import pytest
 from botocore.exceptions import ClientError
 from django.test import override_settings
-from elections.baker import send_event
+from elections.baker import dispatch_events, queue_event
+from elections.models import OutboxEvent
 from moto import mock_aws
 
 
@@ -81,37 +82,26 @@ def eventbridge_rule(events_client, sqs_queue_details):
     )
 
 
-@pytest.fixture()
-def event_bus_arn(events_client):
-    with mock_aws():
-        r = events_client.list_event_buses()
-        yield r["EventBuses"][0]["Arn"]
-
-
 @pytest.mark.django_db
 @override_settings(
     SEND_EVENTS=True,
     DC_ENVIRONMENT="development",
     EC2_IP="127.0.0.1",
 )
-def test_send_event_happy_path(sqs_client, sqs_queue_details, event_bus_arn):
+def test_dispatch_events(sqs_client, sqs_queue_details, events_client):
+    event_bus_arn = events_client.list_event_buses()["EventBuses"][0]["Arn"]
     with override_settings(DC_EVENTBUS_ARN=event_bus_arn):
         queue_url, _ = sqs_queue_details
-        detail = {"message": "Test event"}
-        detail_type = "elections_set_changed"
+        queue_event({"message": "Test event"}, "elections_set_changed")
+        assert OutboxEvent.objects.pending().count() == 1
 
-        with patch("elections.baker.logger") as mock_logger:
-            send_event(detail, detail_type)
+        assert dispatch_events(client=events_client) == 1
 
         sqs_response = sqs_client.receive_message(
             QueueUrl=queue_url, WaitTimeSeconds=5
         )
         assert "Messages" in sqs_response
-        assert (
-            json.loads(sqs_response["Messages"][0]["Body"])["source"]
-            == "everyelection-development-127.0.0.1"
-        )
-        mock_logger.error.assert_not_called()
+        assert OutboxEvent.objects.pending().count() == 0
 
 
 @pytest.mark.django_db
@@ -119,46 +109,78 @@ def test_send_event_happy_path(sqs_client, sqs_queue_details, event_bus_arn):
     SEND_EVENTS=True,
     DC_ENVIRONMENT="development",
     EC2_IP="127.0.0.1",
+    DC_EVENTBUS_ARN="arn:aws:events:eu-west-2:000000000000:event-bus/test",
 )
-def test_send_event_no_eventbus_arn(
-    sqs_client, sqs_queue_details, event_bus_arn
-):
-    queue_url, _ = sqs_queue_details
-    detail = {"message": "Test event"}
-    detail_type = "elections_set_changed"
+def test_dispatch_events_coalesces_and_batches():
+    for _ in range(25):
+        queue_event({"description": "approved"}, "elections_set_changed")
+    for i in range(12):
+        queue_event({"description": f"event {i}"}, "elections_set_changed")
+
+    client = MagicMock()
+    client.put_events.side_effect = lambda Entries: {
+        "FailedEntryCount": 0,
+        "Entries": [{"EventId": str(i)} for i, _ in enumerate(Entries)],
+    }
+
+    assert dispatch_events(client=client) == 37
 
-    with pytest.raises(AttributeError):
-        send_event(detail, detail_type)
+    batches = [
+        call.kwargs["Entries"] for call in client.put_events.call_args_list
+    ]
+    assert [len(batch) for batch in batches] == [10, 3]
+    details = [
+        json.loads(entry["Detail"]) for batch in batches for entry in batch
+    ]
+    assert details.count({"description": "approved"}) == 1
+    assert not OutboxEvent.objects.filter(sent=None).exists()
 
 
 @pytest.mark.django_db
 @override_settings(
-    SEND_EVENTS=False,
+    SEND_EVENTS=True,
     DC_ENVIRONMENT="development",
     EC2_IP="127.0.0.1",
+    DC_EVENTBUS_ARN="arn:aws:events:eu-west-2:000000000000:event-bus/test",
 )
-def test_send_event_disabled(sqs_client, sqs_queue_details, event_bus_arn):
-    # Even with all other settings set, `SEND_EVENTS=False` should still stop events being sent.
-    with override_settings(DC_EVENTBUS_ARN=event_bus_arn):
-        queue_url, _ = sqs_queue_details
-        detail = {"message": "Test event"}
-        detail_type = "elections_set_changed"
+def test_dispatch_events_retries_failures():
+    queue_event({"description": "one"}, "elections_set_changed")
+    queue_event({"description": "two"}, "elections_set_changed")
+
+    client = MagicMock()
+    client.put_events.return_value = {
+        "FailedEntryCount": 1,
+        "Entries": [
+            {"EventId": "1"},
+            {"ErrorCode": "InternalFailure", "ErrorMessage": "Try again"},
+        ],
+    }
+    with patch("elections.baker.logger") as mock_logger:
+        assert dispatch_events(client=client) == 1
+    mock_logger.error.assert_called_once()
+
+    failed = OutboxEvent.objects.get(sent=None)
+    assert failed.detail == {"description": "two"}
+    assert failed.attempts == 1
+    assert failed.last_error == "Try again"
+    # not due again until it has backed off
+    assert not OutboxEvent.objects.pending().exists()
+
+    client.put_events.side_effect = ClientError(
+        error_response={"Error": {"Code": "InternalException"}},
+        operation_name="PutEvents",
+    )
+    OutboxEvent.objects.update(next_attempt=failed.created)
+    assert dispatch_events(client=client) == 0
+    failed.refresh_from_db()
+    assert failed.attempts == 2
 
-        with patch("elections.baker.logger") as mock_logger:
-            send_event(detail, detail_type)
 
-        sqs_response = sqs_client.receive_message(
-            QueueUrl=queue_url, WaitTimeSeconds=5
-        )
-        assert "Messages" not in sqs_response
-        mock_logger.info.assert_called_once()
-        # Check if the message is correct
-        info_message = mock_logger.info.call_args[0][0]
-        assert (
-            info_message
-            == "Skipping elections_set_changed because SEND_EVENTS is disabled."
-        )
-        mock_logger.error.assert_not_called()
+@pytest.mark.django_db
+@override_settings(SEND_EVENTS=False)
+def test_queue_event_disabled():
+    queue_event({"description": "approved"}, "elections_set_changed")
+    assert not OutboxEvent.objects.exists()
 
 
 @pytest.mark.django_db
@@ -166,56 +188,17 @@ def test_send_event_disabled(sqs_client, sqs_queue_details, event_bus_arn):
     SEND_EVENTS=True,
     DC_ENVIRONMENT="development",
     EC2_IP="127.0.0.1",
+    DC_EVENTBUS_ARN="arn:aws:events:eu-west-2:000000000000:event-bus/test",
 )
-def test_send_event_internal_exception(event_bus_arn):
-    """Test that the InternalException in send_event is properly caught and logged."""
-    with override_settings(DC_EVENTBUS_ARN=event_bus_arn):
-        detail = {"message": "Test event with client exception"}
-        detail_type = "elections_set_changed"
-
-        with patch("elections.baker.boto3.Session") as mock_session_class:
-            mock_put_events = MagicMock(
-                side_effect=ClientError(
-                    error_response={
-                        "Error": {
-                            "Code": "InternalException",
-                            "Message": "OH NO. Something went wrong.",
-                        }
-                    },
-                    operation_name="PutEvents",
-                )
-            )
-
-            mock_session = MagicMock()
-            mock_session_class.return_value = mock_session
-
-            mock_client = MagicMock()
-            mock_session.client.return_value = mock_client
-
-            mock_client.put_events = mock_put_events
-
-            # The mock client also needs an exceptions attribute with an InternalException
-            # that matches what's expected in the except clause
-            mock_client.exceptions = MagicMock()
-            mock_client.exceptions.InternalException = ClientError
-
-            # Patch the logger to verify it gets called
-            with patch("elections.baker.logger") as mock_logger:
-                # Test the function - it should handle the exception internally
-                send_event(detail, detail_type)
-
-                # Verify the logger.error was called as expected
-                mock_logger.error.assert_called_once()
-                # Check if the error message is correct
-                error_message = mock_logger.error.call_args[0][0]
-                assert (
-                    "Failed to send event" in error_message
-                )  # from our function
-                assert (
-                    "OH NO. Something went wrong" in error_message
-                )  # from our mock
-
-                # Check if the logger was called with the correct kwargs
-                call_kwargs = mock_logger.error.call_args[1]
-                assert call_kwargs["exc_info"] is True
-                assert call_kwargs["stack_info"] is True
+def test_queue_event_leaves_sending_to_dispatch_events(
+    django_capture_on_commit_callbacks,
+):
+    with (
+        patch("elections.baker.get_events_client") as get_events_client,
+        django_capture_on_commit_callbacks(execute=True) as callbacks,
+    ):
+        queue_event({"description": "approved"}, "elections_set_changed")
+    # nothing is sent from the request that queued it
+    assert callbacks == []
+    get_events_client.assert_not_called()
+    assert OutboxEvent.objects.pending().count() == 1
@@ -0,0 +1,68 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.test import TestCase
+from elections.constraints import find_violations
+from elections.models import Election, ModerationHistory, SyncState
+from elections.snapshot import SnapshotError, export_snapshot, import_snapshot
+from elections.tests.factories import ElectionWithStatusFactory
+from organisations.models import Organisation, OrganisationDivision
+
+
+class TestSnapshot(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "snapshot.jsonl.gz")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip(self):
+        election = ElectionWithStatusFactory(group=None)
+        division_ids = set(
+            OrganisationDivision.objects.values_list("pk", flat=True)
+        )
+
+        counts = export_snapshot(self.path)
+        self.assertEqual(counts["elections.election"], 1)
+
+        Election.private_objects.all().delete()
+        Organisation.objects.all().delete()
+
+        import_snapshot(self.path)
+
+        imported = Election.private_objects.get()
+        self.assertEqual(imported.pk, election.pk)
+        self.assertEqual(imported.election_id, election.election_id)
+        self.assertEqual(imported.modified, election.modified)
+        self.assertEqual(imported.current_status, election.current_status)
+        self.assertEqual(
+            imported.division_geography.geography,
+            election.division_geography.geography,
+        )
+        self.assertEqual(
+            set(OrganisationDivision.objects.values_list("pk", flat=True)),
+            division_ids,
+        )
+        self.assertEqual(
+            SyncState.objects.get(
+                upstream_url=settings.UPSTREAM_SYNC_URL
+            ).high_water_mark,
+            election.modified,
+        )
+        self.assertEqual(
+            ModerationHistory.objects.filter(election=imported).count(), 1
+        )
+        self.assertEqual(find_violations(), [])
+        # new rows don't collide with the imported primary keys
+        self.assertGreater(
+            ElectionWithStatusFactory(group=None).pk, election.pk
+        )
+
+    def test_import_into_non_empty_database(self):
+        ElectionWithStatusFactory(group=None)
+        export_snapshot(self.path)
+
+        with self.assertRaises(SnapshotError):
+            import_snapshot(self.path)
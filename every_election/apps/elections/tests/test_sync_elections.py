@@ -1,12 +1,23 @@
 import datetime
-
-from django.test import TestCase
-from elections.models import Election, ElectionCancellationReason
+from unittest import mock
+
+from dateutil.parser import parse
+from django.conf import settings
+from django.test import TestCase, override_settings
+from elections.models import (
+    Election,
+    ElectionCancellationReason,
+    Explanation,
+    MetaData,
+    SyncState,
+)
 from elections.sync_helper import ElectionSyncer
 from elections.tests.factories import ElectedRoleFactory, ElectionFactory
 from elections.tests.test_election_sync_fixtures import get_local_ballot
 from organisations.models import Organisation, OrganisationDivisionSet
 from organisations.tests.factories import (
+    DivisionGeographyFactory,
+    OrganisationDivisionFactory,
     OrganisationFactory,
 )
 
@@ -80,6 +91,51 @@ class TestSyncElectionsHelper(TestCase):
         )
         self.assertEqual(org, matched_org)
 
+    def test_get_organisation_is_cached(self):
+        OrganisationFactory(official_identifier="ABC", start_date="2022-01-01")
+        organisation_dict = {
+            "official_identifier": "ABC",
+            "start_date": "2022-01-01",
+            "end_date": None,
+        }
+        helper = ElectionSyncer()
+        helper.get_organisation(organisation_dict)
+        with self.assertNumQueries(0):
+            helper.get_organisation(organisation_dict)
+
+    def test_get_explanation(self):
+        helper = ElectionSyncer()
+        explanation = helper.get_explanation("Some explanation")
+        self.assertEqual(
+            explanation.explanation_hash,
+            Explanation.get_hash("Some explanation"),
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                helper.get_explanation("Some explanation"), explanation
+            )
+        # a new run finds it by hash
+        self.assertEqual(
+            ElectionSyncer().get_explanation("Some explanation"), explanation
+        )
+        self.assertEqual(Explanation.objects.count(), 1)
+
+    def test_get_metadata(self):
+        value = {"foo": {"title": "Foo", "detail": "Bar", "url": None}}
+        helper = ElectionSyncer()
+        metadata = helper.get_metadata(value)
+        self.assertEqual(metadata.description, "Foo")
+        with self.assertNumQueries(0):
+            self.assertEqual(helper.get_metadata(value), metadata)
+        # key order doesn't matter
+        self.assertEqual(
+            ElectionSyncer().get_metadata(
+                {"foo": {"url": None, "detail": "Bar", "title": "Foo"}}
+            ),
+            metadata,
+        )
+        self.assertEqual(MetaData.objects.count(), 1)
+
     def test_get_organisation_update_end_date(self):
         """
         Test that we can update an organisation's end date when the
@@ -270,3 +326,253 @@ class TestElectionSyncerCreatesElection(TestCase):
         # ...and the end date is updated
         div_set.refresh_from_db()
         self.assertEqual(div_set.end_date, datetime.date(2024, 5, 2))
+
+
+class TestElectionSyncerBulk(TestCase):
+    def test_add_elections(self):
+        helper = ElectionSyncer()
+        ballot = get_local_ballot()
+
+        self.assertEqual(helper.add_elections([ballot]), [])
+
+        election: Election = Election.public_objects.get(
+            election_id=ballot["election_id"]
+        )
+        self.assertEqual(election.group.election_id, ballot["group"])
+        self.assertEqual(election.organisation.official_identifier, "REI")
+        self.assertEqual(election.division.name, "Banstead Village")
+        self.assertEqual(election.voting_system, "FPTP")
+        self.assertEqual(election.tags, ballot["tags"])
+        self.assertEqual(election.modified, parse(ballot["modified"]))
+        self.assertEqual(
+            list(
+                election.moderationhistory_set.values_list("status", flat=True)
+            ),
+            ["Approved"],
+        )
+
+        # the same result again updates the existing election
+        ballot["cancelled"] = True
+        ballot["cancellation_reason"] = (
+            ElectionCancellationReason.CANDIDATE_DEATH
+        )
+        count = Election.private_objects.count()
+        self.assertEqual(helper.add_elections([ballot]), [])
+        self.assertEqual(Election.private_objects.count(), count)
+        election.refresh_from_db()
+        self.assertTrue(election.cancelled)
+        self.assertEqual(election.moderationhistory_set.count(), 1)
+
+    def test_add_elections_moves_geography_with_division(self):
+        helper = ElectionSyncer()
+        ballot = get_local_ballot()
+        helper.add_elections([ballot])
+        election = Election.private_objects.get(
+            election_id=ballot["election_id"]
+        )
+        self.assertIsNone(election.division_geography)
+
+        new_division = OrganisationDivisionFactory(
+            divisionset=election.division.divisionset,
+            official_identifier="gss:E05012873",
+        )
+        geography = DivisionGeographyFactory(division=new_division)
+        ballot["division"] = dict(
+            ballot["division"], official_identifier="gss:E05012873"
+        )
+        self.assertEqual(helper.add_elections([ballot]), [])
+
+        election.refresh_from_db()
+        self.assertEqual(election.division, new_division)
+        self.assertEqual(election.division_geography, geography)
+
+    def test_add_elections_leaves_unresolved_results(self):
+        helper = ElectionSyncer()
+        ballot = get_local_ballot()
+        ballot["group"] = "local.not-imported-yet.2022-05-05"
+
+        self.assertEqual(helper.add_elections([ballot]), [ballot])
+        self.assertFalse(
+            Election.private_objects.filter(
+                election_id=ballot["election_id"]
+            ).exists()
+        )
+
+
+class TestElectionSyncerPages(TestCase):
+    def test_iter_pages_follows_next(self):
+        pages = {
+            "https://example.com/1": {"next": "https://example.com/2"},
+            "https://example.com/2": {"next": None},
+        }
+        session = mock.Mock()
+        session.get.side_effect = lambda url, **kwargs: mock.Mock(
+            json=mock.Mock(return_value=pages[url])
+        )
+        helper = ElectionSyncer(session=session)
+
+        self.assertEqual(
+            list(helper.iter_pages("https://example.com/1")),
+            [
+                ("https://example.com/1", pages["https://example.com/1"]),
+                ("https://example.com/2", pages["https://example.com/2"]),
+            ],
+        )
+        self.assertEqual(session.get.call_count, 2)
+
+    def test_run_import_uses_session(self):
+        ballot = get_local_ballot()
+        session = mock.Mock()
+        session.get.return_value.json.return_value = {
+            "next": None,
+            "results": [ballot],
+        }
+        helper = ElectionSyncer(session=session, bulk=True)
+        helper.run_import()
+
+        self.assertTrue(
+            Election.public_objects.filter(
+                election_id=ballot["election_id"]
+            ).exists()
+        )
+
+    def test_run_import_resumes_from_checkpoint(self):
+        ballot = get_local_ballot()
+        pages = {
+            "https://example.com/1": {
+                "next": "https://example.com/2",
+                "results": [ballot],
+            },
+            "https://example.com/2": {"next": None, "results": []},
+        }
+        session = mock.Mock()
+        session.get.side_effect = lambda url, **kwargs: mock.Mock(
+            json=mock.Mock(return_value=pages[url])
+        )
+        SyncState.objects.create(
+            upstream_url=settings.UPSTREAM_SYNC_URL,
+            next_url="https://example.com/1",
+            run_pages=3,
+        )
+
+        ElectionSyncer(session=session).run_import()
+
+        self.assertEqual(
+            [call.args[0] for call in session.get.call_args_list],
+            ["https://example.com/1", "https://example.com/2"],
+        )
+        state = SyncState.objects.get()
+        self.assertIsNone(state.next_url)
+        self.assertEqual(state.run_pages, 5)
+        self.assertEqual(state.run_results, 1)
+        self.assertEqual(state.high_water_mark, parse(ballot["modified"]))
+
+    def test_run_import_starts_from_high_water_mark(self):
+        session = mock.Mock()
+        session.get.return_value.json.return_value = {
+            "next": None,
+            "results": [],
+        }
+        SyncState.objects.create(
+            upstream_url=settings.UPSTREAM_SYNC_URL,
+            high_water_mark=parse("2024-05-02T10:00:00Z"),
+        )
+
+        ElectionSyncer(session=session).run_import()
+
+        # with some overlap, in case of late writes upstream
+        url = session.get.call_args.args[0]
+        self.assertIn("modified=2024-05-02T08%3A59%3A00", url)
+        self.assertNotIn("cursor", url)
+
+        SyncState.objects.update(high_water_mark=parse("2024-05-03T10:00:00Z"))
+        with override_settings(SYNC_UPSTREAM_CURSOR=True):
+            ElectionSyncer(session=session).run_import()
+        self.assertIn(
+            "modified=2024-05-03T08%3A59%3A00&cursor=",
+            session.get.call_args.args[0],
+        )
+
+    def test_fetch_missing_dependencies(self):
+        upstream = {
+            "local.2024-05-02": {
+                "election_id": "local.2024-05-02",
+                "group": None,
+                "replaces": None,
+            },
+            "local.foo.2024-05-02": {
+                "election_id": "local.foo.2024-05-02",
+                "group": "local.2024-05-02",
+                "replaces": None,
+            },
+        }
+        session = mock.Mock()
+        session.get.side_effect = lambda url, **kwargs: mock.Mock(
+            json=mock.Mock(return_value=upstream[url.rsplit("/", 1)[1]])
+        )
+        helper = ElectionSyncer(session=session)
+        helper.url = "https://example.com/api/elections/"
+        page = [
+            {
+                "election_id": "local.foo.bar.by.2024-05-02",
+                "group": "local.foo.2024-05-02",
+                "replaces": "local.foo.bar.2024-05-02",
+            },
+            {
+                "election_id": "local.foo.bar.2024-05-02",
+                "group": "local.foo.2024-05-02",
+                "replaces": None,
+            },
+        ]
+
+        fetched = helper.fetch_missing_dependencies(page)
+
+        self.assertEqual(
+            [result["election_id"] for result in fetched],
+            ["local.foo.2024-05-02", "local.2024-05-02"],
+        )
+        self.assertEqual(
+            [
+                result["election_id"]
+                for result in helper.order_results(page + fetched)
+            ],
+            [
+                "local.2024-05-02",
+                "local.foo.2024-05-02",
+                "local.foo.bar.2024-05-02",
+                "local.foo.bar.by.2024-05-02",
+            ],
+        )
+
+    def test_run_import_skips_unchanged_results(self):
+        ballot = get_local_ballot()
+        session = mock.Mock()
+        session.get.return_value.json.return_value = {
+            "next": None,
+            "results": [ballot],
+        }
+        ElectionSyncer(session=session).run_import()
+        self.assertEqual(SyncState.objects.get().run_unchanged, 0)
+
+        with mock.patch.object(ElectionSyncer, "add_single_election") as add:
+            ElectionSyncer(
+                session=session, since=parse("2020-01-01")
+            ).run_import()
+        add.assert_not_called()
+        self.assertEqual(SyncState.objects.get().run_unchanged, 1)
+
+        # `current` doesn't count as a change...
+        ballot["current"] = not ballot["current"]
+        with mock.patch.object(ElectionSyncer, "add_single_election") as add:
+            ElectionSyncer(
+                session=session, since=parse("2020-01-01")
+            ).run_import()
+        add.assert_not_called()
+
+        # ...but anything else does
+        ballot["cancelled"] = True
+        with mock.patch.object(ElectionSyncer, "add_single_election") as add:
+            ElectionSyncer(
+                session=session, since=parse("2020-01-01")
+            ).run_import()
+        add.assert_called_once_with(ballot)
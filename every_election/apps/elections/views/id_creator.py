@@ -6,7 +6,7 @@ from django.db import transaction
 from django.http import HttpResponseRedirect
 from election_snooper.helpers import post_to_slack
 from election_snooper.models import SnoopedElection
-from elections.baker import send_event
+from elections.baker import queue_event
 from elections.forms import (
     ByElectionSourceFormSet,
     DivFormSet,
@@ -383,7 +383,7 @@ class IDCreatorWizard(NamedUrlSessionWizardView):
             )
 
         if status == ModerationStatuses.approved.value:
-            send_event(
+            queue_event(
                 detail={"description": "Suggested elections approved"},
                 detail_type="elections_set_changed",
             )
@@ -51,5 +51,9 @@ PMTILES_FEATURE_ATTR_FIELDS = [
     "division__official_identifier",
 ]
 
+# Tolerances (in degrees) of the simplified copies of each geography we
+# store for the /geo endpoints. Roughly 10m, 100m and 1km.
+GEOGRAPHY_SIMPLIFICATION_TOLERANCES = (0.0001, 0.001, 0.01)
+
 # TODO: Add Canadian boundary/division types when implementing boundary imports
 # This will need to map Canadian electoral district types to their geographic data sources
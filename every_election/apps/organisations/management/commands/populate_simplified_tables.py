@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from organisations.constants import GEOGRAPHY_SIMPLIFICATION_TOLERANCES
+from organisations.models import (
+    DivisionGeographySimplified,
+    OrganisationGeographySimplified,
+)
+
+
+class Command(BaseCommand):
+    help = "Populate the simplified geography tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--where-missing",
+            action="store_true",
+            help="Don't truncate table, just update where simplified geography is missing",
+        )
+
+    def handle(self, *args, **options):
+        if options.get("where_missing"):
+            org_sql = OrganisationGeographySimplified.POPULATE_WHERE_MISSING_SQL
+            div_sql = DivisionGeographySimplified.POPULATE_WHERE_MISSING_SQL
+        else:
+            org_sql = OrganisationGeographySimplified.POPULATE_SQL
+            div_sql = DivisionGeographySimplified.POPULATE_SQL
+
+        tolerances = list(GEOGRAPHY_SIMPLIFICATION_TOLERANCES)
+        with connection.cursor() as cursor:
+            self.stdout.write("Orgs")
+            cursor.execute(org_sql, [tolerances])
+            self.stdout.write("Divs")
+            cursor.execute(div_sql, [tolerances])
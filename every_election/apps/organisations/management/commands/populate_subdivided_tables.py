@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
-from django.db import connection
+from django.db import connection, transaction
+from elections.managers import invalidate_point_lookups
 from organisations.models import (
     DivisionGeographySubdivided,
     OrganisationGeographySubdivided,
@@ -29,3 +30,4 @@ class Command(BaseCommand):
             cursor.execute(org_sql)
             self.stdout.write("Divs")
             cursor.execute(div_sql)
+        transaction.on_commit(invalidate_point_lookups)
@@ -5,6 +5,7 @@ from organisations.models.admin import (
 )
 from organisations.models.divisions import (
     DivisionGeography,
+    DivisionGeographySimplified,
     DivisionGeographySubdivided,
     OrganisationBoundaryReview,
     OrganisationDivision,
@@ -15,6 +16,7 @@ from organisations.models.divisions import (
 from organisations.models.organisations import (
     Organisation,
     OrganisationGeography,
+    OrganisationGeographySimplified,
     OrganisationGeographySubdivided,
 )
 
@@ -25,10 +27,12 @@ __all__ = [
     "Organisation",
     "OrganisationGeography",
     "OrganisationGeographySubdivided",
+    "OrganisationGeographySimplified",
     "OrganisationDivisionSet",
     "OrganisationDivision",
     "DivisionGeography",
     "DivisionGeographySubdivided",
+    "DivisionGeographySimplified",
     "OrganisationBoundaryReview",
     "ReviewStatus",
     "TerritoryCode",
@@ -11,7 +11,10 @@ from django.db.models.fields import BinaryField, CharField
 from django.db.models.functions import MD5, Cast, Concat
 from django.utils.functional import cached_property
 from django_extensions.db.models import TimeStampedModel
-from organisations.constants import PMTILES_FEATURE_ATTR_FIELDS
+from organisations.constants import (
+    GEOGRAPHY_SIMPLIFICATION_TOLERANCES,
+    PMTILES_FEATURE_ATTR_FIELDS,
+)
 from storage.s3wrapper import S3Wrapper
 
 from .mixins import DateConstraintMixin, DateDisplayMixin
@@ -254,6 +257,13 @@ class DivisionGeography(models.Model):
         with connection.cursor() as cursor:
             cursor.execute(sql, [self.id])
 
+        self.simplified.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                DivisionGeographySimplified.POPULATE_ONE_SQL,
+                [list(GEOGRAPHY_SIMPLIFICATION_TOLERANCES), self.id],
+            )
+
 
 class DivisionGeographySubdivided(models.Model):
     geography = models.PolygonField(db_index=True, spatial_index=True)
@@ -285,6 +295,50 @@ class DivisionGeographySubdivided(models.Model):
     """
 
 
+class DivisionGeographySimplified(models.Model):
+    """
+    Simplified copies of a DivisionGeography at each of
+    GEOGRAPHY_SIMPLIFICATION_TOLERANCES, for map clients that don't need
+    full resolution boundaries.
+    """
+
+    geography = models.MultiPolygonField()
+    tolerance = models.FloatField()
+    division_geography = models.ForeignKey(
+        DivisionGeography,
+        on_delete=models.CASCADE,
+        related_name="simplified",
+    )
+
+    class Meta:
+        unique_together = ("division_geography", "tolerance")
+
+    POPULATE_ONE_SQL = """
+    INSERT INTO organisations_divisiongeographysimplified (geography, tolerance, division_geography_id)
+        SELECT ST_Multi(ST_SimplifyPreserveTopology(geography, levels.tolerance)), levels.tolerance, id
+        FROM organisations_divisiongeography dg, unnest(%s::double precision[]) AS levels(tolerance)
+        WHERE dg.id=%s;
+    """
+
+    POPULATE_SQL = """
+    TRUNCATE organisations_divisiongeographysimplified;
+    INSERT INTO organisations_divisiongeographysimplified (geography, tolerance, division_geography_id)
+        SELECT ST_Multi(ST_SimplifyPreserveTopology(geography, levels.tolerance)), levels.tolerance, id
+        FROM organisations_divisiongeography, unnest(%s::double precision[]) AS levels(tolerance);
+    """
+
+    POPULATE_WHERE_MISSING_SQL = """
+    INSERT INTO organisations_divisiongeographysimplified (geography, tolerance, division_geography_id)
+        SELECT ST_Multi(ST_SimplifyPreserveTopology(geography, levels.tolerance)), levels.tolerance, id
+        FROM organisations_divisiongeography dg, unnest(%s::double precision[]) AS levels(tolerance)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM organisations_divisiongeographysimplified odgs
+            WHERE odgs.division_geography_id = dg.id
+                AND odgs.tolerance = levels.tolerance
+        );
+    """
+
+
 class OrganisationBoundaryReviewQuerySet(models.QuerySet):
     def unprocessed(self):
         """
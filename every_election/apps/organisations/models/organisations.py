@@ -3,6 +3,7 @@ from django.contrib.gis.db import models
 from django.db import connection, transaction
 from django.urls import reverse
 from model_utils import Choices
+from organisations.constants import GEOGRAPHY_SIMPLIFICATION_TOLERANCES
 
 from .mixins import DateConstraintMixin, DateDisplayMixin
 
@@ -169,6 +170,13 @@ class OrganisationGeography(
         with connection.cursor() as cursor:
             cursor.execute(sql, [self.id])
 
+        self.simplified.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                OrganisationGeographySimplified.POPULATE_ONE_SQL,
+                [list(GEOGRAPHY_SIMPLIFICATION_TOLERANCES), self.id],
+            )
+
     class Meta:
         verbose_name_plural = "Organisation Geographies"
         ordering = ("-start_date",)
@@ -214,3 +222,48 @@ class OrganisationGeographySubdivided(models.Model):
         FROM organisations_organisationgeography og
         WHERE og.id IN (SELECT id FROM missing_subdivided_geography);
     """
+
+
+class OrganisationGeographySimplified(models.Model):
+    """
+    Simplified copies of an OrganisationGeography at each of
+    GEOGRAPHY_SIMPLIFICATION_TOLERANCES, for map clients that don't need
+    full resolution boundaries.
+    """
+
+    geography = models.MultiPolygonField()
+    tolerance = models.FloatField()
+    organisation_geography = models.ForeignKey(
+        OrganisationGeography,
+        on_delete=models.CASCADE,
+        related_name="simplified",
+    )
+
+    class Meta:
+        unique_together = ("organisation_geography", "tolerance")
+
+    POPULATE_ONE_SQL = """
+    INSERT INTO organisations_organisationgeographysimplified (geography, tolerance, organisation_geography_id)
+        SELECT ST_Multi(ST_SimplifyPreserveTopology(geography, levels.tolerance)), levels.tolerance, id
+        FROM organisations_organisationgeography og, unnest(%s::double precision[]) AS levels(tolerance)
+        WHERE og.id=%s AND og.geography IS NOT NULL;
+    """
+
+    POPULATE_SQL = """
+    TRUNCATE organisations_organisationgeographysimplified;
+    INSERT INTO organisations_organisationgeographysimplified (geography, tolerance, organisation_geography_id)
+        SELECT ST_Multi(ST_SimplifyPreserveTopology(geography, levels.tolerance)), levels.tolerance, id
+        FROM organisations_organisationgeography og, unnest(%s::double precision[]) AS levels(tolerance)
+        WHERE og.geography IS NOT NULL;
+    """
+
+    POPULATE_WHERE_MISSING_SQL = """
+    INSERT INTO organisations_organisationgeographysimplified (geography, tolerance, organisation_geography_id)
+        SELECT ST_Multi(ST_SimplifyPreserveTopology(geography, levels.tolerance)), levels.tolerance, id
+        FROM organisations_organisationgeography og, unnest(%s::double precision[]) AS levels(tolerance)
+        WHERE og.geography IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM organisations_organisationgeographysimplified ogs
+            WHERE ogs.organisation_geography_id = og.id
+                AND ogs.tolerance = levels.tolerance
+        );
+    """
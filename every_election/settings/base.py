@@ -263,6 +263,31 @@ DATA_UPLOAD_MAX_NUMBER_FIELDS = None
 SITE_TITLE = "Every Election"
 
 DATA_CACHE_DIR = root("data_cache")
+# Rendered vector tiles of ballot geographies (see api/tiles.py)
+TILE_CACHE_DIR = os.path.join(DATA_CACHE_DIR, "tiles")
+TILE_MAX_ZOOM = 18
+# Tiles for an old geography generation are kept for this long after they
+# were last written, as other processes may not have moved on yet
+TILE_CACHE_GRACE_SECONDS = 60 * 60
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "point_lookups": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "point-lookups",
+        "TIMEOUT": 60 * 60,
+        "OPTIONS": {"MAX_ENTRIES": 50_000},
+    },
+}
+# Cache alias used to memoize point -> geography lookups
+POINT_LOOKUP_CACHE = "point_lookups"
+# Points are rounded to this many decimal places (~10cm) before lookup
+POINT_LOOKUP_CACHE_PRECISION = 6
+# How often (in seconds) each process checks whether geographies have
+# changed in another process
+GEOGRAPHY_GENERATION_TTL = 5
 
 LOGIN_REDIRECT_URL = "home"
 LOGOUT_REDIRECT_URL = "home"
@@ -280,12 +305,38 @@ REST_FRAMEWORK = {
     ),
 }
 API_MAX_LIMIT = 100
+# Maximum number of points (coords + postcodes) accepted by a single
+# POST to /api/elections/lookup/
+API_MAX_LOOKUP_POINTS = 1000
+# Serve elections from the documents stored in SerializedElection.
+# Elections without a stored document are serialized as normal.
+API_USE_SERIALIZED_ELECTIONS = True
+# Number of rows fetched at a time when streaming /api/elections/dump/
+API_DUMP_CHUNK_SIZE = 2000
 
 CORS_ORIGIN_ALLOW_ALL = True
 CORS_URLS_REGEX = r"^/api/.*$"
 CORS_ALLOW_METHODS = ("GET", "OPTIONS")
 
 UPSTREAM_SYNC_URL = "https://elections.democracyclub.org.uk/api/elections/"
+# Requests to UPSTREAM_SYNC_URL are retried with exponential backoff
+# (SYNC_RETRY_BACKOFF * 2 ** retry seconds) on connection errors and 5xx
+SYNC_MAX_RETRIES = 5
+SYNC_RETRY_BACKOFF = 0.5
+SYNC_REQUEST_TIMEOUT = 60
+# Set if UPSTREAM_SYNC_URL supports ?cursor (keyset pagination ordered by
+# modified), whose next links stay valid while upstream is being edited.
+# Otherwise we follow upstream's usual page links.
+SYNC_UPSTREAM_CURSOR = False
+# Each run starts this many seconds before the high water mark of the last
+# one, to pick up elections saved upstream with an earlier modified time
+# after we'd passed it. Results we've already imported are skipped.
+SYNC_OVERLAP_SECONDS = 61 * 60
+# Concurrent requests used to fetch the parents and replacements of a page
+SYNC_FETCH_WORKERS = 8
+# Maximum number of organisations, divisions, explanations and metadata
+# that ElectionSyncer keeps in each of its lookup caches
+SYNC_CACHE_SIZE = 10000
 
 # DC Eventbus.
 SEND_EVENTS = False
@@ -294,6 +345,20 @@ if DC_ENVIRONMENT in ("development", "staging", "production"):
     DC_EVENTBUS_ARN = os.environ["DC_EVENTBUS_ARN"]
     SEND_EVENTS = True
 
+# Events are written to the OutboxEvent table and sent by the
+# dispatch_events management command, which cron runs every minute.
+# Failed sends are retried after EVENT_OUTBOX_RETRY_BACKOFF *
+# 2 ** attempts seconds.
+EVENT_OUTBOX_MAX_ATTEMPTS = 8
+EVENT_OUTBOX_RETRY_BACKOFF = 30
+EVENT_OUTBOX_DISPATCH_LIMIT = 1000
+# Keep sent events for this many days
+EVENT_OUTBOX_RETENTION_DAYS = 7
+# Point the events client at a local stub (e.g. moto_server)
+EVENTS_ENDPOINT_URL = os.environ.get("EVENTS_ENDPOINT_URL") or None
+# Connect and read timeout in seconds for calls to EventBridge
+EVENTS_CLIENT_TIMEOUT = 5
+
 GCS_API_KEY = os.environ.get("GCS_API_KEY", "")
 
 NOTICE_OF_ELECTION_BUCKET = "notice-of-election"